@@ -1,312 +1,29 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-import json
+from tkinter import ttk, messagebox, filedialog
+import contextlib
 import datetime
-import requests
-import threading
 from typing import Dict, List, Optional
-import uuid
 import webbrowser
 import tempfile
 import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
 
-class ICEActivity:
-    def __init__(self, activity_id: str = None):
-        self.id = activity_id or str(uuid.uuid4())
-        self.timestamp = datetime.datetime.now()
-        self.activity_type = ""
-        self.location = ""
-        self.description = ""
-        self.priority = "Medium"
-        self.status = "Active"
-        self.assigned_personnel = []
-        self.resources_needed = []
-        self.coordinates = {"lat": 0.0, "lng": 0.0}
-        self.alert_radius = 1000  # meters
-        
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "timestamp": self.timestamp.isoformat(),
-            "activity_type": self.activity_type,
-            "location": self.location,
-            "description": self.description,
-            "priority": self.priority,
-            "status": self.status,
-            "assigned_personnel": self.assigned_personnel,
-            "resources_needed": self.resources_needed,
-            "coordinates": self.coordinates,
-            "alert_radius": self.alert_radius
-        }
-    
-    @classmethod
-    def from_dict(cls, data):
-        activity = cls(data["id"])
-        activity.timestamp = datetime.datetime.fromisoformat(data["timestamp"])
-        activity.activity_type = data["activity_type"]
-        activity.location = data["location"]
-        activity.description = data["description"]
-        activity.priority = data["priority"]
-        activity.status = data["status"]
-        activity.assigned_personnel = data["assigned_personnel"]
-        activity.resources_needed = data["resources_needed"]
-        activity.coordinates = data["coordinates"]
-        activity.alert_radius = data.get("alert_radius", 1000)
-        return activity
-
-class WeatherAPI:
-    """Mock weather API - replace with actual weather service"""
-    
-    @staticmethod
-    def get_weather(location: str) -> Dict:
-        # Simulated weather data - replace with actual API calls
-        import random
-        conditions = ["Clear", "Cloudy", "Rainy", "Stormy", "Snowy"]
-        return {
-            "location": location,
-            "temperature": random.randint(-10, 35),
-            "condition": random.choice(conditions),
-            "wind_speed": random.randint(0, 50),
-            "visibility": random.randint(1, 10)
-        }
-
-class LocationAPI:
-    """Mock location API - replace with actual geocoding service"""
-    
-    @staticmethod
-    def geocode(address: str) -> Dict:
-        # Simulated geocoding - replace with actual API calls
-        import random
-        return {
-            "lat": round(random.uniform(33.8, 34.2), 6),  # Fullerton, CA area
-            "lng": round(random.uniform(-118.0, -117.5), 6),
-            "formatted_address": address
-        }
-
-class MapGenerator:
-    """Generates HTML maps with Google Maps integration"""
-    
-    @staticmethod
-    def generate_map_html(activities: List[ICEActivity]) -> str:
-        # Get center point (average of all coordinates)
-        if activities:
-            center_lat = sum(a.coordinates["lat"] for a in activities) / len(activities)
-            center_lng = sum(a.coordinates["lng"] for a in activities) / len(activities)
-        else:
-            center_lat, center_lng = 33.8703, -117.9242  # Fullerton, CA default
-        
-        # Priority color mapping
-        priority_colors = {
-            "Low": "#4CAF50",      # Green
-            "Medium": "#FF9800",   # Orange
-            "High": "#F44336",     # Red
-            "Critical": "#9C27B0"  # Purple
-        }
-        
-        # Status icons
-        status_icons = {
-            "Active": "⚠️",
-            "In Progress": "🚨",
-            "Resolved": "✅",  
-            "Closed": "⭕"
-        }
-        
-        # Generate map without Google Maps API (using OpenStreetMap instead)
-        html_content = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <title>ICE Activity Map</title>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <link rel="stylesheet" href="https://unpkg.com/leaflet@1.7.1/dist/leaflet.css" />
-    <style>
-        body {{ 
-            margin: 0; 
-            padding: 0; 
-            font-family: Arial, sans-serif; 
-        }}
-        #map {{ 
-            height: 100vh; 
-            width: 100%; 
-        }}
-        .info-panel {{
-            position: absolute;
-            top: 10px;
-            left: 10px;
-            background: white;
-            padding: 15px;
-            border-radius: 8px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.3);
-            z-index: 1000;
-            max-width: 300px;
-        }}
-        .legend {{
-            margin-top: 10px;
-        }}
-        .legend-item {{
-            display: flex;
-            align-items: center;
-            margin: 5px 0;
-        }}
-        .legend-color {{
-            width: 20px;
-            height: 20px;
-            border-radius: 50%;
-            margin-right: 10px;
-            border: 2px solid white;
-            box-shadow: 0 1px 3px rgba(0,0,0,0.3);
-        }}
-        .alert-banner {{
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            background: #f44336;
-            color: white;
-            text-align: center;
-            padding: 10px;
-            font-weight: bold;
-            z-index: 1001;
-            animation: blink 1s infinite;
-        }}
-        @keyframes blink {{
-            0%, 50% {{ opacity: 1; }}
-            51%, 100% {{ opacity: 0.7; }}
-        }}
-        .stats {{
-            display: grid;
-            grid-template-columns: 1fr 1fr;
-            gap: 10px;
-            margin-top: 10px;
-        }}
-        .stat-item {{
-            text-align: center;
-            padding: 5px;
-            background: #f5f5f5;
-            border-radius: 4px;
-        }}
-    </style>
-</head>
-<body>
-    <!-- Alert Banner for Critical Activities -->
-    {"<div class='alert-banner'>🚨 CRITICAL ICE ACTIVITIES DETECTED 🚨</div>" if any(a.priority == "Critical" and a.status in ["Active", "In Progress"] for a in activities) else ""}
-    
-    <div class="info-panel">
-        <h3>🚨 ICE Activity Monitor</h3>
-        <div class="stats">
-            <div class="stat-item">
-                <strong>{len([a for a in activities if a.status == "Active"])}</strong><br>
-                <small>Active</small>
-            </div>
-            <div class="stat-item">
-                <strong>{len([a for a in activities if a.priority == "Critical"])}</strong><br>
-                <small>Critical</small>
-            </div>
-            <div class="stat-item">
-                <strong>{len([a for a in activities if a.status == "In Progress"])}</strong><br>
-                <small>In Progress</small>
-            </div>
-            <div class="stat-item">
-                <strong>{len(activities)}</strong><br>
-                <small>Total</small>
-            </div>
-        </div>
-        
-        <div class="legend">
-            <h4>Priority Levels:</h4>
-            <div class="legend-item">
-                <div class="legend-color" style="background-color: {priority_colors['Critical']};"></div>
-                <span>Critical - Immediate Response</span>
-            </div>
-            <div class="legend-item">
-                <div class="legend-color" style="background-color: {priority_colors['High']};"></div>
-                <span>High - Urgent</span>
-            </div>
-            <div class="legend-item">
-                <div class="legend-color" style="background-color: {priority_colors['Medium']};"></div>
-                <span>Medium - Monitor</span>
-            </div>
-            <div class="legend-item">
-                <div class="legend-color" style="background-color: {priority_colors['Low']};"></div>
-                <span>Low - Routine</span>
-            </div>
-        </div>
-        
-        <div style="margin-top: 10px; font-size: 12px; color: #666;">
-            Last Updated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-        </div>
-    </div>
-
-    <div id="map"></div>
-    
-    <script src="https://unpkg.com/leaflet@1.7.1/dist/leaflet.js"></script>
-    <script>
-        // Initialize map with OpenStreetMap
-        const map = L.map('map').setView([{center_lat}, {center_lng}], 12);
-        
-        L.tileLayer('https://{{s}}.tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png', {{
-            attribution: '© OpenStreetMap contributors'
-        }}).addTo(map);
-        
-        // Activity data
-        const activities = {json.dumps([a.to_dict() for a in activities])};
-        const priorityColors = {json.dumps(priority_colors)};
-        
-        activities.forEach(activity => {{
-            const lat = activity.coordinates.lat;
-            const lng = activity.coordinates.lng;
-            const color = priorityColors[activity.priority];
-            
-            // Create custom icon
-            const customIcon = L.divIcon({{
-                html: `<div style="background-color: ${{color}}; width: 20px; height: 20px; border-radius: 50%; border: 3px solid white; box-shadow: 0 2px 4px rgba(0,0,0,0.3);"></div>`,
-                iconSize: [20, 20],
-                className: 'custom-marker'
-            }});
-            
-            // Create marker
-            const marker = L.marker([lat, lng], {{icon: customIcon}}).addTo(map);
-            
-            // Popup content
-            const popupContent = `
-                <div style="max-width: 250px;">
-                    <h3>${{activity.activity_type}}</h3>
-                    <p><strong>Location:</strong> ${{activity.location}}</p>
-                    <p><strong>Priority:</strong> <span style="color: ${{color}}; font-weight: bold;">${{activity.priority}}</span></p>
-                    <p><strong>Status:</strong> ${{activity.status}}</p>
-                    <p><strong>Time:</strong> ${{new Date(activity.timestamp).toLocaleString()}}</p>
-                    <p><strong>Description:</strong> ${{activity.description}}</p>
-                    ${{activity.assigned_personnel.length > 0 ? 
-                      `<p><strong>Personnel:</strong> ${{activity.assigned_personnel.join(', ')}}</p>` : ''}}
-                    ${{activity.resources_needed.length > 0 ? 
-                      `<p><strong>Resources:</strong> ${{activity.resources_needed.join(', ')}}</p>` : ''}}
-                </div>
-            `;
-            
-            marker.bindPopup(popupContent);
-            
-            // Alert radius circle for critical activities
-            if (activity.priority === 'Critical' || activity.priority === 'High') {{
-                L.circle([lat, lng], {{
-                    color: color,
-                    fillColor: color,
-                    fillOpacity: 0.1,
-                    radius: activity.alert_radius
-                }}).addTo(map);
-            }}
-        }});
-        
-        // Auto-refresh every 30 seconds
-        setTimeout(() => {{
-            window.location.reload();
-        }}, 30000);
-    </script>
-</body>
-</html>
-        """
-        
-        return html_content
+# Everything below the GUI lives in the headless ice_tracker package; optional features
+# (numpy arrays, map server, sync, weather) are imported on first use to keep startup lean
+from ice_tracker.dedup import DuplicateDetector, merge_into
+from ice_tracker.geo import SpatialIndex
+from ice_tracker.geocoding import CachedLocationAPI, LocationAPI
+from ice_tracker.ingest import import_reports
+from ice_tracker.mapgen import MapGenerator
+from ice_tracker.metrics import metrics
+from ice_tracker.models import OPEN_STATUSES, PRIORITIES, STATUSES, ICEActivity
+from ice_tracker.report import record_counter, write_report
+from ice_tracker.search import SearchIndex
+from ice_tracker.storage import PersistenceWorker, convert_snapshot, open_storage
+from ice_tracker.store import ActivityAggregates, ActivityStore, TimeIndex
 
 class ICEActivityTracker:
     def __init__(self, root):
@@ -314,17 +31,138 @@ class ICEActivityTracker:
         self.root.title("ICE Activity Tracker with Map Integration")
         self.root.geometry("1400x900")
         
-        self.activities: List[ICEActivity] = []
-        self.weather_api = WeatherAPI()
-        self.location_api = LocationAPI()
+        self.activities = ActivityStore()
+        self.spatial_index = SpatialIndex()
+        self.activities.add_listener(self.spatial_index.on_change)
+        self.aggregates = ActivityAggregates()
+        self.activities.add_listener(self.aggregates.on_change)
+        self.time_index = TimeIndex()
+        self.activities.add_listener(self.time_index.on_change)
+        self.search_index = SearchIndex()
+        self.activities.add_listener(self.search_index.on_change)
+        # Duplicate reports of one event: "suggest" asks before merging, "auto" merges, "off"
+        self.dedup = DuplicateDetector()
+        self.activities.add_listener(self.dedup.on_change)
+        self.dedup_mode = os.environ.get("ICE_DEDUP", "suggest")
+        self._activity_arrays = None  # built by the first batch geo query (see activity_arrays)
+        self._arrays_loaded = False
+        self._weather_service = None  # started by the first weather lookup
+        self.location_api = CachedLocationAPI(LocationAPI())
         self.map_generator = MapGenerator()
+        self.map_server = None  # MapServer, started by the first show_map
+        # Storage backend: "json" (journal + snapshot, default) or "sqlite"; with
+        # ICE_RETENTION_DAYS, older Resolved/Closed activities move to a gzip archive at startup
+        retention_days = os.environ.get("ICE_RETENTION_DAYS")
+        self.storage = open_storage(os.environ.get("ICE_STORAGE", "json"),
+                                    os.environ.get("ICE_SNAPSHOT_FORMAT", "json"),
+                                    float(retention_days) if retention_days else None)
+        # In lazy mode, history that reaches the store any way (paging, sync, merge) is no
+        # longer cold: claim it by id so counts and snapshots see it exactly once
+        self.activities.add_listener(
+            lambda event, activity: self.storage.claim_cold(activity) if event == "add" else None)
+        # Writes are coalesced on a background thread (window in seconds)
+        self.writer = PersistenceWorker(
+            self.storage,
+            window=float(os.environ.get("ICE_SAVE_WINDOW", "0.5")),
+            on_flush=lambda latency, count: self.root.after(0, self.on_save_flushed, latency, count),
+            on_error=lambda error: self.root.after(0, self.on_save_failed, error)
+        )
+        
+        # Lazy mode loads open activities at startup and pages history in on demand
+        self.lazy_load = os.environ.get("ICE_LAZY_LOAD", "0") == "1"
+        self.history_page_size = 500
+        self._history_requested = set()
+        self._history_exhausted = set()
+        
+        # Treeview reconciliation state: iid -> rendered version, and row order
+        self._rendered_versions: Dict[str, int] = {}
+        self._rendered_order: List[str] = []
+        self._render_key = None
+        
+        # The list view works on an index array of activity ids in display order; past
+        # virtual_threshold rows only the visible window of it is materialized in the Treeview
+        self.virtual_threshold = int(os.environ.get("ICE_VIRTUAL_THRESHOLD", "5000"))
+        self.virtual = False
+        self.list_offset = 0  # index in _filtered_ids of the first materialized row
+        self._window_rows = 0
+        self._filtered_ids: List[str] = []
+        self._filtered_critical = 0  # open Critical activities among _filtered_ids
+        self._selected_id: Optional[str] = None
+        self.sort_column: Optional[str] = None  # None keeps the priority/time order
+        self.sort_reverse = False
+        
+        # ICE_SYNC_URL joins this station to a shared store (python -m ice_tracker serve);
+        # the local storage stays as the station's cache
+        self.sync_url = os.environ.get("ICE_SYNC_URL")
+        self.sync = None  # StationSync, when ICE_SYNC_URL is set
         
         self.setup_ui()
         self.load_activities()
+        if self.sync_url:
+            self.start_sync()
         
         # Auto-refresh timer
         self.auto_refresh()
         
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+    
+    def on_close(self):
+        """Flush pending storage writes before the window goes away"""
+        try:
+            if self.sync is not None:
+                self.sync.stop()
+            self.writer.close()
+            self.storage.close()
+            self.location_api.cache.close()
+            if self._weather_service is not None:
+                self._weather_service.shutdown()
+            if self.map_server is not None:
+                self.map_server.stop()
+        finally:
+            self.root.destroy()
+    
+    def on_save_flushed(self, latency: float, count: int):
+        self.persist_var.set(f"💾 Saved {count} change(s) in {latency * 1000:.0f} ms")
+    
+    def on_save_failed(self, error: Exception):
+        self.persist_var.set("⚠️ Save failed - retrying")
+        self.status_var.set(f"⚠️ Failed to save activities: {error}")
+    
+    def start_sync(self):
+        from ice_tracker.sync import StationSync, SyncClient
+        self.sync = StationSync(
+            self.activities,
+            SyncClient(self.sync_url),
+            dispatch=lambda fn, *args: self.root.after(0, fn, *args),
+            interval=float(os.environ.get("ICE_SYNC_INTERVAL", "2")),
+            on_applied=self.on_sync_applied,
+            on_conflict=self.on_sync_conflict,
+            on_status=self.on_sync_status
+        )
+        self.sync.start()
+        self.status_var.set(f"Connecting to shared store at {self.sync_url}...")
+    
+    def on_sync_applied(self, changed: List[ICEActivity], removed_ids: List[str]):
+        """Remote changes are already in the store; keep the local cache and the list in step"""
+        self.writer.submit([activity.to_dict() for activity in changed], removed_ids)
+        self.refresh_display()
+        self.status_var.set(f"🔄 Synced {len(changed) + len(removed_ids)} change(s) from other stations")
+    
+    def on_sync_conflict(self, current: Optional[dict]):
+        if current is None:
+            message = "This activity was deleted at another station."
+        else:
+            message = (f"{current['activity_type']} at {current['location']} was changed at another station "
+                       f"(now {current['status']}). Their version has been loaded; re-apply your change if it still holds.")
+        messagebox.showwarning("Sync Conflict", message)
+        self.refresh_display()
+    
+    def on_sync_status(self, online: bool):
+        if online:
+            self.status_var.set(f"🔄 Connected to shared store at {self.sync_url}")
+        else:
+            self.status_var.set(f"⚠️ Shared store unreachable at {self.sync_url} - changes are queued")
+    
     def setup_ui(self):
         # Create main frame
         main_frame = ttk.Frame(self.root, padding="10")
@@ -363,6 +201,8 @@ class ICEActivityTracker:
                   command=self.close_activity).pack(fill=tk.X, pady=2)
         ttk.Button(control_frame, text="🌤️ Weather Update", 
                   command=self.get_weather_update).pack(fill=tk.X, pady=2)
+        ttk.Button(control_frame, text="📥 Import Reports", 
+                  command=self.bulk_import).pack(fill=tk.X, pady=2)
         ttk.Button(control_frame, text="📊 Generate Report", 
                   command=self.export_data).pack(fill=tk.X, pady=2)
         ttk.Button(control_frame, text="🔄 Refresh All", 
@@ -383,6 +223,16 @@ class ICEActivityTracker:
         filter_frame = ttk.LabelFrame(control_frame, text="Filters", padding="5")
         filter_frame.pack(fill=tk.X, pady=(10, 0))
         
+        # Search box: ranked prefix search, re-run once typing pauses
+        ttk.Label(filter_frame, text="Search:").pack()
+        self.search_var = tk.StringVar()
+        self._search_pending = None
+        search_entry = ttk.Entry(filter_frame, textvariable=self.search_var)
+        search_entry.pack(fill=tk.X, pady=2)
+        search_entry.bind("<Escape>", lambda event: self.search_var.set(""))
+        self.search_var.trace_add("write", self.on_search_changed)
+        self.root.bind("<Control-f>", lambda event: search_entry.focus_set())
+        
         ttk.Label(filter_frame, text="Status:").pack()
         self.status_filter = ttk.Combobox(filter_frame, 
                                          values=["All", "Active", "In Progress", "Resolved", "Closed"])
@@ -397,6 +247,12 @@ class ICEActivityTracker:
         self.priority_filter.pack(fill=tk.X, pady=2)
         self.priority_filter.bind('<<ComboboxSelected>>', self.filter_activities)
         
+        ttk.Label(filter_frame, text="Time:").pack()
+        self.time_filter = ttk.Combobox(filter_frame, values=list(self.TIME_WINDOWS), state="readonly")
+        self.time_filter.set("All")
+        self.time_filter.pack(fill=tk.X, pady=2)
+        self.time_filter.bind('<<ComboboxSelected>>', self.filter_activities)
+        
         # Quick Stats
         stats_frame = ttk.LabelFrame(control_frame, text="Quick Stats", padding="5")
         stats_frame.pack(fill=tk.X, pady=(10, 0))
@@ -404,6 +260,17 @@ class ICEActivityTracker:
         self.stats_text = tk.Text(stats_frame, height=8, width=30)
         self.stats_text.pack(fill=tk.X)
         
+        # Performance panel, shown on demand: live latencies of the instrumented hot paths
+        self.perf_var = tk.BooleanVar(value=False)
+        self._perf_job = None
+        ttk.Checkbutton(stats_frame, text="⏱️ Show Performance",
+                       variable=self.perf_var, command=self.toggle_performance).pack(anchor=tk.W)
+        self.perf_frame = ttk.LabelFrame(control_frame, text="Performance", padding="5")
+        self.perf_text = tk.Text(self.perf_frame, height=10, width=30, font=("Courier", 8))
+        self.perf_text.pack(fill=tk.X)
+        ttk.Button(self.perf_frame, text="💾 Export Metrics",
+                  command=self.export_metrics).pack(fill=tk.X, pady=2)
+        
         # Activity List
         list_frame = ttk.LabelFrame(main_frame, text="Emergency Activities", padding="5")
         list_frame.grid(row=1, column=1, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -414,9 +281,9 @@ class ICEActivityTracker:
         columns = ("Priority", "Status", "Time", "Type", "Location", "Description")
         self.activity_tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=20)
         
-        # Configure columns
+        # Configure columns; clicking a heading sorts the list by it
         for col in columns:
-            self.activity_tree.heading(col, text=col)
+            self.activity_tree.heading(col, text=col, command=lambda c=col: self.sort_by(c))
             if col == "Priority":
                 self.activity_tree.column(col, width=80)
             elif col == "Status":
@@ -435,9 +302,10 @@ class ICEActivityTracker:
         self.activity_tree.tag_configure("low", background="#e8f5e8", foreground="#2e7d32")
         
         # Scrollbars
-        v_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.activity_tree.yview)
+        v_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.on_v_scroll)
         h_scrollbar = ttk.Scrollbar(list_frame, orient=tk.HORIZONTAL, command=self.activity_tree.xview)
-        self.activity_tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.v_scrollbar = v_scrollbar
+        self.activity_tree.configure(yscrollcommand=self.on_tree_scroll, xscrollcommand=h_scrollbar.set)
         
         # Grid layout for treeview and scrollbars
         self.activity_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -447,28 +315,42 @@ class ICEActivityTracker:
         # Status bar
         self.status_var = tk.StringVar()
         self.status_var.set("ICE System Ready - Monitoring for emergencies...")
-        status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN)
-        status_bar.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(10, 0))
+        status_frame = ttk.Frame(main_frame)
+        status_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(10, 0))
+        status_bar = ttk.Label(status_frame, textvariable=self.status_var, relief=tk.SUNKEN)
+        status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        # Persistence latency / failures from the background writer
+        self.persist_var = tk.StringVar()
+        ttk.Label(status_frame, textvariable=self.persist_var, relief=tk.SUNKEN).pack(side=tk.RIGHT)
         
         # Bind double-click to view details
         self.activity_tree.bind("<Double-1>", self.view_activity_details)
-        
+        self.activity_tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+        
+        # In virtual mode the tree only holds the visible window, so scrolling is driven by hand
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.activity_tree.bind(sequence, self.on_tree_wheel)
+        for sequence in ("<Up>", "<Down>", "<Prior>", "<Next>"):
+            self.activity_tree.bind(sequence, self.on_tree_key)
+        self.activity_tree.bind("<Configure>", self.on_tree_resize)
+    
     def auto_refresh(self):
         """Auto-refresh the display every 30 seconds"""
         if self.auto_refresh_var.get():
             self.refresh_display()
             self.update_alerts()
+            self.prefetch_weather()
         
         # Schedule next refresh
         self.root.after(30000, self.auto_refresh)
     
     def update_alerts(self):
         """Update alert indicators"""
-        critical_active = [a for a in self.activities 
-                          if a.priority == "Critical" and a.status in ["Active", "In Progress"]]
+        critical_active = self.aggregates.critical_open
         
         if critical_active:
-            self.alert_label.config(text=f"⚠️ {len(critical_active)} CRITICAL ALERTS")
+            self.alert_label.config(text=f"⚠️ {critical_active} CRITICAL ALERTS")
             self.root.bell()  # System beep
         else:
             self.alert_label.config(text="")
@@ -481,9 +363,25 @@ class ICEActivityTracker:
         self.root.bell()
     
     def show_map(self):
+        """Open the live map served by the local map server"""
+        try:
+            if self.map_server is None:
+                from ice_tracker.server import MapServer
+                map_server = MapServer()
+                map_server.start()
+                self.activities.add_listener(map_server.on_change)
+                self.map_server = map_server
+            webbrowser.open(self.map_server.url)
+            self.status_var.set(f"Live map at {self.map_server.url} - updates stream in as activities change")
+        except OSError:
+            # Could not bind a local port: fall back to a one-off HTML file
+            self.show_static_map()
+    
+    def show_static_map(self):
         """Generate and show the map with all activities"""
         try:
-            html_content = self.map_generator.generate_map_html(self.activities)
+            html_content = self.map_generator.generate_map_html(self.activities, version=self.activities.version,
+                                                                aggregates=self.aggregates)
             
             # Create temporary HTML file
             temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8')
@@ -497,7 +395,7 @@ class ICEActivityTracker:
             
             # Clean up temp file after a delay
             self.root.after(60000, lambda: self.cleanup_temp_file(temp_file.name))
-            
+        
         except Exception as e:
             messagebox.showerror("Map Error", f"Failed to generate map: {str(e)}")
     
@@ -511,12 +409,12 @@ class ICEActivityTracker:
     
     def update_stats(self):
         """Update the statistics display"""
-        total = len(self.activities)
-        active = len([a for a in self.activities if a.status == "Active"])
-        in_progress = len([a for a in self.activities if a.status == "In Progress"])
-        critical = len([a for a in self.activities if a.priority == "Critical"])
-        high = len([a for a in self.activities if a.priority == "High"])
-        resolved = len([a for a in self.activities if a.status == "Resolved"])
+        total = self.count_activities()
+        active = self.count_activities(status="Active")
+        in_progress = self.count_activities(status="In Progress")
+        critical = self.count_activities(priority="Critical")
+        high = self.count_activities(priority="High")
+        resolved = self.count_activities(status="Resolved")
         
         stats_text = f"""📊 ACTIVITY STATISTICS
 
@@ -530,10 +428,45 @@ class ICEActivityTracker:
 Last Update:
 {datetime.datetime.now().strftime('%H:%M:%S')}
 """
-        
+
         self.stats_text.delete("1.0", tk.END)
         self.stats_text.insert("1.0", stats_text)
     
+    def toggle_performance(self):
+        """Show or hide the Performance panel under Quick Stats"""
+        if self.perf_var.get():
+            self.perf_frame.pack(fill=tk.X, pady=(10, 0))
+            self.update_performance()
+        else:
+            self.perf_frame.pack_forget()
+            if self._perf_job is not None:
+                self.root.after_cancel(self._perf_job)
+                self._perf_job = None
+    
+    def update_performance(self):
+        """Redraw the Performance panel every 2 seconds while it is shown"""
+        snapshot = metrics.snapshot()
+        lines = [f"{'op (ms)':<10}{'n':>5}{'p50':>5}{'p95':>5}{'max':>5}"]
+        for name, timer in snapshot["timers"].items():
+            lines.append(f"{name[:10]:<10}{timer['count']:>5}{timer['p50_ms']:>5.0f}"
+                         f"{timer['p95_ms']:>5.0f}{timer['max_ms']:>5.0f}")
+        if snapshot["counters"]:
+            lines.append("")
+            lines += [f"{name}: {value}" for name, value in snapshot["counters"].items()]
+        
+        self.perf_text.delete("1.0", tk.END)
+        self.perf_text.insert("1.0", "\n".join(lines))
+        self._perf_job = self.root.after(2000, self.update_performance)
+    
+    def export_metrics(self):
+        try:
+            filename = f"ice_metrics_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+            metrics.export(filename)
+            self.status_var.set(f"Performance metrics exported: {filename}")
+            messagebox.showinfo("⏱️ Metrics Exported", f"Performance metrics exported to {filename}")
+        except Exception as e:
+            messagebox.showerror("Export Error", f"Failed to export metrics: {str(e)}")
+    
     def add_activity(self):
         dialog = ActivityDialog(self.root, "🚨 Report New Emergency")
         if dialog.result:
@@ -544,13 +477,22 @@ Last Update:
             activity.priority = dialog.result["priority"]
             activity.assigned_personnel = dialog.result["personnel"].split(",") if dialog.result["personnel"] else []
             activity.resources_needed = dialog.result["resources"].split(",") if dialog.result["resources"] else []
+            activity.alert_radius = dialog.result["alert_radius"]
             
             # Get coordinates
             coords = self.location_api.geocode(activity.location)
             activity.coordinates = {"lat": coords["lat"], "lng": coords["lng"]}
             
-            self.activities.append(activity)
-            self.save_activities()
+            target = self.find_duplicate(activity)
+            if target is not None:
+                merged = merge_into(self.activities, target.id, activity)
+                self.save_activities(merged)
+                self.refresh_display()
+                self.status_var.set(f"Merged duplicate report into: {merged.activity_type} at {merged.location}")
+                return
+            
+            self.activities.add(activity)
+            self.save_activities(activity)
             self.refresh_display()
             
             # Show alert for critical activities
@@ -563,172 +505,227 @@ Last Update:
             
             self.status_var.set(f"Emergency reported: {activity.activity_type} at {activity.location}")
     
-    def update_activity(self):
+    def find_duplicate(self, activity: ICEActivity) -> Optional[ICEActivity]:
+        """Open activity this new report should be merged into, per dedup_mode"""
+        if self.dedup_mode == "off":
+            return None
+        match = self.dedup.best_match(activity)
+        if match is None:
+            return None
+        target = self.activities.get(match)
+        if self.dedup_mode == "auto":
+            return target
+        if messagebox.askyesno("Possible Duplicate",
+                               f"This looks like the same event as an open report:\n\n"
+                               f"{target.priority} - {target.activity_type} at {target.location}\n"
+                               f"Reported {target.timestamp.strftime('%m/%d %H:%M')}\n\n"
+                               f"Merge this report into it?"):
+            return target
+        return None
+    
+    def bulk_import(self):
+        """Bulk import a CSV/JSONL file; parsing and geocoding run off the Tk thread"""
+        path = filedialog.askopenfilename(
+            title="Import Reports",
+            filetypes=[("Reports", "*.csv *.jsonl"), ("All files", "*.*")])
+        if not path:
+            return
+        self.status_var.set(f"Importing {os.path.basename(path)}...")
+        
+        def work():
+            try:
+                activities, stats = import_reports(
+                    path, self.location_api,
+                    progress=lambda rows: self.root.after(0, self.status_var.set, f"Importing... {rows} rows read"))
+            except Exception as e:
+                self.root.after(0, messagebox.showerror, "Import Error", f"Failed to import reports: {str(e)}")
+                return
+            self.root.after(0, self.finish_import, activities, stats)
+        
+        threading.Thread(target=work, name="ice-import", daemon=True).start()
+    
+    def finish_import(self, activities: List[ICEActivity], stats: Dict):
+        """Add imported activities, save them in one write and refresh once"""
+        added = []
+        changed: Dict[str, ICEActivity] = {}
+        merged = suspected = skipped = 0
+        for activity in activities:
+            if activity.id in self.activities:
+                skipped += 1
+                continue
+            # Rows are checked against everything before them, including earlier rows of this file
+            match = self.dedup.best_match(activity) if self.dedup_mode != "off" else None
+            if match is not None and self.dedup_mode == "auto":
+                target = merge_into(self.activities, match, activity)
+                changed[target.id] = target
+                merged += 1
+                continue
+            suspected += match is not None
+            self.activities.add(activity)
+            added.append(activity)
+            changed[activity.id] = activity
+        if changed:
+            self.save_activities(*changed.values())
+        self.refresh_display()
+        
+        self.status_var.set(f"Imported {len(added)} of {stats['rows']} reports in {stats['seconds']:.1f}s "
+                            f"({stats['rows_per_sec']:.0f} rows/sec)")
+        if merged:
+            self.status_var.set(self.status_var.get() + f", {merged} merged as duplicates")
+        if stats["errors"] or skipped or suspected:
+            lines = [f"Line {line}: {message}" for line, message in stats["errors"][:10]]
+            if len(stats["errors"]) > 10:
+                lines.append(f"... and {len(stats['errors']) - 10} more")
+            if skipped:
+                lines.append(f"{skipped} reports already exist and were skipped")
+            if suspected:
+                lines.append(f"{suspected} reports look like duplicates of open activities (ICE_DEDUP=auto merges them)")
+            messagebox.showwarning("Import Warnings", "\n".join(lines))
+    
+    def selected_activity(self) -> Optional[ICEActivity]:
+        """Return the activity for the selected row, even if it is scrolled out of the window"""
+        if self._selected_id is None:
+            return None
+        return self.activities.get(self._selected_id)
+    
+    def on_tree_select(self, event=None):
+        """Track the selection by activity id (Treeview iids are activity ids)"""
         selected = self.activity_tree.selection()
-        if not selected:
+        if selected:
+            self._selected_id = selected[0]
+        elif self._selected_id is not None and self.activity_tree.exists(self._selected_id):
+            self._selected_id = None  # deselected by the user, not just scrolled out of the window
+    
+    def find_nearby(self, lat: float, lng: float, radius_m: float, statuses=None) -> List[tuple]:
+        """(activity, distance_m) pairs within radius_m of a point, nearest first"""
+        return [(self.activities.get(i), d)
+                for i, d in self.spatial_index.within(lat, lng, radius_m, statuses)]
+    
+    @property
+    def activity_arrays(self):
+        """Vectorized batch geo queries (ActivityArrays), or None when numpy is not installed"""
+        if not self._arrays_loaded:
+            self._arrays_loaded = True
+            from ice_tracker.arrays import ActivityArrays, np
+            if np is not None:
+                self._activity_arrays = ActivityArrays()
+                self.activities.add_listener(self._activity_arrays.on_change)
+        return self._activity_arrays
+    
+    @property
+    def weather_service(self):
+        """WeatherService with its fetch pool, created on first use"""
+        if self._weather_service is None:
+            from ice_tracker.weather import WeatherAPI, WeatherService
+            self._weather_service = WeatherService(WeatherAPI())
+        return self._weather_service
+    
+    def alerts_covering(self, lat: float, lng: float, priorities=None) -> List[tuple]:
+        """(activity, distance_m) pairs for open activities whose alert radius covers a point"""
+        return [(self.activities.get(i), d)
+                for i, d in self.spatial_index.covering(lat, lng, OPEN_STATUSES, priorities)]
+    
+    def locations_in_alerts(self, points, priorities=("High", "Critical")) -> List[List[ICEActivity]]:
+        """For each (lat, lng) point, the open alerts whose circle covers it
+        
+        Uses one vectorized pass when numpy is available, else a spatial index query per point.
+        """
+        if self.activity_arrays is not None and points:
+            lats, lngs = zip(*points)
+            covering = self.activity_arrays.covering(lats, lngs, priorities, OPEN_STATUSES)
+            return [[self.activities.get(i) for i in ids] for ids in covering]
+        return [[a for a, _ in self.alerts_covering(lat, lng, priorities)] for lat, lng in points]
+    
+    def update_activity(self):
+        if not self.selected_activity():
             messagebox.showwarning("No Selection", "Please select an activity to update.")
             return
         
-        # Get activity ID from the first column (hidden)
-        item = self.activity_tree.item(selected[0])
-        values = item["values"]
-        
-        # Find activity by matching details (since we don't store ID in visible columns)
-        activity = None
-        for a in self.activities:
-            if (a.priority == values[0].split()[-1] and a.status == values[1].split()[-1] and 
-                a.activity_type == values[3] and a.location == values[4]):
-                activity = a
-                break
+        activity = self.selected_activity()
         
         if activity:
             dialog = ActivityDialog(self.root, f"🔄 Update Emergency - {activity.activity_type}", activity)
             if dialog.result:
-                activity.activity_type = dialog.result["type"]
-                activity.location = dialog.result["location"]
-                activity.description = dialog.result["description"]
-                activity.priority = dialog.result["priority"]
-                activity.status = dialog.result["status"]
-                activity.assigned_personnel = dialog.result["personnel"].split(",") if dialog.result["personnel"] else []
-                activity.resources_needed = dialog.result["resources"].split(",") if dialog.result["resources"] else []
+                coordinates = activity.coordinates
+                if dialog.result["location"] != activity.location:
+                    # New location: re-geocode so the map and spatial queries follow the move
+                    coords = self.location_api.geocode(dialog.result["location"])
+                    coordinates = {"lat": coords["lat"], "lng": coords["lng"]}
+                
+                self.activities.update(
+                    activity.id,
+                    coordinates=coordinates,
+                    alert_radius=dialog.result["alert_radius"],
+                    activity_type=dialog.result["type"],
+                    location=dialog.result["location"],
+                    description=dialog.result["description"],
+                    priority=dialog.result["priority"],
+                    status=dialog.result["status"],
+                    assigned_personnel=dialog.result["personnel"].split(",") if dialog.result["personnel"] else [],
+                    resources_needed=dialog.result["resources"].split(",") if dialog.result["resources"] else []
+                )
                 
-                self.save_activities()
+                self.save_activities(activity)
                 self.refresh_display()
                 self.status_var.set(f"Updated: {activity.activity_type}")
     
     def close_activity(self):
-        selected = self.activity_tree.selection()
-        if not selected:
+        if not self.selected_activity():
             messagebox.showwarning("No Selection", "Please select an activity to close.")
             return
         
         if messagebox.askyesno("Confirm Closure", "Are you sure you want to close this emergency activity?"):
-            item = self.activity_tree.item(selected[0])
-            values = item["values"]
-            
-            # Find and close activity
-            for activity in self.activities:
-                if (activity.priority == values[0].split()[-1] and activity.status == values[1].split()[-1] and 
-                    activity.activity_type == values[3] and activity.location == values[4]):
-                    activity.status = "Closed"
-                    break
+            activity = self.selected_activity()
+            if activity:
+                self.activities.update(activity.id, status="Closed")
+                self.save_activities(activity)
             
-            self.save_activities()
             self.refresh_display()
             self.status_var.set("Emergency activity closed")
     
     def get_weather_update(self):
-        selected = self.activity_tree.selection()
-        if not selected:
+        activity = self.selected_activity()
+        if not activity:
             messagebox.showwarning("No Selection", "Please select an activity for weather update.")
             return
         
-        item = self.activity_tree.item(selected[0])
-        values = item["values"]
-        location = values[4]  # Location column
+        location = activity.location
         
-        def fetch_weather():
-            try:
-                weather = self.weather_api.get_weather(location)
-                message = f"🌤️ Weather at {location}:\n\n"
-                message += f"🌡️ Temperature: {weather['temperature']}°C\n"
-                message += f"☁️ Condition: {weather['condition']}\n"
-                message += f"💨 Wind Speed: {weather['wind_speed']} km/h\n"
-                message += f"👁️ Visibility: {weather['visibility']} km\n\n"
-                
-                if weather['condition'] in ['Stormy', 'Snowy'] or weather['wind_speed'] > 30:
-                    message += "⚠️ Weather conditions may affect emergency response!"
-                
-                self.root.after(0, lambda: messagebox.showinfo("Weather Update", message))
-                self.root.after(0, lambda: self.status_var.set("Weather data retrieved"))
-            except Exception as e:
-                self.root.after(0, lambda: messagebox.showerror("Error", f"Weather fetch failed: {str(e)}"))
-        
-        threading.Thread(target=fetch_weather, daemon=True).start()
-        self.status_var.set("Fetching weather conditions...")
-    
-    def view_activity_details(self, event):
-        selected = self.activity_tree.selection()
-        if selected:
-            item = self.activity_tree.item(selected[0])
-            values = item["values"]
-            
-            # Find full activity details
-            activity = None
-            for a in self.activities:
-                if (a.priority == values[0].split()[-1] and a.status == values[1].split()[-1] and 
-                    a.activity_type == values[3] and a.location == values[4]):
-                    activity = a
-                    break
-            
-            if activity:
-                # Priority emoji mapping
-                priority_emoji = {
-                    "Critical": "🚨",
-                    "High": "⚠️",
-                    "Medium": "🔵",
-                    "Low": "🟢"
-                }
-                
-                status_emoji = {
-                    "Active": "🔴",
-                    "In Progress": "🟡",
-                    "Resolved": "✅",
-                    "Closed": "⭕"
-                }
-                
-                details = f"{priority_emoji.get(activity.priority, '📍')} EMERGENCY DETAILS\n{'='*60}\n\n"
-                details += f"🆔 ID: {activity.id}\n"
-                details += f"🏷️  Type: {activity.activity_type}\n"
-                details += f"📍 Location: {activity.location}\n"
-                details += f"🗺️  Coordinates: {activity.coordinates['lat']:.6f}, {activity.coordinates['lng']:.6f}\n"
-                details += f"📝 Description: {activity.description}\n"
-                details += f"⚡ Priority: {priority_emoji.get(activity.priority, '')} {activity.priority}\n"
-                details += f"📊 Status: {status_emoji.get(activity.status, '')} {activity.status}\n"
-                details += f"🕐 Created: {activity.timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n"
-                details += f"👥 Personnel: {', '.join(activity.assigned_personnel) if activity.assigned_personnel else 'None assigned'}\n"
-                details += f"🛠️  Resources: {', '.join(activity.resources_needed) if activity.resources_needed else 'None specified'}\n"
-                details += f"📏 Alert Radius: {activity.alert_radius}m\n"
-                
-                # Add weather info if available
-                try:
-                    weather = self.weather_api.get_weather(activity.location)
-                    details += f"\n🌤️ CURRENT WEATHER:\n"
-                    details += f"🌡️ Temperature: {weather['temperature']}°C\n"
-                    details += f"☁️ Condition: {weather['condition']}\n"
-                    details += f"💨 Wind: {weather['wind_speed']} km/h\n"
-                except:
-                    details += f"\n🌤️ Weather data unavailable\n"
-                
-                messagebox.showinfo("Emergency Activity Details", details)
-    
-    def filter_activities(self, event=None):
-        self.refresh_display()
+        future = self.weather_service.fetch(location)
+        if future.done():
+            self.show_weather(location, future)
+        else:
+            future.add_done_callback(lambda f: self.root.after(0, self.show_weather, location, f))
+            self.status_var.set("Fetching weather conditions...")
     
-    def refresh_display(self):
-        # Clear existing items
-        for item in self.activity_tree.get_children():
-            self.activity_tree.delete(item)
-        
-        # Apply filters
-        status_filter = self.status_filter.get()
-        priority_filter = self.priority_filter.get()
-        
-        filtered_activities = self.activities
-        
-        if status_filter != "All":
-            filtered_activities = [a for a in filtered_activities if a.status == status_filter]
+    def show_weather(self, location: str, future: Future):
+        try:
+            weather = future.result()
+        except Exception as e:
+            messagebox.showerror("Error", f"Weather fetch failed: {str(e)}")
+            return
         
-        if priority_filter != "All":
-            filtered_activities = [a for a in filtered_activities if a.priority == priority_filter]
+        message = f"🌤️ Weather at {location}:\n\n"
+        message += f"🌡️ Temperature: {weather['temperature']}°C\n"
+        message += f"☁️ Condition: {weather['condition']}\n"
+        message += f"💨 Wind Speed: {weather['wind_speed']} km/h\n"
+        message += f"👁️ Visibility: {weather['visibility']} km\n\n"
         
-        # Sort by priority and timestamp
-        priority_order = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
-        filtered_activities.sort(key=lambda x: (priority_order.get(x.priority, 4), x.timestamp), reverse=True)
+        if weather['condition'] in ['Stormy', 'Snowy'] or weather['wind_speed'] > 30:
+            message += "⚠️ Weather conditions may affect emergency response!"
         
-        # Add filtered activities to tree with appropriate tags
-        for activity in filtered_activities:
-            # Priority and status emojis
+        self.status_var.set("Weather data retrieved")
+        messagebox.showinfo("Weather Update", message)
+    
+    def prefetch_weather(self):
+        """Warm the weather cache for every open activity so details show it instantly"""
+        self.weather_service.prefetch(
+            a.location for status in OPEN_STATUSES for a in self.activities.filter(status=status))
+    
+    def view_activity_details(self, event):
+        activity = self.selected_activity()
+        if activity:
+            # Priority emoji mapping
             priority_emoji = {
                 "Critical": "🚨",
                 "High": "⚠️",
@@ -743,51 +740,435 @@ Last Update:
                 "Closed": "⭕"
             }
             
-            values = (
-                f"{priority_emoji.get(activity.priority, '')} {activity.priority}",
-                f"{status_emoji.get(activity.status, '')} {activity.status}",
-                activity.timestamp.strftime("%m/%d %H:%M"),
-                activity.activity_type,
-                activity.location,
-                activity.description[:60] + "..." if len(activity.description) > 60 else activity.description
-            )
-            
-            # Determine tag for coloring
-            tag = activity.priority.lower()
+            details = f"{priority_emoji.get(activity.priority, '📍')} EMERGENCY DETAILS\n{'='*60}\n\n"
+            details += f"🆔 ID: {activity.id}\n"
+            details += f"🏷️  Type: {activity.activity_type}\n"
+            details += f"📍 Location: {activity.location}\n"
+            details += f"🗺️  Coordinates: {activity.coordinates['lat']:.6f}, {activity.coordinates['lng']:.6f}\n"
+            details += f"📝 Description: {activity.description}\n"
+            details += f"⚡ Priority: {priority_emoji.get(activity.priority, '')} {activity.priority}\n"
+            details += f"📊 Status: {status_emoji.get(activity.status, '')} {activity.status}\n"
+            details += f"🕐 Created: {activity.timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n"
+            details += f"👥 Personnel: {', '.join(activity.assigned_personnel) if activity.assigned_personnel else 'None assigned'}\n"
+            details += f"🛠️  Resources: {', '.join(activity.resources_needed) if activity.resources_needed else 'None specified'}\n"
+            details += f"📏 Alert Radius: {activity.alert_radius}m\n"
+            nearby = self.find_nearby(activity.coordinates["lat"], activity.coordinates["lng"],
+                                      activity.alert_radius, OPEN_STATUSES)
+            details += f"📡 Other open reports within radius: {len([a for a, _ in nearby if a.id != activity.id])}\n"
             
-            item = self.activity_tree.insert("", tk.END, values=values, tags=(tag,))
+            # Add weather info if available
+            try:
+                weather = self.weather_service.get_cached(activity.location)
+                if weather is None:
+                    weather = self.weather_service.fetch(activity.location).result(timeout=5)
+                details += f"\n🌤️ CURRENT WEATHER:\n"
+                details += f"🌡️ Temperature: {weather['temperature']}°C\n"
+                details += f"☁️ Condition: {weather['condition']}\n"
+                details += f"💨 Wind: {weather['wind_speed']} km/h\n"
+            except:
+                details += f"\n🌤️ Weather data unavailable\n"
             
-            # Make critical items blink (visually stand out)
-            if activity.priority == "Critical" and activity.status == "Active":
-                self.activity_tree.set(item, "Priority", f"🚨⚡ {activity.priority} ⚡🚨")
+            messagebox.showinfo("Emergency Activity Details", details)
+    
+    def filter_activities(self, event=None):
+        self.refresh_display()
+    
+    def on_search_changed(self, *args):
+        """Debounce the search box so a query runs once typing pauses"""
+        if self._search_pending is not None:
+            self.root.after_cancel(self._search_pending)
+        self._search_pending = self.root.after(150, self.run_search)
+    
+    def run_search(self):
+        self._search_pending = None
+        self.refresh_display()
+    
+    def on_tree_scroll(self, first, last):
+        """Treeview yscrollcommand; in virtual mode the scrollbar tracks list_offset instead"""
+        if self.virtual:
+            return
+        self.v_scrollbar.set(first, last)
+        self.check_history(first, last)
+    
+    def check_history(self, first, last):
+        """Page in more history when the list is scrolled to the end"""
+        if self.lazy_load and float(last) >= 0.98 and float(first) > 0.0:
+            self.root.after_idle(self.load_more_history)
+    
+    def on_v_scroll(self, *args):
+        """Scrollbar command: native Treeview scrolling, or moving the virtual window"""
+        if not self.virtual:
+            return self.activity_tree.yview(*args)
+        if args[0] == "moveto":
+            offset = int(float(args[1]) * len(self._filtered_ids))
+        else:  # ("scroll", count, "units" | "pages")
+            step = self.visible_rows() if args[2] == "pages" else 1
+            offset = self.list_offset + int(args[1]) * step
+        self.scroll_to(offset)
+    
+    def on_tree_wheel(self, event):
+        if not self.virtual:
+            return None
+        if event.num == 4 or event.delta > 0:
+            self.scroll_to(self.list_offset - 3)
+        else:
+            self.scroll_to(self.list_offset + 3)
+        return "break"
+    
+    def on_tree_key(self, event):
+        """Arrow and page keys move the selection through the whole list, not just the window"""
+        if not self.virtual or not self._filtered_ids:
+            return None
+        ids = self._filtered_ids
+        window = self.visible_rows()
+        focus = self.activity_tree.focus()
+        shown = ids[self.list_offset:self.list_offset + window]
+        index = self.list_offset + (shown.index(focus) if focus in shown else 0)
+        step = {"Up": -1, "Down": 1, "Prior": -window, "Next": window}[event.keysym]
+        index = max(0, min(len(ids) - 1, index + step))
+        
+        self._selected_id = ids[index]
+        if index < self.list_offset:
+            self.scroll_to(index)
+        elif index >= self.list_offset + window:
+            self.scroll_to(index - window + 1)
+        self.activity_tree.selection_set(ids[index])
+        self.activity_tree.focus(ids[index])
+        return "break"
+    
+    def on_tree_resize(self, event=None):
+        if self.virtual and self.visible_rows() != self._window_rows:
+            self.render_rows()
+    
+    def visible_rows(self) -> int:
+        """Rows that fit in the list widget at its current size"""
+        tree = self.activity_tree
+        height = tree.winfo_height()
+        if height <= 1:  # not mapped yet
+            return int(tree.cget("height"))
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        return max(1, height // rowheight - 1)  # less the heading row
+    
+    def scroll_to(self, offset: int):
+        """Move the virtual window so that row offset is at the top"""
+        window = self.visible_rows()
+        offset = max(0, min(offset, len(self._filtered_ids) - window))
+        if offset != self.list_offset or window != self._window_rows:
+            self.list_offset = offset
+            self.render_rows()
+        else:
+            self.update_virtual_scrollbar()  # at either end; still lets history page in
+    
+    def sort_by(self, column: str):
+        """Heading click: sort by column, clicking again reverses the order"""
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column, self.sort_reverse = column, False
+        for col in self.activity_tree["columns"]:
+            arrow = (" ▼" if self.sort_reverse else " ▲") if col == column else ""
+            self.activity_tree.heading(col, text=col + arrow)
+        self.refresh_display()
+    
+    @metrics.timed("load_history")
+    def load_more_history(self) -> int:
+        """Page in the next batch of Resolved/Closed history needed by the status filter"""
+        status_filter = self.status_filter.get()
+        if not self.lazy_load or status_filter in OPEN_STATUSES:
+            return 0
+        status = None if status_filter == "All" else status_filter
+        if status in self._history_exhausted or None in self._history_exhausted:
+            return 0
+        
+        page = self.storage.page_history(status=status, limit=self.history_page_size)
+        if len(page) < self.history_page_size:
+            self._history_exhausted.add(status)
+        added = 0
+        # Paged-in history is not a new report, so it is not pushed to the shared store
+        with self.sync.quiet() if self.sync is not None else contextlib.nullcontext():
+            for activity in page:
+                if activity.id not in self.activities:
+                    self.activities.add(activity)
+                    added += 1
+        if added:
+            self.refresh_display()
+        return added
+    
+    @metrics.timed("refresh")
+    def refresh_display(self):
+        # Apply filters
+        status_filter = self.status_filter.get()
+        priority_filter = self.priority_filter.get()
+        
+        # First time a filter shows history in lazy mode, page in its first batch
+        if self.lazy_load and status_filter not in self._history_requested:
+            self._history_requested.add(status_filter)
+            if self.load_more_history():
+                return  # load_more_history already refreshed
+        
+        # Only query and touch the tree when the data, filters or sort changed since the last render
+        search = self.search_var.get().strip()
+        since = self.time_window_start()
+        render_key = (self.activities.version, status_filter, priority_filter, self.time_filter.get(),
+                      search, self.sort_column, self.sort_reverse, since)
+        if render_key != self._render_key:
+            # A new filter or sort starts back at the top; the window sliding by a minute does not
+            if self._render_key is None or render_key[1:7] != self._render_key[1:7]:
+                self.list_offset = 0
+            self._filtered_ids = self.query_ids(
+                status=None if status_filter == "All" else status_filter,
+                priority=None if priority_filter == "All" else priority_filter,
+                since=since,
+                search=search
+            )
+            # A row filtered out (or deleted) is no longer selected; one merely scrolled out
+            # of the virtual window still is
+            if self._selected_id is not None and self._selected_id not in self._filtered_ids:
+                self._selected_id = None
+            get = self.activities.get
+            self._filtered_critical = sum(1 for i in self._filtered_ids
+                                          if get(i).priority == "Critical" and get(i).status in OPEN_STATUSES)
+            self.render_rows()
+            self._render_key = render_key
+        shown_count = len(self._filtered_ids)
         
         # Update statistics
         self.update_stats()
         
-        # Update status
-        critical_count = len([a for a in filtered_activities if a.priority == "Critical" and a.status in ["Active", "In Progress"]])
+        # Update status; the alert counts the rows shown, so it follows every filter and the search
+        critical_count = self._filtered_critical
         if critical_count > 0:
-            self.status_var.set(f"⚠️ ALERT: {critical_count} CRITICAL emergencies active | Showing {len(filtered_activities)} of {len(self.activities)} activities")
+            self.status_var.set(f"⚠️ ALERT: {critical_count} CRITICAL emergencies active | Showing {shown_count} of {self.count_activities()} activities")
+        else:
+            self.status_var.set(f"Monitoring {shown_count} of {self.count_activities()} emergency activities")
+    
+    # Heading sort keys, applied to the id index array
+    SORT_KEYS = {
+        "Priority": lambda a: PRIORITIES.index(a.priority) if a.priority in PRIORITIES else -1,
+        "Status": lambda a: STATUSES.index(a.status) if a.status in STATUSES else len(STATUSES),
+        "Time": lambda a: a.ts,
+        "Type": lambda a: a.activity_type.lower(),
+        "Location": lambda a: a.location.lower(),
+        "Description": lambda a: a.description.lower()
+    }
+    
+    # Time filter choices -> window length in seconds
+    TIME_WINDOWS = {
+        "All": None,
+        "Last hour": 3600,
+        "Last 2 hours": 7200,
+        "Last 24 hours": 86400,
+        "Last 7 days": 604800,
+        "Last 30 days": 2592000
+    }
+    
+    def time_window_start(self) -> Optional[float]:
+        """Epoch start of the selected time window, on a whole minute so renders can be reused"""
+        window = self.TIME_WINDOWS.get(self.time_filter.get())
+        if window is None:
+            return None
+        return (time.time() - window) // 60 * 60
+    
+    def query_ids(self, status: str = None, priority: str = None, since: float = None,
+                  search: str = None) -> List[str]:
+        """Ids of the filtered activities in display order, pushed down to SQL when the backend can
+        
+        With search text the order is the search ranking, over the loaded activities. While
+        the writer still has changes queued, the in-memory indexes answer instead of SQL, so
+        a refresh never waits on the disk.
+        """
+        get = self.activities.get
+        if search:
+            ids = [i for i in self.search_index.search_ids(search)
+                   if (status is None or get(i).status == status) and
+                   (priority is None or get(i).priority == priority) and
+                   (since is None or get(i).ts >= since)]
+        elif self.storage.supports_queries and not self.writer.dirty:
+            ids = [i for i in self.storage.query_ids(
+                       status=status, priority=priority,
+                       since=None if since is None else datetime.datetime.fromtimestamp(since))
+                   if i in self.activities]
         else:
-            self.status_var.set(f"Monitoring {len(filtered_activities)} of {len(self.activities)} emergency activities")
+            # The original list order: (priority rank, time) descending, so Low comes before
+            # Critical (unrecognized priorities first) and each rank is newest first. The time
+            # index already holds each priority's ids in time order, so the runs are concatenated
+            priority_order = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
+            groups: Dict[int, List[str]] = {}
+            for p in ([priority] if priority is not None else self.time_index.priorities()):
+                groups.setdefault(priority_order.get(p, 4), []).append(p)
+            ids = []
+            for order in sorted(groups, reverse=True):
+                run = [i for p in groups[order] for i in self.time_index.range(since=since, priority=p)]
+                if len(groups[order]) > 1:  # several unrecognized priorities share a rank
+                    run.sort(key=lambda i: get(i).ts)
+                ids.extend(reversed(run))
+            if status is not None:
+                ids = [i for i in ids if get(i).status == status]
+        
+        if self.sort_column is not None:
+            key = self.SORT_KEYS[self.sort_column]
+            ids.sort(key=lambda i: key(get(i)), reverse=self.sort_reverse)
+        return ids
     
-    def save_activities(self):
+    def query_activities(self, status: str = None, priority: str = None, since: float = None,
+                         search: str = None) -> List[ICEActivity]:
+        """Filtered activities in display order"""
+        return [self.activities.get(i) for i in self.query_ids(status=status, priority=priority,
+                                                               since=since, search=search)]
+    
+    def count_activities(self, status: str = None, priority: str = None) -> int:
+        """Count across all history, including records not paged in yet"""
+        return (self.aggregates.count(status=status, priority=priority) +
+                self.storage.cold_count(status=status, priority=priority))
+    
+    def activity_row(self, activity: ICEActivity):
+        """Build the Treeview values and tags for an activity"""
+        # Priority and status emojis
+        priority_emoji = {
+            "Critical": "🚨",
+            "High": "⚠️",
+            "Medium": "🔵",
+            "Low": "🟢"
+        }
+        
+        status_emoji = {
+            "Active": "🔴",
+            "In Progress": "🟡",
+            "Resolved": "✅",
+            "Closed": "⭕"
+        }
+        
+        priority_text = f"{priority_emoji.get(activity.priority, '')} {activity.priority}"
+        
+        # Make critical items blink (visually stand out)
+        if activity.priority == "Critical" and activity.status == "Active":
+            priority_text = f"🚨⚡ {activity.priority} ⚡🚨"
+        
+        values = (
+            priority_text,
+            f"{status_emoji.get(activity.status, '')} {activity.status}",
+            activity.timestamp.strftime("%m/%d %H:%M"),
+            activity.activity_type,
+            activity.location,
+            activity.description[:60] + "..." if len(activity.description) > 60 else activity.description
+        )
+        
+        # Determine tag for coloring
+        return values, (activity.priority.lower(),)
+    
+    def render_rows(self):
+        """Materialize every filtered row, or only the visible window past virtual_threshold"""
+        ids = self._filtered_ids
+        get = self.activities.get
+        self.virtual = len(ids) > self.virtual_threshold
+        if not self.virtual:
+            self.list_offset = 0
+            self.reconcile_tree([get(i) for i in ids])
+            return
+        
+        window = self._window_rows = self.visible_rows()
+        self.list_offset = max(0, min(self.list_offset, len(ids) - window))
+        self.reconcile_tree([get(i) for i in ids[self.list_offset:self.list_offset + window]])
+        self.activity_tree.yview_moveto(0)
+        if self._selected_id is not None and self.activity_tree.exists(self._selected_id):
+            self.activity_tree.selection_set(self._selected_id)
+        self.update_virtual_scrollbar()
+    
+    def update_virtual_scrollbar(self):
+        total = len(self._filtered_ids) or 1
+        first = self.list_offset / total
+        last = min(1.0, (self.list_offset + self._window_rows) / total)
+        self.v_scrollbar.set(first, last)
+        self.check_history(first, last)
+    
+    def reconcile_tree(self, activities: List[ICEActivity]):
+        """Insert, update, move or delete only the rows that differ from the last render"""
+        tree = self.activity_tree
+        wanted = [a.id for a in activities]
+        wanted_pos = {iid: i for i, iid in enumerate(wanted)}
+        
+        # Delete rows that dropped out of the filtered view
+        removed = [iid for iid in self._rendered_order if iid not in wanted_pos]
+        if removed:
+            tree.delete(*removed)
+            for iid in removed:
+                del self._rendered_versions[iid]
+        order = [iid for iid in self._rendered_order if iid in wanted_pos]
+        
+        # Rows on the longest run already in the right relative order stay put;
+        # every other existing row is detached and re-attached at its new index
+        stable = self._stable_rows(order, wanted_pos)
+        moved = [iid for iid in order if iid not in stable]
+        if moved:
+            tree.detach(*moved)
+        
+        for index, activity in enumerate(activities):
+            iid = activity.id
+            rendered = self._rendered_versions.get(iid)
+            if rendered is None:
+                values, tags = self.activity_row(activity)
+                tree.insert("", index, iid=iid, values=values, tags=tags)
+            else:
+                if rendered != activity.version:
+                    values, tags = self.activity_row(activity)
+                    tree.item(iid, values=values, tags=tags)
+                if iid not in stable:
+                    tree.move(iid, "", index)
+            self._rendered_versions[iid] = activity.version
+        
+        self._rendered_order = wanted
+    
+    @staticmethod
+    def _stable_rows(order: List[str], wanted_pos: Dict[str, int]) -> set:
+        """Longest subsequence of rendered rows whose order already matches the target"""
+        positions = [wanted_pos[iid] for iid in order]
+        tails: List[int] = []  # tails[k]: index in order ending the best run of length k+1
+        parents = [-1] * len(positions)
+        for i, pos in enumerate(positions):
+            lo, hi = 0, len(tails)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if positions[tails[mid]] < pos:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            if lo > 0:
+                parents[i] = tails[lo - 1]
+            if lo == len(tails):
+                tails.append(i)
+            else:
+                tails[lo] = i
+        stable = set()
+        i = tails[-1] if tails else -1
+        while i >= 0:
+            stable.add(order[i])
+            i = parents[i]
+        return stable
+    
+    def save_activities(self, *changed: ICEActivity):
+        """Queue the changed activities for the writer; with no arguments write a full snapshot"""
         try:
-            data = [activity.to_dict() for activity in self.activities]
-            with open("ice_activities.json", "w") as f:
-                json.dump(data, f, indent=2)
+            # Changes are serialized here on the Tk thread so the writer never sees half-applied
+            # edits; a snapshot only copies the activity list and is serialized by the writer
+            if changed:
+                self.writer.submit([activity.to_dict() for activity in changed])
+            if not changed or (self.storage.needs_compaction() and not self.writer.snapshot_pending):
+                self.writer.request_snapshot(list(self.activities) + self.storage.cold_records())
         except Exception as e:
             messagebox.showerror("Save Error", f"Failed to save activities: {str(e)}")
     
+    @metrics.timed("load")
     def load_activities(self):
         try:
-            with open("ice_activities.json", "r") as f:
-                data = json.load(f)
-                self.activities = [ICEActivity.from_dict(item) for item in data]
+            loaded = self.storage.load_open() if self.lazy_load else self.storage.load()
+            # Fill the existing store so its listeners (indexes) see every record
+            for activity in loaded:
+                self.activities.add(activity)
             self.refresh_display()
         except FileNotFoundError:
-            # Create some sample data for demonstration
-            self.create_sample_data()
+            # Create some sample data for demonstration; a synced station gets the shared data instead
+            if not self.sync_url:
+                self.create_sample_data()
         except Exception as e:
             messagebox.showerror("Load Error", f"Failed to load activities: {str(e)}")
     
@@ -837,41 +1218,38 @@ Last Update:
             coords = self.location_api.geocode(activity.location)
             activity.coordinates = {"lat": coords["lat"], "lng": coords["lng"]}
             
-            self.activities.append(activity)
+            self.activities.add(activity)
         
         self.save_activities()
         self.refresh_display()
     
+    @metrics.timed("export")
     def export_data(self):
         try:
             timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
             filename = f"ice_emergency_report_{timestamp}.json"
             
-            # Create comprehensive report
-            report_data = {
-                "report_generated": datetime.datetime.now().isoformat(),
-                "total_activities": len(self.activities),
-                "active_emergencies": len([a for a in self.activities if a.status == "Active"]),
-                "critical_emergencies": len([a for a in self.activities if a.priority == "Critical"]),
-                "summary": {
-                    "by_priority": {
-                        "Critical": len([a for a in self.activities if a.priority == "Critical"]),
-                        "High": len([a for a in self.activities if a.priority == "High"]),
-                        "Medium": len([a for a in self.activities if a.priority == "Medium"]),
-                        "Low": len([a for a in self.activities if a.priority == "Low"])
-                    },
-                    "by_status": {
-                        "Active": len([a for a in self.activities if a.status == "Active"]),
-                        "In Progress": len([a for a in self.activities if a.status == "In Progress"]),
-                        "Resolved": len([a for a in self.activities if a.status == "Resolved"]),
-                        "Closed": len([a for a in self.activities if a.status == "Closed"])
-                    }
-                },
-                "activities": [activity.to_dict() for activity in self.activities]
-            }
+            # Records come straight from SQL rows when the backend supports it; the
+            # time filter applies, and then the summary counts only what is exported
+            since = self.time_window_start()
+            if self.storage.supports_queries:
+                records = list(self.storage.iter_records(
+                    since=None if since is None else datetime.datetime.fromtimestamp(since)))
+                if self.writer.dirty:
+                    # Rows still queued in the writer: the loaded activities are current
+                    by_id = {record["id"]: record for record in records}
+                    by_id.update((i, self.activities.get(i).to_dict()) for i in self.time_index.range(since=since))
+                    records = list(by_id.values())
+            else:
+                records = [self.activities.get(i).to_dict() for i in self.time_index.range(since=since)]
+                records += [record for record in self.storage.cold_records()
+                            if since is None or
+                            datetime.datetime.fromisoformat(record["timestamp"]).timestamp() >= since]
             
-            with open(filename, "w") as f:
-                json.dump(report_data, f, indent=2)
+            report_data = write_report(filename, records,
+                                       self.count_activities if since is None else record_counter(records),
+                                       binary=os.environ.get("ICE_SNAPSHOT_FORMAT", "json") == "binary",
+                                       since=since)
             
             messagebox.showinfo("📊 Report Generated", 
                               f"Emergency report exported to {filename}\n\n"
@@ -1013,6 +1391,11 @@ class ActivityDialog:
         self.dialog.destroy()
 
 def main():
+    # python ICE.py --convert SRC DST converts a snapshot between JSON and .bin without the GUI
+    if len(sys.argv) == 4 and sys.argv[1] == "--convert":
+        convert_snapshot(sys.argv[2], sys.argv[3])
+        return
+    
     root = tk.Tk()
     
     # Set application icon and styling
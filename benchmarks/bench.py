@@ -0,0 +1,353 @@
+"""Time the tracker's hot paths on synthetic data: python benchmarks/bench.py [options]
+
+For each size N, N synthetic activities (see synthetic.py) are saved into a scratch
+directory. On a withdrawn Tk window the benchmark then times load_activities,
+refresh_display, update_stats, save_activities, export_data and
+MapGenerator.generate_map_html. Each step is timed best-of --repeat with
+tracemalloc off, then run once more under tracemalloc for its peak allocation.
+Without a display (no $DISPLAY; try xvfb-run) the GUI steps are replaced by their
+headless-core equivalents, and refresh_display is skipped.
+
+--json writes the results. --baseline compares with an earlier --json file and
+exits 1 when a step's time or peak memory grew by more than --tolerance.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import generate_records
+
+from ice_tracker.mapgen import MapGenerator
+from ice_tracker.storage import open_storage
+
+STEPS = ["load_activities", "refresh_display", "update_stats", "save_activities",
+         "export_data", "generate_map_html"]
+
+def measure(setup: Callable[[], Callable[[], object]], repeat: int) -> Dict:
+    """Best and median seconds of repeat runs, then the peak traced allocation of one more
+
+    setup() prepares a fresh state (untimed) and returns the callable to time.
+    """
+    times = []
+    for _ in range(repeat):
+        run = setup()
+        gc.collect()
+        started = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - started)
+    run = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"best": min(times), "median": statistics.median(times), "peak_bytes": peak}
+
+class _Messages:
+    """Stands in for tkinter.messagebox: info is dropped, errors fail the benchmark"""
+    
+    def showinfo(self, *args, **kwargs):
+        pass
+    
+    showwarning = showinfo
+    
+    def showerror(self, title, message, **kwargs):
+        raise RuntimeError(f"{title}: {message}")
+
+class GuiSuite:
+    """The real ICEActivityTracker methods, on Toplevels of one withdrawn Tk root"""
+    
+    mode = "gui"
+    
+    def __init__(self, root):
+        import ICE
+        
+        class Tracker(ICE.ICEActivityTracker):
+            defer_load = True  # the constructor's load is left to the benchmark
+            
+            def load_activities(self):
+                if not self.defer_load:
+                    super().load_activities()
+        
+        ICE.messagebox = _Messages()
+        self.tk = ICE.tk
+        self.tracker_class = Tracker
+        self.root = root
+        self.app = None
+    
+    def new_tracker(self):
+        self.close()
+        self.app = self.tracker_class(self.tk.Toplevel(self.root))
+        self.app.defer_load = False
+        return self.app
+    
+    def close(self):
+        if self.app is not None:
+            self.app.on_close()
+            self.app = None
+    
+    def loaded(self):
+        """The current tracker, loading a new one when a step runs before load_activities"""
+        if self.app is None:
+            self.new_tracker().load_activities()
+        return self.app
+    
+    def reset_list(self):
+        """Empty the Treeview so refresh_display renders every row again"""
+        app = self.loaded()
+        app.activity_tree.delete(*app.activity_tree.get_children())
+        app._rendered_versions.clear()
+        app._rendered_order = []
+        app._render_key = None
+    
+    def steps(self) -> Dict[str, Optional[Callable]]:
+        def load():
+            app = self.new_tracker()
+            return app.load_activities
+        
+        def refresh():
+            self.reset_list()
+            return self.app.refresh_display
+        
+        def save():
+            app = self.loaded()
+            
+            def run():
+                app.save_activities()
+                if not app.writer.flush(timeout=600):
+                    raise RuntimeError("save did not complete")
+            return run
+        
+        def generate_map():
+            generator = MapGenerator()  # fresh, so its page and feature caches start cold
+            app = self.loaded()
+            return lambda: generator.generate_map_html(app.activities, version=app.activities.version,
+                                                       aggregates=app.aggregates)
+        
+        return {
+            "load_activities": load,
+            "refresh_display": refresh,
+            "update_stats": lambda: self.loaded().update_stats,
+            "save_activities": save,
+            "export_data": lambda: self.loaded().export_data,
+            "generate_map_html": generate_map,
+        }
+
+class CoreSuite:
+    """Headless equivalents: the same storage, store, indexes, report and map code"""
+    
+    mode = "core"
+    
+    def __init__(self):
+        self.storage = None
+        self.store = None
+        self.aggregates = None
+    
+    def close(self):
+        if self.storage is not None:
+            self.storage.close()
+            self.storage = None
+            self.store = self.aggregates = None
+    
+    def load(self):
+        """What load_activities does minus the Treeview: load, then fill the indexed store"""
+        from ice_tracker.arrays import ActivityArrays, np
+        from ice_tracker.dedup import DuplicateDetector
+        from ice_tracker.geo import SpatialIndex
+        from ice_tracker.search import SearchIndex
+        from ice_tracker.store import ActivityAggregates, ActivityStore, TimeIndex
+        
+        self.close()
+        self.storage = open_storage(os.environ.get("ICE_STORAGE", "json"),
+                                    os.environ.get("ICE_SNAPSHOT_FORMAT", "json"))
+        self.store = ActivityStore()
+        self.aggregates = ActivityAggregates()
+        for index in (SpatialIndex(), self.aggregates, TimeIndex(), SearchIndex(), DuplicateDetector()) + \
+                ((ActivityArrays(),) if np is not None else ()):
+            self.store.add_listener(index.on_change)
+        for activity in self.storage.load():
+            self.store.add(activity)
+    
+    def loaded(self) -> "CoreSuite":
+        if self.store is None:
+            self.load()
+        return self
+    
+    def update_stats(self):
+        count = self.aggregates.count
+        return [count(), count(status="Active"), count(status="In Progress"), count(priority="Critical"),
+                count(priority="High"), count(status="Resolved")]
+    
+    def export(self):
+        from ice_tracker.report import write_report
+        
+        write_report("ice_emergency_report_bench.json", [activity.to_dict() for activity in self.store],
+                     self.aggregates.count, binary=os.environ.get("ICE_SNAPSHOT_FORMAT", "json") == "binary")
+    
+    def steps(self) -> Dict[str, Optional[Callable]]:
+        def generate_map():
+            generator = MapGenerator()
+            self.loaded()
+            return lambda: generator.generate_map_html(self.store, version=self.store.version,
+                                                       aggregates=self.aggregates)
+        
+        def save():
+            self.loaded()
+            return lambda: self.storage.compact([activity.to_dict() for activity in self.store],
+                                                background=False)
+        
+        return {
+            "load_activities": lambda: self.load,
+            "refresh_display": None,  # needs a display
+            "update_stats": lambda: self.loaded().update_stats,
+            "save_activities": save,
+            "export_data": lambda: self.loaded().export,
+            "generate_map_html": generate_map,
+        }
+
+def seed_storage(n: int, seed: int):
+    """Save n synthetic activities with the configured backend, in the current directory"""
+    storage = open_storage(os.environ.get("ICE_STORAGE", "json"), os.environ.get("ICE_SNAPSHOT_FORMAT", "json"))
+    try:
+        storage.compact(generate_records(n, seed), background=False)
+    finally:
+        storage.close()
+
+def run_size(suite, n: int, args) -> Dict[str, Dict]:
+    workdir = tempfile.mkdtemp(prefix=f"ice_bench_{n}_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        seed_storage(n, args.seed)
+        results = {}
+        for name, setup in suite.steps().items():
+            if args.steps and name not in args.steps:
+                continue
+            if setup is None:
+                results[name] = None
+                continue
+            results[name] = measure(setup, args.repeat)
+        return results
+    finally:
+        suite.close()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def print_results(n: int, mode: str, results: Dict[str, Dict], baseline: Dict = None,
+                  tolerance: float = 0.25) -> List[str]:
+    """Print one size's table; returns the regressions found against baseline"""
+    regressions = []
+    print(f"\nN={n:,} ({mode}, storage={os.environ.get('ICE_STORAGE', 'json')}, "
+          f"snapshot={os.environ.get('ICE_SNAPSHOT_FORMAT', 'json')})")
+    print(f"{'step':<20}{'best ms':>12}{'median ms':>12}{'peak MB':>10}")
+    for name, result in results.items():
+        if result is None:
+            print(f"{name:<20}{'skipped (no display)':>34}")
+            continue
+        line = (f"{name:<20}{result['best'] * 1000:>12.1f}{result['median'] * 1000:>12.1f}"
+                f"{result['peak_bytes'] / 2 ** 20:>10.1f}")
+        old = (baseline or {}).get(name)
+        if old:
+            notes = []
+            for key, label in (("best", "time"), ("peak_bytes", "memory")):
+                if old[key] > 0 and result[key] > old[key] * (1 + tolerance):
+                    notes.append(f"{label} +{(result[key] / old[key] - 1) * 100:.0f}%")
+            if notes:
+                line += "   REGRESSION: " + ", ".join(notes)
+                regressions.append(f"N={n} {name}: " + ", ".join(notes))
+        print(line)
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the ICE tracker on synthetic activities")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="activity counts to run (up to 1000000)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--steps", nargs="+", choices=STEPS, help="only these steps")
+    parser.add_argument("--storage", choices=["json", "sqlite"], default=os.environ.get("ICE_STORAGE", "json"))
+    parser.add_argument("--snapshot-format", choices=["json", "binary"],
+                        default=os.environ.get("ICE_SNAPSHOT_FORMAT", "json"))
+    parser.add_argument("--headless", action="store_true", help="time the core equivalents even with a display")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results file from an earlier --json run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed growth over the baseline before flagging (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    # The tracker reads its configuration from the environment
+    os.environ["ICE_STORAGE"] = args.storage
+    os.environ["ICE_SNAPSHOT_FORMAT"] = args.snapshot_format
+    os.environ["ICE_LAZY_LOAD"] = "0"
+    os.environ.pop("ICE_RETENTION_DAYS", None)
+
+    root = None
+    if not args.headless:
+        import tkinter as tk
+        try:
+            root = tk.Tk()
+            root.withdraw()
+        except tk.TclError as e:
+            print(f"No display ({e}); timing the headless core instead", file=sys.stderr)
+    suite = GuiSuite(root) if root is not None else CoreSuite()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        baseline = saved["results"]
+        for key, value in (("mode", suite.mode), ("storage", args.storage),
+                           ("snapshot_format", args.snapshot_format)):
+            if saved["meta"].get(key) != value:
+                print(f"Baseline {key} was {saved['meta'].get(key)}, this run uses {value}", file=sys.stderr)
+
+    results = {}
+    regressions = []
+    try:
+        for n in args.sizes:
+            results[str(n)] = run_size(suite, n, args)
+            regressions += print_results(n, suite.mode, results[str(n)],
+                                         (baseline or {}).get(str(n)), args.tolerance)
+    finally:
+        if root is not None:
+            root.destroy()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {
+                    "mode": suite.mode,
+                    "storage": args.storage,
+                    "snapshot_format": args.snapshot_format,
+                    "seed": args.seed,
+                    "repeat": args.repeat,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "created": time.strftime("%Y-%m-%dT%H:%M:%S")
+                },
+                "results": results
+            }, f, indent=2)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.tolerance:.0%}:", file=sys.stderr)
+        for regression in regressions:
+            print(f"  {regression}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
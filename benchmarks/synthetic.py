@@ -0,0 +1,116 @@
+"""Reproducible synthetic activities for benchmarks: python benchmarks/synthetic.py N [--output FILE]
+
+Reports cluster around a few hotspots (a Zipf-weighted handful carries most of
+the volume) with some uniform background noise, ages are skewed towards the
+last few days, status follows age (old reports are mostly Resolved/Closed) and
+priority follows the activity type. The same seed always gives the same data,
+ids included.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ice_tracker.models import PRIORITIES, STATUSES, ICEActivity
+
+CENTER = (33.8703, -117.9242)  # Fullerton, as in the sample data
+REGION_M = 40000  # hotspots and background noise stay within this distance of CENTER
+
+# type -> (weight, priority weights Low..Critical, personnel pool, resources pool)
+TYPES = {
+    "Traffic Accident": (30, (25, 45, 22, 8), ["Police Unit 12", "Police Unit 7", "Tow Service", "CHP"],
+                         ["Police Car", "Tow Truck", "Ambulance"]),
+    "Medical Emergency": (25, (10, 35, 35, 20), ["EMT Team A", "EMT Team B", "Paramedic 3"],
+                          ["Ambulance", "AED", "Helicopter"]),
+    "Fire Emergency": (12, (5, 20, 40, 35), ["Fire Station 1", "Fire Station 2", "Fire Station 6"],
+                       ["Fire Truck", "Ladder Truck", "Water Tanker"]),
+    "Checkpoint": (15, (20, 40, 30, 10), ["Legal Observer", "Rapid Response Team"],
+                   ["Phone Tree", "Legal Hotline"]),
+    "Power Outage": (8, (40, 40, 15, 5), ["Utility Crew"], ["Generator", "Utility Truck"]),
+    "Gas Leak": (5, (5, 25, 40, 30), ["Fire Station 1", "Gas Company"], ["Hazmat Unit", "Fire Truck"]),
+    "Flooding": (5, (30, 40, 20, 10), ["Public Works"], ["Pump Truck", "Sandbags"]),
+}
+STREETS = ["Harbor Blvd", "Chapman Ave", "Commonwealth Ave", "State College Blvd", "Euclid St",
+           "Orangethorpe Ave", "Malvern Ave", "Brea Blvd", "Bastanchury Rd", "Lemon St",
+           "Raymond Ave", "Placentia Ave", "Yorba Linda Blvd", "Imperial Hwy", "Magnolia Ave"]
+DETAILS = ["blocking two lanes", "crowd gathering", "units on scene", "caller reports injuries",
+           "smoke visible from the street", "vehicles stopped", "area being cleared",
+           "witnesses requesting help", "road closed", "awaiting responders"]
+# Status weights (Active, In Progress, Resolved, Closed) by report age
+STATUS_BY_AGE = [(1, (55, 35, 8, 2)), (7, (15, 25, 40, 20)), (None, (3, 5, 42, 50))]
+RADII = [500, 1000, 1500, 2000, 3000, 5000]
+
+def _offset(lat: float, lng: float, north_m: float, east_m: float):
+    return lat + north_m / 111320.0, lng + east_m / (111320.0 * math.cos(math.radians(lat)))
+
+def generate_activities(n: int, seed: int = 0, now: float = None) -> List[ICEActivity]:
+    """n synthetic activities; the same (n, seed, now) always gives the same list"""
+    rng = random.Random(seed)
+    now = time.time() if now is None else now
+    hotspots = []
+    for rank in range(max(5, int(n ** 0.4))):
+        distance, bearing = REGION_M * math.sqrt(rng.random()), rng.uniform(0, 2 * math.pi)
+        lat, lng = _offset(CENTER[0], CENTER[1], distance * math.cos(bearing), distance * math.sin(bearing))
+        hotspots.append((lat, lng, rng.uniform(150, 1500), 1 / (rank + 1) ** 1.1))
+    hotspot_weights = [h[3] for h in hotspots]
+    type_names = list(TYPES)
+    type_weights = [TYPES[t][0] for t in type_names]
+
+    activities = []
+    for _ in range(n):
+        activity = ICEActivity(str(uuid.UUID(int=rng.getrandbits(128), version=4)))
+        activity_type = rng.choices(type_names, type_weights)[0]
+        _, priority_weights, personnel, resources = TYPES[activity_type]
+        if rng.random() < 0.05:  # background noise anywhere in the region
+            distance, bearing = REGION_M * math.sqrt(rng.random()), rng.uniform(0, 2 * math.pi)
+            activity.lat, activity.lng = _offset(CENTER[0], CENTER[1], distance * math.cos(bearing),
+                                                 distance * math.sin(bearing))
+        else:
+            lat, lng, sigma, _ = rng.choices(hotspots, hotspot_weights)[0]
+            activity.lat, activity.lng = _offset(lat, lng, rng.gauss(0, sigma), rng.gauss(0, sigma))
+        age_days = min(rng.expovariate(1 / 10), 120)
+        activity.ts = now - age_days * 86400
+        for max_age, weights in STATUS_BY_AGE:
+            if max_age is None or age_days < max_age:
+                activity.status = rng.choices(STATUSES, weights)[0]
+                break
+        activity.priority = rng.choices(PRIORITIES, priority_weights)[0]
+        activity.activity_type = activity_type
+        activity.location = f"{rng.randint(100, 2999)} {rng.choice(STREETS)}"
+        activity.description = f"{activity_type} near {activity.location}, {rng.choice(DETAILS)}"
+        activity.assigned_personnel = rng.sample(personnel, rng.randint(1, len(personnel)))
+        activity.resources_needed = rng.sample(resources, rng.randint(0, len(resources)))
+        activity.alert_radius = rng.choice(RADII[3:] if activity.priority == "Critical" else RADII[:4])
+        activities.append(activity)
+    return activities
+
+def generate_records(n: int, seed: int = 0, now: float = None) -> List[Dict]:
+    """Same as generate_activities, as to_dict() records"""
+    return [activity.to_dict() for activity in generate_activities(n, seed, now)]
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Write N synthetic activities as JSON lines "
+                                                 "(the format `python -m ice_tracker import` reads)")
+    parser.add_argument("n", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="-", help="file, or - for stdout")
+    args = parser.parse_args(argv)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        for record in generate_records(args.n, args.seed):
+            out.write(json.dumps(record) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""Headless core of the ICE Activity Tracker
+
+Everything except the Tk GUI lives here and runs without a display. Submodules are
+imported on first use, so `from ice_tracker import ActivityStore` only loads the
+model and store modules, not SQLite, NumPy, the HTTP server or the map templates.
+"""
+
+import importlib
+
+# public name -> submodule that defines it
+_EXPORTS = {
+    "PRIORITIES": "models",
+    "STATUSES": "models",
+    "OPEN_STATUSES": "models",
+    "HISTORY_STATUSES": "models",
+    "ICEActivity": "models",
+    "ActivityStore": "store",
+    "ActivityAggregates": "store",
+    "TimeIndex": "store",
+    "EARTH_RADIUS_M": "geo",
+    "haversine_m": "geo",
+    "SpatialIndex": "geo",
+    "ActivityArrays": "arrays",
+    "encode_snapshot": "storage",
+    "decode_snapshot": "storage",
+    "convert_snapshot": "storage",
+    "ActivityJournal": "storage",
+    "PersistenceWorker": "storage",
+    "open_storage": "storage",
+    "write_archive": "storage",
+    "iter_archive": "storage",
+    "SQLiteActivityStorage": "sqlite_storage",
+    "WeatherAPI": "weather",
+    "WeatherService": "weather",
+    "LocationAPI": "geocoding",
+    "GeocodeCache": "geocoding",
+    "CachedLocationAPI": "geocoding",
+    "MapGenerator": "mapgen",
+    "ClusterIndex": "mapgen",
+    "MapServer": "server",
+    "write_report": "report",
+    "record_counter": "report",
+    "iter_rows": "ingest",
+    "validate_row": "ingest",
+    "import_reports": "ingest",
+    "geohash": "dedup",
+    "DuplicateDetector": "dedup",
+    "merge_into": "dedup",
+    "tokenize": "search",
+    "SearchIndex": "search",
+    "LatencyHistogram": "metrics",
+    "Metrics": "metrics",
+    "metrics": "metrics",
+    "SyncConflict": "sync",
+    "SyncStore": "sync",
+    "SyncServer": "sync",
+    "SyncClient": "sync",
+    "StationSync": "sync",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,7 @@
+"""python -m ice_tracker"""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
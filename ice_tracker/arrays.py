@@ -0,0 +1,137 @@
+"""NumPy column arrays for vectorized batch geo queries (numpy is optional)"""
+
+import math
+from typing import Dict, List
+
+try:
+    import numpy as np
+except ImportError:  # optional: batch geo queries fall back to SpatialIndex
+    np = None
+
+from .geo import EARTH_RADIUS_M
+from .models import OPEN_STATUSES, PRIORITIES, STATUSES, ICEActivity
+
+class ActivityArrays:
+    """Activity coordinates and alert radii held in contiguous NumPy arrays
+    
+    Rows are kept current through ActivityStore.add_listener (removals swap the
+    last row into the hole), so batch haversine queries from one or many points
+    run as single vectorized passes over every activity.
+    """
+    
+    def __init__(self, capacity: int = 1024):
+        if np is None:
+            raise ImportError("ActivityArrays requires numpy")
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._lat = np.empty(capacity)  # radians
+        self._lng = np.empty(capacity)  # radians
+        self._cos_lat = np.empty(capacity)
+        self._radius = np.empty(capacity)  # meters
+        self._priority = np.empty(capacity, dtype=np.int8)  # index into PRIORITIES
+        self._status = np.empty(capacity, dtype=np.int8)  # index into STATUSES
+    
+    def __len__(self):
+        return len(self._ids)
+    
+    @property
+    def ids(self) -> List[str]:
+        """Activity id of each row (the column order of every result array)"""
+        return self._ids
+    
+    def on_change(self, event: str, activity: ICEActivity):
+        """ActivityStore listener"""
+        if event == "remove":
+            self.remove(activity.id)
+        else:
+            self.put(activity)
+    
+    def _grow(self):
+        capacity = len(self._lat) * 2
+        for name in ("_lat", "_lng", "_cos_lat", "_radius", "_priority", "_status"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+    
+    def put(self, activity: ICEActivity):
+        row = self._rows.get(activity.id)
+        if row is None:
+            if len(self._ids) == len(self._lat):
+                self._grow()
+            row = len(self._ids)
+            self._rows[activity.id] = row
+            self._ids.append(activity.id)
+        lat = math.radians(activity.lat)
+        self._lat[row] = lat
+        self._lng[row] = math.radians(activity.lng)
+        self._cos_lat[row] = math.cos(lat)
+        self._radius[row] = activity.alert_radius
+        self._priority[row] = PRIORITIES.index(activity.priority) if activity.priority in PRIORITIES else -1
+        self._status[row] = STATUSES.index(activity.status) if activity.status in STATUSES else -1
+    
+    def remove(self, activity_id: str):
+        row = self._rows.pop(activity_id, None)
+        if row is None:
+            return
+        last = len(self._ids) - 1
+        if row != last:
+            moved_id = self._ids[last]
+            for array in (self._lat, self._lng, self._cos_lat, self._radius, self._priority, self._status):
+                array[row] = array[last]
+            self._ids[row] = moved_id
+            self._rows[moved_id] = row
+        self._ids.pop()
+    
+    def _haversine(self, lat, lng, rows=slice(None)):
+        """Distances (m) from points (radian arrays of shape (m, 1)) to the selected rows"""
+        dlat = self._lat[:len(self._ids)][rows] - lat
+        dlng = self._lng[:len(self._ids)][rows] - lng
+        a = (np.sin(dlat / 2) ** 2 +
+             np.cos(lat) * self._cos_lat[:len(self._ids)][rows] * np.sin(dlng / 2) ** 2)
+        return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    
+    def distances_from(self, lat: float, lng: float):
+        """Distance in meters from one point to every row, shape (n,)"""
+        point = np.radians([[lat, lng]])
+        return self._haversine(point[:, :1], point[:, 1:])[0]
+    
+    def distance_matrix(self, lats, lngs):
+        """Distances in meters from many points to every row, shape (len(lats), n)"""
+        lat = np.radians(np.asarray(lats, dtype=float))[:, None]
+        lng = np.radians(np.asarray(lngs, dtype=float))[:, None]
+        return self._haversine(lat, lng)
+    
+    def covering(self, lats, lngs, priorities=("High", "Critical"), statuses=OPEN_STATUSES,
+                 chunk_cells: int = 4_000_000) -> List[List[str]]:
+        """For each point, ids of matching activities whose alert circle contains it
+        
+        generate_map_html draws High/Critical circles for every status; the default
+        statuses narrow that to open activities, the ones still worth alerting on.
+        Points are processed in chunks so the intermediate distance matrix stays
+        under chunk_cells entries.
+        """
+        n = len(self._ids)
+        mask = np.ones(n, dtype=bool)
+        if priorities is not None:
+            mask &= np.isin(self._priority[:n], [PRIORITIES.index(p) for p in priorities])
+        if statuses is not None:
+            mask &= np.isin(self._status[:n], [STATUSES.index(s) for s in statuses])
+        rows = np.flatnonzero(mask)
+        
+        lats = np.radians(np.asarray(lats, dtype=float))
+        lngs = np.radians(np.asarray(lngs, dtype=float))
+        results: List[List[str]] = []
+        if len(rows) == 0:
+            return [[] for _ in range(len(lats))]
+        radius = self._radius[rows]
+        chunk = max(1, chunk_cells // len(rows))
+        for start in range(0, len(lats), chunk):
+            inside = self._haversine(lats[start:start + chunk, None], lngs[start:start + chunk, None], rows) <= radius
+            for point_rows in inside:
+                results.append([self._ids[rows[i]] for i in np.flatnonzero(point_rows)])
+        return results
+    
+    def points_in_alerts(self, lats, lngs, priorities=("High", "Critical"), statuses=OPEN_STATUSES):
+        """Boolean array: does each point fall inside at least one matching alert circle"""
+        return np.array([bool(ids) for ids in self.covering(lats, lngs, priorities, statuses)], dtype=bool)
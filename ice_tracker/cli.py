@@ -0,0 +1,276 @@
+"""Command-line interface: python -m ice_tracker {add,import,list,query,search,export,map,serve} ...
+
+Reads and writes the same files as the GUI in the current directory, honouring
+ICE_STORAGE, ICE_SNAPSHOT_FORMAT and ICE_RETENTION_DAYS. Core modules are imported per command, so
+`add` never loads the map templates and `list` never loads SQLite unless asked to.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+
+def _open_storage(args):
+    from .storage import open_storage
+    retention_days = os.environ.get("ICE_RETENTION_DAYS")
+    return open_storage(args.storage, args.snapshot_format,
+                        float(retention_days) if retention_days else None)
+
+def _since(args):
+    """Epoch start of the --hours window, or None"""
+    return time.time() - args.hours * 3600 if args.hours else None
+
+def _load(storage):
+    """All activities, or an empty list when nothing has been saved yet"""
+    try:
+        return storage.load()
+    except FileNotFoundError:
+        return []
+
+def _split(value: str):
+    return [item.strip() for item in value.split(",")] if value else []
+
+def _display_order(activities):
+    # Same order as the GUI list: (priority rank, time) descending, i.e. Low before Critical
+    # (unrecognized priorities first), newest first within each priority
+    priority_order = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
+    return sorted(activities, key=lambda x: (priority_order.get(x.priority, 4), x.ts), reverse=True)
+
+def _print_activities(activities, as_json: bool):
+    if as_json:
+        json.dump([activity.to_dict() for activity in activities], sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+    for activity in activities:
+        print(f"{activity.id[:8]}  {activity.priority:<8}  {activity.status:<11}  "
+              f"{activity.timestamp.strftime('%m/%d %H:%M')}  {activity.activity_type}  @ {activity.location}")
+
+def cmd_add(args) -> int:
+    from .geocoding import CachedLocationAPI, LocationAPI
+    from .models import ICEActivity
+
+    activity = ICEActivity()
+    activity.activity_type = args.type
+    activity.location = args.location
+    activity.description = args.description
+    activity.priority = args.priority
+    activity.status = args.status
+    activity.assigned_personnel = _split(args.personnel)
+    activity.resources_needed = _split(args.resources)
+    activity.alert_radius = args.radius
+    if args.lat is not None and args.lng is not None:
+        activity.coordinates = {"lat": args.lat, "lng": args.lng}
+    else:
+        location_api = CachedLocationAPI(LocationAPI())
+        coords = location_api.geocode(activity.location)
+        location_api.cache.close()
+        activity.coordinates = {"lat": coords["lat"], "lng": coords["lng"]}
+
+    # One journal line (or one upsert); nothing else is read
+    storage = _open_storage(args)
+    storage.append([activity.to_dict()])
+    storage.close()
+    print(activity.id)
+    return 0
+
+def cmd_import(args) -> int:
+    from .ingest import import_reports
+
+    activities, stats = import_reports(args.file, batch_size=args.batch_size, max_workers=args.workers)
+    storage = _open_storage(args)
+    storage.append([activity.to_dict() for activity in activities])  # one write / one transaction
+    storage.close()
+    for line_number, message in stats["errors"]:
+        print(f"{args.file}:{line_number}: {message}", file=sys.stderr)
+    print(f"Imported {stats['imported']} of {stats['rows']} rows in {stats['seconds']:.2f}s "
+          f"({stats['rows_per_sec']:.0f} rows/sec)")
+    return 1 if stats["errors"] else 0
+
+def cmd_list(args) -> int:
+    from .store import ActivityStore
+
+    storage = _open_storage(args)
+    store = ActivityStore(_load(storage))
+    storage.close()
+    since = _since(args)
+    activities = _display_order([activity for activity in store.filter(status=args.status, priority=args.priority)
+                                 if since is None or activity.ts >= since])
+    _print_activities(activities[:args.limit] if args.limit else activities, args.json)
+    return 0
+
+def cmd_query(args) -> int:
+    """Activities near a point (nearest first) or whose alert radius covers it"""
+    from .geo import SpatialIndex
+    from .models import OPEN_STATUSES
+    from .store import ActivityStore
+
+    storage = _open_storage(args)
+    store = ActivityStore(_load(storage))
+    storage.close()
+    index = SpatialIndex()
+    store.add_listener(index.on_change)
+
+    # Alert coverage defaults to open activities, as in the GUI
+    statuses = [args.status] if args.status else (OPEN_STATUSES if args.covering else None)
+    if args.covering:
+        hits = index.covering(args.lat, args.lng, statuses,
+                              [args.priority] if args.priority else None)
+    else:
+        hits = index.within(args.lat, args.lng, args.radius, statuses)
+    activities = [store.get(activity_id) for activity_id, _ in hits]
+    if args.priority and not args.covering:
+        activities = [a for a in activities if a.priority == args.priority]
+    _print_activities(activities[:args.limit] if args.limit else activities, args.json)
+    return 0
+
+def cmd_search(args) -> int:
+    """Activities matching every word of the text (prefixes count), best match first"""
+    from .search import SearchIndex
+    from .store import ActivityStore
+
+    storage = _open_storage(args)
+    store = ActivityStore(_load(storage))
+    storage.close()
+    index = SearchIndex()
+    store.add_listener(index.on_change)
+    activities = [activity for activity in map(store.get, index.search_ids(args.text))
+                  if (args.status is None or activity.status == args.status) and
+                  (args.priority is None or activity.priority == args.priority)]
+    _print_activities(activities[:args.limit] if args.limit else activities, args.json)
+    return 0
+
+def cmd_export(args) -> int:
+    from .report import record_counter, write_report
+
+    storage = _open_storage(args)
+    since = _since(args)
+    records = [activity.to_dict() for activity in _load(storage) if since is None or activity.ts >= since]
+    storage.close()
+    if args.include_archive:
+        from .storage import iter_archive
+
+        exported = {record["id"] for record in records}
+        base_path = storage.path if args.storage == "sqlite" else storage.snapshot_path
+        records += [record for record in iter_archive(base_path)
+                    if record["id"] not in exported and
+                    (since is None or datetime.datetime.fromisoformat(record["timestamp"]).timestamp() >= since)]
+    filename = args.output or f"ice_emergency_report_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    report = write_report(filename, records, record_counter(records),
+                          binary=args.snapshot_format == "binary", since=since)
+    print(f"{filename}: {report['total_activities']} activities, "
+          f"{report['active_emergencies']} active, {report['critical_emergencies']} critical")
+    return 0
+
+def cmd_map(args) -> int:
+    from .mapgen import MapGenerator
+
+    storage = _open_storage(args)
+    activities = _load(storage)
+    storage.close()
+    if not activities:
+        print("No activities to map", file=sys.stderr)
+        return 1
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write(MapGenerator().generate_map_html(activities))
+    print(args.output)
+    if args.open:
+        import webbrowser
+        webbrowser.open(f"file://{os.path.abspath(args.output)}")
+    return 0
+
+def cmd_serve(args) -> int:
+    from .storage import ActivityJournal
+    from .sync import SyncServer, SyncStore
+
+    store = SyncStore(ActivityJournal(args.data, snapshot_format=args.snapshot_format))
+    server = SyncServer(store, args.host, args.port)
+    print(f"Shared store: {len(store)} activities from {args.data}, serving on "
+          f"http://{args.host}:{args.port}/ (stations set ICE_SYNC_URL to this)")
+    try:
+        server.start(block=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+    return 0
+
+def build_parser() -> argparse.ArgumentParser:
+    from .models import PRIORITIES, STATUSES
+
+    parser = argparse.ArgumentParser(prog="ice_tracker", description="ICE Activity Tracker (headless)")
+    parser.add_argument("--storage", choices=["json", "sqlite"], default=os.environ.get("ICE_STORAGE", "json"))
+    parser.add_argument("--snapshot-format", choices=["json", "binary"],
+                        default=os.environ.get("ICE_SNAPSHOT_FORMAT", "json"))
+    parser.add_argument("--metrics", metavar="FILE", help="write timings and counters to this JSON file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="report a new activity")
+    add.add_argument("--type", required=True)
+    add.add_argument("--location", required=True)
+    add.add_argument("--description", default="")
+    add.add_argument("--priority", choices=PRIORITIES, default="Medium")
+    add.add_argument("--status", choices=STATUSES, default="Active")
+    add.add_argument("--personnel", default="", help="comma-separated")
+    add.add_argument("--resources", default="", help="comma-separated")
+    add.add_argument("--radius", type=int, default=1000, help="alert radius in meters")
+    add.add_argument("--lat", type=float, help="skip geocoding (with --lng)")
+    add.add_argument("--lng", type=float)
+    add.set_defaults(func=cmd_add)
+
+    bulk = commands.add_parser("import", help="bulk import reports from a .csv or .jsonl file")
+    bulk.add_argument("file")
+    bulk.add_argument("--batch-size", type=int, default=500)
+    bulk.add_argument("--workers", type=int, default=8, help="parallel geocoding threads")
+    bulk.set_defaults(func=cmd_import)
+
+    for name, func, help_text in (("list", cmd_list, "list activities in the same order as the GUI"),
+                                  ("query", cmd_query, "activities near a point"),
+                                  ("search", cmd_search, "full-text search over type, location, description, personnel and resources")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--status", choices=STATUSES)
+        command.add_argument("--priority", choices=PRIORITIES)
+        command.add_argument("--limit", type=int, default=0)
+        command.add_argument("--json", action="store_true", help="print to_dict() records")
+        command.set_defaults(func=func)
+        if name == "search":
+            command.add_argument("text")
+        if name == "list":
+            command.add_argument("--hours", type=float, help="only activities from the last N hours")
+        if name == "query":
+            command.add_argument("--lat", type=float, required=True)
+            command.add_argument("--lng", type=float, required=True)
+            command.add_argument("--radius", type=float, default=1000, help="meters")
+            command.add_argument("--covering", action="store_true",
+                                 help="activities whose own alert radius covers the point")
+
+    export = commands.add_parser("export", help="write the emergency report")
+    export.add_argument("--output")
+    export.add_argument("--hours", type=float, help="only activities from the last N hours")
+    export.add_argument("--include-archive", action="store_true",
+                        help="also export Resolved/Closed activities moved out by ICE_RETENTION_DAYS")
+    export.set_defaults(func=cmd_export)
+
+    map_command = commands.add_parser("map", help="render the static map page")
+    map_command.add_argument("--output", default="ice_map.html")
+    map_command.add_argument("--open", action="store_true", help="open it in the browser")
+    map_command.set_defaults(func=cmd_map)
+
+    serve = commands.add_parser("serve", help="run the shared store that several stations sync with")
+    serve.add_argument("--host", default="127.0.0.1", help="0.0.0.0 to accept other machines on the network")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--data", default="ice_sync_activities.json", help="the shared store's snapshot file")
+    serve.set_defaults(func=cmd_serve)
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if not args.metrics:
+        return args.func(args)
+    from .metrics import metrics
+    try:
+        with metrics.timer(f"cli.{args.command}"):
+            return args.func(args)
+    finally:
+        metrics.export(args.metrics)
@@ -0,0 +1,173 @@
+"""Spatio-temporal duplicate report detection and merging"""
+
+import difflib
+import re
+from typing import Dict, List, Optional, Tuple
+
+from .geo import haversine_m
+from .models import OPEN_STATUSES, PRIORITIES, ICEActivity
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash(lat: float, lng: float, precision: int = 6) -> str:
+    """Standard base32 geohash of a point"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # bits alternate lng, lat, lng, ...
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, lng) if even else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        if coordinate >= mid:
+            value = value * 2 + 1
+            interval[0] = mid
+        else:
+            value *= 2
+            interval[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_BASE32[value])
+            bits = value = 0
+    return "".join(chars)
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """(lat, lng) size in degrees of a geohash cell at this precision"""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+class DuplicateDetector:
+    """Finds earlier open reports of the same event, in O(1) buckets per insert
+
+    Open activities are hashed into (geohash cell, time window) buckets through
+    ActivityStore.add_listener. A new report is only compared with activities in
+    its own and the adjacent cells and windows; a candidate must be within
+    radius_m and window seconds, and is then scored on a fuzzy activity_type and
+    description match plus proximity. Defaults (precision 6, 500 m) keep the
+    search circle inside the 3x3 cell neighbourhood up to about 60° latitude.
+    """
+
+    def __init__(self, precision: int = 6, window: float = 1800, radius_m: float = 500,
+                 threshold: float = 0.6):
+        self.precision = precision
+        self.window = window
+        self.radius_m = radius_m
+        self.threshold = threshold
+        self._cell_lat, self._cell_lng = geohash_cell_size(precision)
+        self._buckets: Dict[tuple, set] = {}
+        # id -> (bucket, lat, lng, ts, lowercased type, description words)
+        self._entries: Dict[str, tuple] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _words(text: str) -> frozenset:
+        return frozenset(re.findall(r"\w+", text.lower()))
+
+    def _bucket(self, lat: float, lng: float, ts: float) -> tuple:
+        return geohash(lat, lng, self.precision), int(ts // self.window)
+
+    def on_change(self, event: str, activity: ICEActivity):
+        """ActivityStore listener; only open activities are merge targets"""
+        if event == "remove" or activity.status not in OPEN_STATUSES:
+            self.remove(activity.id)
+        else:
+            self.put(activity)
+
+    def put(self, activity: ICEActivity):
+        bucket = self._bucket(activity.lat, activity.lng, activity.ts)
+        old = self._entries.get(activity.id)
+        if old is not None and old[0] != bucket:
+            self._discard(old[0], activity.id)
+        self._buckets.setdefault(bucket, set()).add(activity.id)
+        self._entries[activity.id] = (bucket, activity.lat, activity.lng, activity.ts,
+                                      activity.activity_type.strip().lower(), self._words(activity.description))
+
+    def remove(self, activity_id: str):
+        old = self._entries.pop(activity_id, None)
+        if old is not None:
+            self._discard(old[0], activity_id)
+
+    def _discard(self, bucket: tuple, activity_id: str):
+        ids = self._buckets.get(bucket)
+        if ids is not None:
+            ids.discard(activity_id)
+            if not ids:
+                del self._buckets[bucket]
+
+    def _candidates(self, lat: float, lng: float, ts: float):
+        cells = {geohash(lat + dlat * self._cell_lat, lng + dlng * self._cell_lng, self.precision)
+                 for dlat in (-1, 0, 1) for dlng in (-1, 0, 1)}
+        window = int(ts // self.window)
+        for cell in cells:
+            for w in (window - 1, window, window + 1):
+                yield from self._buckets.get((cell, w), ())
+
+    def score(self, activity: ICEActivity, entry: tuple, distance_m: float) -> float:
+        """0..1 likelihood that activity reports the same event as an indexed entry"""
+        _, _, _, _, activity_type, words = entry
+        own_type = activity.activity_type.strip().lower()
+        if own_type == activity_type:
+            type_score = 1.0
+        else:
+            type_score = difflib.SequenceMatcher(None, own_type, activity_type).ratio()
+        own_words = self._words(activity.description)
+        if own_words or words:
+            text_score = len(own_words & words) / len(own_words | words)
+        else:
+            text_score = 1.0  # neither report has a description
+        return 0.5 * type_score + 0.3 * text_score + 0.2 * (1 - distance_m / self.radius_m)
+
+    def find_duplicates(self, activity: ICEActivity) -> List[Tuple[str, float]]:
+        """(id, score) of open activities this report likely duplicates, best first"""
+        matches = []
+        for activity_id in self._candidates(activity.lat, activity.lng, activity.ts):
+            if activity_id == activity.id:
+                continue
+            entry = self._entries[activity_id]
+            if abs(entry[3] - activity.ts) > self.window:
+                continue
+            distance = haversine_m(activity.lat, activity.lng, entry[1], entry[2])
+            if distance > self.radius_m:
+                continue
+            score = self.score(activity, entry, distance)
+            if score >= self.threshold:
+                matches.append((activity_id, score))
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+    def best_match(self, activity: ICEActivity) -> Optional[str]:
+        matches = self.find_duplicates(activity)
+        return matches[0][0] if matches else None
+
+def merge_into(store, target_id: str, report: ICEActivity) -> Optional[ICEActivity]:
+    """Fold a duplicate report into an existing activity in the store
+
+    Keeps the earliest time, the higher priority and the larger alert radius, unions
+    personnel and resources, and appends a description that adds anything new. The
+    report itself is removed from the store if it had already been added.
+    """
+    target = store.get(target_id)
+    if target is None:
+        return None
+    changes = {
+        "assigned_personnel": target.assigned_personnel +
+                              [p for p in report.assigned_personnel if p not in target.assigned_personnel],
+        "resources_needed": target.resources_needed +
+                            [r for r in report.resources_needed if r not in target.resources_needed],
+        "alert_radius": max(target.alert_radius, report.alert_radius),
+    }
+    if report.ts < target.ts:
+        changes["timestamp"] = report.timestamp
+    if (report.priority in PRIORITIES and target.priority in PRIORITIES and
+            PRIORITIES.index(report.priority) > PRIORITIES.index(target.priority)):
+        changes["priority"] = report.priority
+    description = report.description.strip()
+    if description and description not in target.description:
+        changes["description"] = f"{target.description}\n[+] {description}".strip()
+    if report.id in store:
+        store.remove(report.id)
+    return store.update(target_id, **changes)
@@ -0,0 +1,115 @@
+"""Great-circle distance and the grid spatial index"""
+
+import math
+from typing import Dict, List
+
+from .models import ICEActivity
+
+EARTH_RADIUS_M = 6371000.0
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in meters"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(min(1.0, a)))
+
+class SpatialIndex:
+    """Uniform lat/lng grid over activity coordinates and alert radii
+    
+    Kept current through ActivityStore.add_listener; a query only visits the
+    grid cells overlapping its search circle.
+    """
+    
+    METERS_PER_DEGREE = 111320.0
+    
+    def __init__(self, cell_degrees: float = 0.01):
+        self.cell_degrees = cell_degrees  # ~1.1 km of latitude
+        self._cells: Dict[tuple, set] = {}
+        # id -> (cell, lat, lng, alert_radius, status, priority)
+        self._entries: Dict[str, tuple] = {}
+        self._max_radius = 0
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def _cell(self, lat: float, lng: float) -> tuple:
+        return (math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees))
+    
+    def on_change(self, event: str, activity: ICEActivity):
+        """ActivityStore listener"""
+        if event == "remove":
+            self.remove(activity.id)
+        else:
+            self.put(activity)
+    
+    def put(self, activity: ICEActivity):
+        """Insert or move an activity"""
+        lat, lng = activity.lat, activity.lng
+        cell = self._cell(lat, lng)
+        old = self._entries.get(activity.id)
+        if old is not None and old[0] != cell:
+            self._discard(old[0], activity.id)
+        self._cells.setdefault(cell, set()).add(activity.id)
+        self._entries[activity.id] = (cell, lat, lng, activity.alert_radius,
+                                      activity.status, activity.priority)
+        # Only grows; an overestimate just widens covering() scans slightly
+        self._max_radius = max(self._max_radius, activity.alert_radius)
+    
+    def remove(self, activity_id: str):
+        old = self._entries.pop(activity_id, None)
+        if old is not None:
+            self._discard(old[0], activity_id)
+    
+    def _discard(self, cell: tuple, activity_id: str):
+        ids = self._cells.get(cell)
+        if ids is not None:
+            ids.discard(activity_id)
+            if not ids:
+                del self._cells[cell]
+    
+    def _candidates(self, lat: float, lng: float, radius_m: float):
+        """Ids in every cell that intersects the circle's bounding box"""
+        dlat = radius_m / self.METERS_PER_DEGREE
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        dlng = radius_m / (self.METERS_PER_DEGREE * cos_lat)
+        min_row, min_col = self._cell(lat - dlat, lng - dlng)
+        max_row, max_col = self._cell(lat + dlat, lng + dlng)
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self._cells):
+            # Huge radius: walking the occupied cells is cheaper than the box
+            for (row, col), ids in self._cells.items():
+                if min_row <= row <= max_row and min_col <= col <= max_col:
+                    yield from ids
+            return
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                yield from self._cells.get((row, col), ())
+    
+    def within(self, lat: float, lng: float, radius_m: float, statuses=None) -> List[tuple]:
+        """(id, distance_m) of activities within radius_m of the point, nearest first"""
+        results = []
+        for activity_id in self._candidates(lat, lng, radius_m):
+            _, a_lat, a_lng, _, status, _ = self._entries[activity_id]
+            if statuses is not None and status not in statuses:
+                continue
+            distance = haversine_m(lat, lng, a_lat, a_lng)
+            if distance <= radius_m:
+                results.append((activity_id, distance))
+        results.sort(key=lambda item: item[1])
+        return results
+    
+    def covering(self, lat: float, lng: float, statuses=None, priorities=None) -> List[tuple]:
+        """(id, distance_m) of activities whose alert radius covers the point, nearest first"""
+        results = []
+        for activity_id in self._candidates(lat, lng, self._max_radius):
+            _, a_lat, a_lng, radius, status, priority = self._entries[activity_id]
+            if statuses is not None and status not in statuses:
+                continue
+            if priorities is not None and priority not in priorities:
+                continue
+            distance = haversine_m(lat, lng, a_lat, a_lng)
+            if distance <= radius:
+                results.append((activity_id, distance))
+        results.sort(key=lambda item: item[1])
+        return results
@@ -0,0 +1,126 @@
+"""Geocoding with an in-memory and on-disk cache"""
+
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .metrics import metrics
+
+class LocationAPI:
+    """Mock location API - replace with actual geocoding service"""
+    
+    @staticmethod
+    def geocode(address: str) -> Dict:
+        # Simulated geocoding - replace with actual API calls
+        import random
+        return {
+            "lat": round(random.uniform(33.8, 34.2), 6),  # Fullerton, CA area
+            "lng": round(random.uniform(-118.0, -117.5), 6),
+            "formatted_address": address
+        }
+
+class GeocodeCache:
+    """Two-level geocode cache: a bounded in-memory LRU in front of a SQLite file
+    
+    Keys are normalized addresses; entries older than ttl seconds are treated as
+    misses. Safe to use from several threads.
+    """
+    
+    ABBREVIATIONS = {
+        "street": "st", "avenue": "ave", "boulevard": "blvd", "road": "rd",
+        "drive": "dr", "lane": "ln", "place": "pl", "court": "ct", "highway": "hwy",
+        "north": "n", "south": "s", "east": "e", "west": "w"
+    }
+    
+    def __init__(self, path: str = "ice_geocode_cache.db", max_entries: int = 10000,
+                 ttl: float = 30 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0  # served from memory
+        self.disk_hits = 0  # served from the SQLite store
+        self.misses = 0  # had to call the geocoder backend
+        self._lru: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (stored_at, result)
+        self._lock = threading.Lock()
+        import sqlite3  # only when a disk cache is opened, so `add --lat/--lng` never loads it
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            "key TEXT PRIMARY KEY, stored_at REAL NOT NULL, result TEXT NOT NULL)")
+        self._conn.commit()
+    
+    @classmethod
+    def normalize(cls, address: str) -> str:
+        """Case-, punctuation- and abbreviation-insensitive cache key"""
+        text = address.lower().replace("&", " and ")
+        words = re.sub(r"[^\w\s]", " ", text).split()
+        return " ".join(cls.ABBREVIATIONS.get(word, word) for word in words)
+    
+    def get(self, address: str) -> Optional[Dict]:
+        key = self.normalize(address)
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return dict(entry[1])
+            row = self._conn.execute("SELECT stored_at, result FROM geocode WHERE key = ?",
+                                     (key,)).fetchone()
+            if row is not None and now - row[0] < self.ttl:
+                result = json.loads(row[1])
+                self._remember(key, row[0], result)
+                self.disk_hits += 1
+                return dict(result)
+            self.misses += 1
+            return None
+    
+    def put(self, address: str, result: Dict):
+        key = self.normalize(address)
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, result)
+            with self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO geocode (key, stored_at, result) VALUES (?, ?, ?)",
+                                   (key, now, json.dumps(result)))
+    
+    def _remember(self, key: str, stored_at: float, result: Dict):
+        self._lru[key] = (stored_at, result)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+    
+    def stats(self) -> Dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._lru)
+        }
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class CachedLocationAPI:
+    """LocationAPI wrapper that only calls the real geocoder on cache misses"""
+    
+    def __init__(self, backend=None, cache: GeocodeCache = None):
+        self.backend = backend or LocationAPI()
+        self.cache = cache or GeocodeCache()
+    
+    def geocode(self, address: str) -> Dict:
+        result = self.cache.get(address)
+        if result is None:
+            metrics.incr("geocode.cache_misses")
+            with metrics.timer("geocode"):
+                result = self.backend.geocode(address)
+            self.cache.put(address, result)
+        else:
+            metrics.incr("geocode.cache_hits")
+        return result
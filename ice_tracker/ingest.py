@@ -0,0 +1,155 @@
+"""Streaming bulk import of reports from CSV or JSONL files"""
+
+import csv
+import datetime
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Tuple
+
+from .geocoding import CachedLocationAPI, GeocodeCache
+from .models import PRIORITIES, STATUSES, ICEActivity
+
+# Accepted column names -> ICEActivity field; to_dict() names work as well as the dialog's
+COLUMN_ALIASES = {
+    "type": "activity_type",
+    "personnel": "assigned_personnel",
+    "resources": "resources_needed",
+    "radius": "alert_radius",
+    "latitude": "lat",
+    "longitude": "lng",
+    "lon": "lng",
+}
+
+def iter_rows(path: str) -> Iterator[Tuple[int, object]]:
+    """(line number, raw row) pairs from a .csv file or a JSON-lines file, read lazily
+    
+    A JSONL line that does not parse is passed through as its text, for validate_row to reject.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except ValueError:
+                        yield line_number, line
+
+def _list(value) -> List[str]:
+    if isinstance(value, list):
+        return [str(item).strip() for item in value]
+    return [item.strip() for item in str(value).split(",")] if value else []
+
+def validate_row(row: dict) -> ICEActivity:
+    """Build an activity from a raw row; raises ValueError naming the bad field"""
+    if not isinstance(row, dict):
+        raise ValueError("not a JSON object")
+    fields = {COLUMN_ALIASES.get(key.strip().lower(), key.strip().lower()): value
+              for key, value in row.items() if key is not None and value not in (None, "")}
+    if isinstance(fields.get("coordinates"), dict):
+        fields.setdefault("lat", fields["coordinates"].get("lat"))
+        fields.setdefault("lng", fields["coordinates"].get("lng"))
+
+    # Same rules as ActivityDialog.save
+    if not fields.get("activity_type") or not fields.get("location"):
+        raise ValueError("type and location are required")
+    activity = ICEActivity(str(fields["id"]) if "id" in fields else None)
+    activity.activity_type = str(fields["activity_type"])
+    activity.location = str(fields["location"])
+    activity.description = str(fields.get("description", ""))
+    activity.priority = str(fields.get("priority", "Medium")).strip().title()
+    if activity.priority not in PRIORITIES:
+        raise ValueError(f"unknown priority {fields['priority']!r}")
+    activity.status = str(fields.get("status", "Active")).strip().title()
+    if activity.status not in STATUSES:
+        raise ValueError(f"unknown status {fields['status']!r}")
+    activity.assigned_personnel = _list(fields.get("assigned_personnel"))
+    activity.resources_needed = _list(fields.get("resources_needed"))
+    try:
+        activity.alert_radius = int(fields.get("alert_radius", 1000))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid alert radius {fields['alert_radius']!r}")
+    if activity.alert_radius < 100 or activity.alert_radius > 10000:
+        raise ValueError("alert radius must be between 100 and 10000 meters")
+    if "timestamp" in fields:
+        try:
+            activity.timestamp = datetime.datetime.fromisoformat(str(fields["timestamp"]))
+        except ValueError:
+            raise ValueError(f"invalid timestamp {fields['timestamp']!r}")
+
+    # Rows without both coordinates are geocoded later (lat/lng stay NaN until then)
+    try:
+        activity.lat = float(fields["lat"]) if "lat" in fields else math.nan
+        activity.lng = float(fields["lng"]) if "lng" in fields else math.nan
+    except (TypeError, ValueError):
+        raise ValueError("lat/lng must be numbers")
+    return activity
+
+def _needs_geocode(activity: ICEActivity) -> bool:
+    return math.isnan(activity.lat) or math.isnan(activity.lng)
+
+def import_reports(path: str, location_api: CachedLocationAPI = None, batch_size: int = 500,
+                   max_workers: int = 8, progress=None) -> Tuple[List[ICEActivity], Dict]:
+    """Validate and geocode every row of a CSV/JSONL file
+
+    Rows are read and processed batch_size at a time. Within a batch each distinct
+    address (after GeocodeCache normalization) is geocoded once, on max_workers
+    threads, through the cache. Nothing is stored: the caller adds the returned
+    activities and persists them in one write. progress(rows_done), if given, is
+    called after every batch from the calling thread.
+
+    Returns (activities, stats) where stats has rows, imported, errors
+    [(line, message)], seconds and rows_per_sec.
+    """
+    own_api = location_api is None
+    if own_api:
+        location_api = CachedLocationAPI()
+    started = time.perf_counter()
+    activities: List[ICEActivity] = []
+    errors: List[Tuple[int, str]] = []
+    rows = 0
+
+    def flush(batch: List[ICEActivity]):
+        pending: Dict[str, List[ICEActivity]] = {}
+        for activity in batch:
+            if _needs_geocode(activity):
+                pending.setdefault(GeocodeCache.normalize(activity.location), []).append(activity)
+        if pending:
+            addresses = [group[0].location for group in pending.values()]
+            for group, coords in zip(pending.values(), executor.map(location_api.geocode, addresses)):
+                for activity in group:
+                    activity.lat, activity.lng = float(coords["lat"]), float(coords["lng"])
+        activities.extend(batch)
+        if progress is not None:
+            progress(rows)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ice-import") as executor:
+            batch: List[ICEActivity] = []
+            for line_number, row in iter_rows(path):
+                rows += 1
+                try:
+                    batch.append(validate_row(row))
+                except ValueError as e:
+                    errors.append((line_number, str(e)))
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+            flush(batch)
+    finally:
+        if own_api:
+            location_api.cache.close()
+
+    seconds = time.perf_counter() - started
+    return activities, {
+        "rows": rows,
+        "imported": len(activities),
+        "errors": errors,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds > 0 else 0.0,
+    }
@@ -0,0 +1,636 @@
+"""Static and live Leaflet map pages, and the marker cluster index"""
+
+import datetime
+import json
+import math
+from typing import Dict, List, Optional
+
+from .metrics import metrics
+from .models import OPEN_STATUSES, PRIORITIES, ICEActivity
+from .store import ActivityAggregates
+
+class MapGenerator:
+    """Generates HTML maps with Google Maps integration"""
+    
+    # Above this many activities the live map switches from markers to server-side clusters
+    CLUSTER_THRESHOLD = 1000
+    
+    PRIORITY_COLORS = {
+        "Low": "#4CAF50",      # Green
+        "Medium": "#FF9800",   # Orange
+        "High": "#F44336",     # Red
+        "Critical": "#9C27B0"  # Purple
+    }
+    
+    PAGE_STYLE = """    <style>
+        body { 
+            margin: 0; 
+            padding: 0; 
+            font-family: Arial, sans-serif; 
+        }
+        #map { 
+            height: 100vh; 
+            width: 100%; 
+        }
+        .info-panel {
+            position: absolute;
+            top: 10px;
+            left: 10px;
+            background: white;
+            padding: 15px;
+            border-radius: 8px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.3);
+            z-index: 1000;
+            max-width: 300px;
+        }
+        .legend {
+            margin-top: 10px;
+        }
+        .legend-item {
+            display: flex;
+            align-items: center;
+            margin: 5px 0;
+        }
+        .legend-color {
+            width: 20px;
+            height: 20px;
+            border-radius: 50%;
+            margin-right: 10px;
+            border: 2px solid white;
+            box-shadow: 0 1px 3px rgba(0,0,0,0.3);
+        }
+        .alert-banner {
+            position: absolute;
+            top: 0;
+            left: 0;
+            right: 0;
+            background: #f44336;
+            color: white;
+            text-align: center;
+            padding: 10px;
+            font-weight: bold;
+            z-index: 1001;
+            animation: blink 1s infinite;
+        }
+        @keyframes blink {
+            0%, 50% { opacity: 1; }
+            51%, 100% { opacity: 0.7; }
+        }
+        .stats {
+            display: grid;
+            grid-template-columns: 1fr 1fr;
+            gap: 10px;
+            margin-top: 10px;
+        }
+        .stat-item {
+            text-align: center;
+            padding: 5px;
+            background: #f5f5f5;
+            border-radius: 4px;
+        }
+    </style>"""
+    
+    @staticmethod
+    def legend_html(priority_colors: Dict[str, str]) -> str:
+        return f"""        <div class="legend">
+            <h4>Priority Levels:</h4>
+            <div class="legend-item">
+                <div class="legend-color" style="background-color: {priority_colors['Critical']};"></div>
+                <span>Critical - Immediate Response</span>
+            </div>
+            <div class="legend-item">
+                <div class="legend-color" style="background-color: {priority_colors['High']};"></div>
+                <span>High - Urgent</span>
+            </div>
+            <div class="legend-item">
+                <div class="legend-color" style="background-color: {priority_colors['Medium']};"></div>
+                <span>Medium - Monitor</span>
+            </div>
+            <div class="legend-item">
+                <div class="legend-color" style="background-color: {priority_colors['Low']};"></div>
+                <span>Low - Routine</span>
+            </div>
+        </div>"""
+    
+    def __init__(self):
+        # id -> (activity version, serialized GeoJSON feature)
+        self._feature_cache: Dict[str, tuple] = {}
+        self._geojson_cache: Optional[tuple] = None  # (key, payload)
+        self._html_cache: Optional[tuple] = None  # (key, html)
+    
+    @staticmethod
+    def cache_key(activities, version=None):
+        """Store version when the caller has one, else a hash of (id, version) pairs"""
+        if version is not None:
+            return ("version", version, len(activities))
+        return ("hash", hash(tuple((a.id, a.version) for a in activities)))
+    
+    def feature_json(self, activity: ICEActivity) -> str:
+        """GeoJSON Feature for one activity, re-serialized only when its version changes"""
+        cached = self._feature_cache.get(activity.id)
+        if cached is not None and cached[0] == activity.version:
+            return cached[1]
+        record = activity.to_dict()
+        feature = json.dumps({
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [record["coordinates"]["lng"], record["coordinates"]["lat"]]},
+            "properties": record
+        })
+        self._feature_cache[activity.id] = (activity.version, feature)
+        return feature
+    
+    def geojson(self, activities, version=None) -> str:
+        """FeatureCollection payload for activities, cached by store version or content hash"""
+        key = self.cache_key(activities, version)
+        if self._geojson_cache is not None and self._geojson_cache[0] == key:
+            return self._geojson_cache[1]
+        features = [self.feature_json(a) for a in activities]
+        # Drop cached features for activities that are gone
+        if len(self._feature_cache) > len(features):
+            live = {a.id for a in activities}
+            self._feature_cache = {i: f for i, f in self._feature_cache.items() if i in live}
+        payload = '{"type": "FeatureCollection", "features": [' + ", ".join(features) + "]}"
+        self._geojson_cache = (key, payload)
+        return payload
+    
+    def generate_map_html(self, activities, version=None, aggregates: "ActivityAggregates" = None) -> str:
+        """Static map page; returned from cache when the data has not changed"""
+        key = self.cache_key(activities, version)
+        if self._html_cache is not None and self._html_cache[0] == key:
+            metrics.incr("map.cache_hits")
+            return self._html_cache[1]
+        with metrics.timer("map"):
+            if aggregates is None:
+                aggregates = ActivityAggregates.from_activities(activities)
+            html_content = self.render_map_html(activities, self.geojson(activities, version), aggregates)
+        self._html_cache = (key, html_content)
+        return html_content
+    
+    @staticmethod
+    def render_map_html(activities, geojson: str, aggregates: "ActivityAggregates") -> str:
+        # Get center point (average of all coordinates)
+        if activities:
+            center_lat = sum(a.lat for a in activities) / len(activities)
+            center_lng = sum(a.lng for a in activities) / len(activities)
+        else:
+            center_lat, center_lng = 33.8703, -117.9242  # Fullerton, CA default
+        
+        # Priority color mapping
+        priority_colors = MapGenerator.PRIORITY_COLORS
+        
+        # Status icons
+        status_icons = {
+            "Active": "⚠️",
+            "In Progress": "🚨",
+            "Resolved": "✅",  
+            "Closed": "⭕"
+        }
+        
+        # Generate map without Google Maps API (using OpenStreetMap instead)
+        html_content = f"""
+<!DOCTYPE html>
+<html>
+<head>
+    <title>ICE Activity Map</title>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <link rel="stylesheet" href="https://unpkg.com/leaflet@1.7.1/dist/leaflet.css" />
+{MapGenerator.PAGE_STYLE}
+</head>
+<body>
+    <!-- Alert Banner for Critical Activities -->
+    {"<div class='alert-banner'>🚨 CRITICAL ICE ACTIVITIES DETECTED 🚨</div>" if aggregates.critical_open else ""}
+    
+    <div class="info-panel">
+        <h3>🚨 ICE Activity Monitor</h3>
+        <div class="stats">
+            <div class="stat-item">
+                <strong>{aggregates.count(status="Active")}</strong><br>
+                <small>Active</small>
+            </div>
+            <div class="stat-item">
+                <strong>{aggregates.count(priority="Critical")}</strong><br>
+                <small>Critical</small>
+            </div>
+            <div class="stat-item">
+                <strong>{aggregates.count(status="In Progress")}</strong><br>
+                <small>In Progress</small>
+            </div>
+            <div class="stat-item">
+                <strong>{aggregates.total}</strong><br>
+                <small>Total</small>
+            </div>
+        </div>
+        
+{MapGenerator.legend_html(priority_colors)}
+        
+        <div style="margin-top: 10px; font-size: 12px; color: #666;">
+            Last Updated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+        </div>
+    </div>
+
+    <div id="map"></div>
+    
+    <script src="https://unpkg.com/leaflet@1.7.1/dist/leaflet.js"></script>
+    <script>
+        // Initialize map with OpenStreetMap
+        const map = L.map('map').setView([{center_lat}, {center_lng}], 12);
+        
+        L.tileLayer('https://{{s}}.tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png', {{
+            attribution: '© OpenStreetMap contributors'
+        }}).addTo(map);
+        
+        // Activity data
+        const activities = {geojson}.features.map(feature => feature.properties);
+        const priorityColors = {json.dumps(priority_colors)};
+        
+        activities.forEach(activity => {{
+            const lat = activity.coordinates.lat;
+            const lng = activity.coordinates.lng;
+            const color = priorityColors[activity.priority];
+            
+            // Create custom icon
+            const customIcon = L.divIcon({{
+                html: `<div style="background-color: ${{color}}; width: 20px; height: 20px; border-radius: 50%; border: 3px solid white; box-shadow: 0 2px 4px rgba(0,0,0,0.3);"></div>`,
+                iconSize: [20, 20],
+                className: 'custom-marker'
+            }});
+            
+            // Create marker
+            const marker = L.marker([lat, lng], {{icon: customIcon}}).addTo(map);
+            
+            // Popup content
+            const popupContent = `
+                <div style="max-width: 250px;">
+                    <h3>${{activity.activity_type}}</h3>
+                    <p><strong>Location:</strong> ${{activity.location}}</p>
+                    <p><strong>Priority:</strong> <span style="color: ${{color}}; font-weight: bold;">${{activity.priority}}</span></p>
+                    <p><strong>Status:</strong> ${{activity.status}}</p>
+                    <p><strong>Time:</strong> ${{new Date(activity.timestamp).toLocaleString()}}</p>
+                    <p><strong>Description:</strong> ${{activity.description}}</p>
+                    ${{activity.assigned_personnel.length > 0 ? 
+                      `<p><strong>Personnel:</strong> ${{activity.assigned_personnel.join(', ')}}</p>` : ''}}
+                    ${{activity.resources_needed.length > 0 ? 
+                      `<p><strong>Resources:</strong> ${{activity.resources_needed.join(', ')}}</p>` : ''}}
+                </div>
+            `;
+            
+            marker.bindPopup(popupContent);
+            
+            // Alert radius circle for critical activities
+            if (activity.priority === 'Critical' || activity.priority === 'High') {{
+                L.circle([lat, lng], {{
+                    color: color,
+                    fillColor: color,
+                    fillOpacity: 0.1,
+                    radius: activity.alert_radius
+                }}).addTo(map);
+            }}
+        }});
+        
+        // Auto-refresh every 30 seconds
+        setTimeout(() => {{
+            window.location.reload();
+        }}, 30000);
+    </script>
+</body>
+</html>
+        """
+        
+        return html_content
+
+    @staticmethod
+    def generate_live_map_html(center_lat: float = 33.8703, center_lng: float = -117.9242) -> str:
+        """Map page for MapServer: loads /activities once, then applies /events deltas in place"""
+        priority_colors = MapGenerator.PRIORITY_COLORS
+        return f"""
+<!DOCTYPE html>
+<html>
+<head>
+    <title>ICE Activity Map (Live)</title>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <link rel="stylesheet" href="https://unpkg.com/leaflet@1.7.1/dist/leaflet.css" />
+{MapGenerator.PAGE_STYLE}
+</head>
+<body>
+    <!-- Alert Banner for Critical Activities -->
+    <div id="alert-banner" class="alert-banner" style="display: none;">🚨 CRITICAL ICE ACTIVITIES DETECTED 🚨</div>
+    
+    <div class="info-panel">
+        <h3>🚨 ICE Activity Monitor</h3>
+        <div class="stats">
+            <div class="stat-item">
+                <strong id="stat-active">0</strong><br>
+                <small>Active</small>
+            </div>
+            <div class="stat-item">
+                <strong id="stat-critical">0</strong><br>
+                <small>Critical</small>
+            </div>
+            <div class="stat-item">
+                <strong id="stat-in-progress">0</strong><br>
+                <small>In Progress</small>
+            </div>
+            <div class="stat-item">
+                <strong id="stat-total">0</strong><br>
+                <small>Total</small>
+            </div>
+        </div>
+        
+{MapGenerator.legend_html(priority_colors)}
+        
+        <div style="margin-top: 10px; font-size: 12px; color: #666;">
+            Last Updated: <span id="last-updated">-</span>
+            <span id="connection"></span>
+        </div>
+    </div>
+
+    <div id="map"></div>
+    
+    <script src="https://unpkg.com/leaflet@1.7.1/dist/leaflet.js"></script>
+    <script>
+        // Initialize map with OpenStreetMap
+        const map = L.map('map').setView([{center_lat}, {center_lng}], 12);
+        
+        L.tileLayer('https://{{s}}.tile.openstreetmap.org/{{z}}/{{x}}/{{y}}.png', {{
+            attribution: '© OpenStreetMap contributors'
+        }}).addTo(map);
+        
+        const priorityColors = {json.dumps(priority_colors)};
+        const clusterThreshold = {MapGenerator.CLUSTER_THRESHOLD};
+        const layers = {{}};  // markers mode: activity id -> {{activity, group}}
+        const clusterLayer = L.layerGroup().addTo(map);
+        let mode = 'markers';
+        
+        function popupContent(activity, color) {{
+            return `
+                <div style="max-width: 250px;">
+                    <h3>${{activity.activity_type}}</h3>
+                    <p><strong>Location:</strong> ${{activity.location}}</p>
+                    <p><strong>Priority:</strong> <span style="color: ${{color}}; font-weight: bold;">${{activity.priority}}</span></p>
+                    <p><strong>Status:</strong> ${{activity.status}}</p>
+                    <p><strong>Time:</strong> ${{new Date(activity.timestamp).toLocaleString()}}</p>
+                    <p><strong>Description:</strong> ${{activity.description}}</p>
+                    ${{activity.assigned_personnel.length > 0 ? 
+                      `<p><strong>Personnel:</strong> ${{activity.assigned_personnel.join(', ')}}</p>` : ''}}
+                    ${{activity.resources_needed.length > 0 ? 
+                      `<p><strong>Resources:</strong> ${{activity.resources_needed.join(', ')}}</p>` : ''}}
+                </div>
+            `;
+        }}
+        
+        // Marker plus (for High/Critical) alert radius circle, added to group
+        function drawActivity(activity, group) {{
+            const lat = activity.coordinates.lat;
+            const lng = activity.coordinates.lng;
+            const color = priorityColors[activity.priority];
+            
+            const customIcon = L.divIcon({{
+                html: `<div style="background-color: ${{color}}; width: 20px; height: 20px; border-radius: 50%; border: 3px solid white; box-shadow: 0 2px 4px rgba(0,0,0,0.3);"></div>`,
+                iconSize: [20, 20],
+                className: 'custom-marker'
+            }});
+            L.marker([lat, lng], {{icon: customIcon}}).bindPopup(popupContent(activity, color)).addTo(group);
+            
+            if (activity.priority === 'Critical' || activity.priority === 'High') {{
+                L.circle([lat, lng], {{
+                    color: color,
+                    fillColor: color,
+                    fillOpacity: 0.1,
+                    radius: activity.alert_radius
+                }}).addTo(group);
+            }}
+        }}
+        
+        function drawCluster(cluster) {{
+            if (cluster.activity) {{
+                drawActivity(cluster.activity, clusterLayer);
+                return;
+            }}
+            const top = ['Critical', 'High', 'Medium', 'Low'].find(p => cluster.priorities[p]);
+            const color = priorityColors[top];
+            const size = Math.round(30 + Math.min(30, Math.log10(cluster.count) * 10));
+            const icon = L.divIcon({{
+                html: `<div style="background-color: ${{color}}; width: ${{size}}px; height: ${{size}}px; line-height: ${{size}}px; border-radius: 50%; border: 3px solid white; color: white; font-weight: bold; text-align: center; box-shadow: 0 2px 4px rgba(0,0,0,0.3);">${{cluster.count}}</div>`,
+                iconSize: [size, size],
+                className: 'cluster-marker'
+            }});
+            const summary = Object.entries(cluster.priorities).map(([p, n]) => `${{p}}: ${{n}}`).join('<br>');
+            L.marker([cluster.lat, cluster.lng], {{icon}})
+                .bindTooltip(`<strong>${{cluster.count}} reports</strong><br>${{summary}}` +
+                             (cluster.critical_open ? `<br>🚨 ${{cluster.critical_open}} critical open` : ''))
+                .on('click', () => map.setView([cluster.lat, cluster.lng], map.getZoom() + 2))
+                .addTo(clusterLayer);
+        }}
+        
+        function removeActivity(id) {{
+            const layer = layers[id];
+            if (!layer) return;
+            map.removeLayer(layer.group);
+            delete layers[id];
+        }}
+        
+        function upsertActivity(activity) {{
+            removeActivity(activity.id);
+            const group = L.layerGroup().addTo(map);
+            drawActivity(activity, group);
+            layers[activity.id] = {{activity, group}};
+        }}
+        
+        function showStats(stats) {{
+            document.getElementById('stat-active').textContent = stats.active;
+            document.getElementById('stat-critical').textContent = stats.critical;
+            document.getElementById('stat-in-progress').textContent = stats.in_progress;
+            document.getElementById('stat-total').textContent = stats.total;
+            document.getElementById('alert-banner').style.display = stats.critical_open > 0 ? 'block' : 'none';
+            document.getElementById('last-updated').textContent = new Date().toLocaleString();
+        }}
+        
+        function updatePanel() {{
+            const activities = Object.values(layers).map(layer => layer.activity);
+            const open = a => a.status === 'Active' || a.status === 'In Progress';
+            showStats({{
+                active: activities.filter(a => a.status === 'Active').length,
+                critical: activities.filter(a => a.priority === 'Critical').length,
+                in_progress: activities.filter(a => a.status === 'In Progress').length,
+                total: activities.length,
+                critical_open: activities.filter(a => a.priority === 'Critical' && open(a)).length
+            }});
+        }}
+        
+        // Clusters mode: only the clusters for the current viewport and zoom are fetched
+        async function loadClusters() {{
+            const b = map.getBounds();
+            const bbox = [b.getSouth(), b.getWest(), b.getNorth(), b.getEast()].join(',');
+            const response = await fetch(`/clusters?zoom=${{map.getZoom()}}&bbox=${{bbox}}`);
+            const data = await response.json();
+            clusterLayer.clearLayers();
+            data.clusters.forEach(drawCluster);
+            showStats(data.stats);
+        }}
+        
+        let clusterTimer = null;
+        function scheduleClusters() {{
+            clearTimeout(clusterTimer);
+            clusterTimer = setTimeout(loadClusters, 500);
+        }}
+        map.on('moveend', () => {{ if (mode === 'clusters') scheduleClusters(); }});
+        
+        async function loadAll() {{
+            const response = await fetch('/activities');
+            const data = await response.json();
+            mode = data.mode;
+            Object.keys(layers).forEach(removeActivity);
+            clusterLayer.clearLayers();
+            if (mode === 'markers') {{
+                data.activities.forEach(upsertActivity);
+                updatePanel();
+            }} else {{
+                await loadClusters();
+            }}
+        }}
+        
+        // Full load once, then only deltas; resync after a reconnect in case events were missed
+        loadAll().then(() => {{
+            const events = new EventSource('/events');
+            let connected = false;
+            events.onopen = () => {{
+                document.getElementById('connection').textContent = '● live';
+                if (connected) loadAll();
+                connected = true;
+            }};
+            events.onerror = () => {{
+                document.getElementById('connection').textContent = '○ reconnecting';
+            }};
+            events.addEventListener('upsert', event => {{
+                if (mode === 'clusters') return scheduleClusters();
+                upsertActivity(JSON.parse(event.data));
+                if (Object.keys(layers).length > clusterThreshold) return loadAll();
+                updatePanel();
+            }});
+            events.addEventListener('remove', event => {{
+                if (mode === 'clusters') return scheduleClusters();
+                removeActivity(JSON.parse(event.data).id);
+                updatePanel();
+            }});
+        }});
+    </script>
+</body>
+</html>
+        """
+
+class ClusterIndex:
+    """Hierarchical marker clusters for every map zoom level, maintained incrementally
+    
+    Points are projected to Web Mercator and bucketed into CELL_PX-pixel grid cells
+    at MAX_ZOOM; the cell at zoom z is that cell shifted right by MAX_ZOOM - z, so
+    each add/remove touches exactly one cluster per level. A cluster keeps its
+    count, coordinate sums, per-priority counts, open-critical count and an XOR of
+    member numbers, which yields the member id whenever the count drops to one.
+    """
+    
+    MAX_ZOOM = 18
+    CELL_PX = 64
+    
+    def __init__(self):
+        # zoom -> (cell_x, cell_y) -> [count, sum_lat, sum_lng, priority_counts, critical_open, id_xor]
+        self._levels: List[Dict[tuple, list]] = [{} for _ in range(self.MAX_ZOOM + 1)]
+        self._points: Dict[str, tuple] = {}  # id -> (cell_x, cell_y, lat, lng, priority_index, critical_open, number)
+        self._numbers: Dict[str, int] = {}
+        self._ids_by_number: List[str] = []
+    
+    def __len__(self):
+        return len(self._points)
+    
+    @classmethod
+    def _finest_cell(cls, lat: float, lng: float) -> tuple:
+        lat = max(min(lat, 85.05112878), -85.05112878)
+        x = (lng + 180.0) / 360.0
+        sin_lat = math.sin(math.radians(lat))
+        y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+        cells = (256 << cls.MAX_ZOOM) // cls.CELL_PX
+        return (min(int(x * cells), cells - 1), min(int(y * cells), cells - 1))
+    
+    def on_change(self, event: str, activity: ICEActivity):
+        """ActivityStore listener"""
+        if event == "remove":
+            self.remove(activity.id)
+        else:
+            self.put(activity)
+    
+    def put(self, activity: ICEActivity):
+        self.remove(activity.id)
+        number = self._numbers.get(activity.id)
+        if number is None:
+            number = len(self._ids_by_number)
+            self._numbers[activity.id] = number
+            self._ids_by_number.append(activity.id)
+        lat, lng = activity.lat, activity.lng
+        cx, cy = self._finest_cell(lat, lng)
+        priority = PRIORITIES.index(activity.priority) if activity.priority in PRIORITIES else 0
+        critical_open = int(activity.priority == "Critical" and activity.status in OPEN_STATUSES)
+        self._points[activity.id] = (cx, cy, lat, lng, priority, critical_open, number)
+        for zoom in range(self.MAX_ZOOM + 1):
+            shift = self.MAX_ZOOM - zoom
+            key = (cx >> shift, cy >> shift)
+            cluster = self._levels[zoom].get(key)
+            if cluster is None:
+                cluster = self._levels[zoom][key] = [0, 0.0, 0.0, [0] * len(PRIORITIES), 0, 0]
+            cluster[0] += 1
+            cluster[1] += lat
+            cluster[2] += lng
+            cluster[3][priority] += 1
+            cluster[4] += critical_open
+            cluster[5] ^= number
+    
+    def remove(self, activity_id: str):
+        point = self._points.pop(activity_id, None)
+        if point is None:
+            return
+        cx, cy, lat, lng, priority, critical_open, number = point
+        for zoom in range(self.MAX_ZOOM + 1):
+            shift = self.MAX_ZOOM - zoom
+            key = (cx >> shift, cy >> shift)
+            cluster = self._levels[zoom][key]
+            cluster[0] -= 1
+            if cluster[0] == 0:
+                del self._levels[zoom][key]
+                continue
+            cluster[1] -= lat
+            cluster[2] -= lng
+            cluster[3][priority] -= 1
+            cluster[4] -= critical_open
+            cluster[5] ^= number
+    
+    def clusters(self, zoom: int, bbox: tuple = None) -> List[Dict]:
+        """Clusters at zoom intersecting bbox = (south, west, north, east)"""
+        zoom = max(0, min(int(zoom), self.MAX_ZOOM))
+        level = self._levels[zoom]
+        cells = level.items()
+        if bbox is not None:
+            south, west, north, east = bbox
+            shift = self.MAX_ZOOM - zoom
+            x0, y0 = self._finest_cell(north, max(west, -180.0))
+            x1, y1 = self._finest_cell(south, min(east, 180.0))
+            x0, y0, x1, y1 = x0 >> shift, y0 >> shift, x1 >> shift, y1 >> shift
+            if (x1 - x0 + 1) * (y1 - y0 + 1) < len(level):
+                cells = [((x, y), level[(x, y)]) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)
+                         if (x, y) in level]
+            else:
+                cells = [(key, c) for key, c in level.items() if x0 <= key[0] <= x1 and y0 <= key[1] <= y1]
+        result = []
+        for _, (count, sum_lat, sum_lng, priorities, critical_open, id_xor) in cells:
+            cluster = {
+                "lat": sum_lat / count,
+                "lng": sum_lng / count,
+                "count": count,
+                "priorities": {p: n for p, n in zip(PRIORITIES, priorities) if n},
+                "critical_open": critical_open
+            }
+            if count == 1:
+                # Exact coordinates for single points (the running sums can drift)
+                cluster["id"] = self._ids_by_number[id_xor]
+                cluster["lat"], cluster["lng"] = self._points[cluster["id"]][2:4]
+            result.append(cluster)
+        return result
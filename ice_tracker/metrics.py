@@ -0,0 +1,137 @@
+"""Process-wide timers, counters and ring-buffer latency histograms for the hot paths"""
+
+import contextlib
+import datetime
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+class LatencyHistogram:
+    """Lifetime count/total/max plus the last `size` latencies in a ring buffer
+    
+    Percentiles are computed from the ring buffer, so they describe recent
+    behaviour and cost O(size log size) only when read.
+    """
+    
+    def __init__(self, size: int = 1024):
+        self._samples = deque(maxlen=size)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+    
+    def observe(self, seconds: float):
+        self._samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+    
+    @staticmethod
+    def percentile(ordered, q: float) -> float:
+        """Nearest-rank percentile (0 < q <= 100) of an ascending list"""
+        if not ordered:
+            return 0.0
+        return ordered[max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))]
+    
+    def summary(self) -> Dict:
+        """Milliseconds: count, mean, last, max and p50/p95/p99 of the recent window"""
+        ordered = sorted(self._samples)
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "last_ms": self.last * 1000,
+            "max_ms": self.max * 1000,
+            "p50_ms": self.percentile(ordered, 50) * 1000,
+            "p95_ms": self.percentile(ordered, 95) * 1000,
+            "p99_ms": self.percentile(ordered, 99) * 1000,
+            "window": len(ordered)
+        }
+
+class Metrics:
+    """Thread-safe registry of named latency histograms and counters
+    
+    Writer, geocoding and weather threads report here as well as the Tk thread.
+    Recording is a perf_counter pair and a deque append under a lock; set
+    enabled = False to turn it into a no-op.
+    """
+    
+    def __init__(self, window: int = 1024):
+        self.window = window
+        self.enabled = True
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._timers: Dict[str, LatencyHistogram] = {}
+        self._counters: Dict[str, int] = {}
+    
+    def observe(self, name: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._timers.get(name)
+            if histogram is None:
+                histogram = self._timers[name] = LatencyHistogram(self.window)
+            histogram.observe(seconds)
+    
+    def incr(self, name: str, n: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+    
+    @contextlib.contextmanager
+    def timer(self, name: str):
+        """Time the with-block into the `name` histogram; failures also count `name.errors`"""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.incr(f"{name}.errors")
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started)
+    
+    def timed(self, name: str):
+        """Decorator form of timer()"""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+    
+    def snapshot(self) -> Dict:
+        with self._lock:
+            timers = {name: histogram.summary() for name, histogram in sorted(self._timers.items())}
+            counters = dict(sorted(self._counters.items()))
+        return {
+            "generated": datetime.datetime.now().isoformat(),
+            "uptime_seconds": time.time() - self.started,
+            "timers": timers,
+            "counters": counters
+        }
+    
+    def export(self, filename: str) -> Dict:
+        """Write snapshot() to a JSON file and return it"""
+        data = self.snapshot()
+        tmp_path = filename + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, filename)
+        return data
+    
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+            self.started = time.time()
+
+# Shared by the core modules and the GUI
+metrics = Metrics()
@@ -0,0 +1,113 @@
+"""Activity model and the priority/status vocabularies"""
+
+import datetime
+import sys
+import time
+import uuid
+from typing import Dict
+
+PRIORITIES = ["Low", "Medium", "High", "Critical"]
+STATUSES = ["Active", "In Progress", "Resolved", "Closed"]
+
+# Open statuses are loaded eagerly; history statuses can be paged in lazily
+OPEN_STATUSES = ["Active", "In Progress"]
+HISTORY_STATUSES = ["Resolved", "Closed"]
+
+# Small-int codes for priority and status; values outside the tables are kept as strings
+PRIORITY_CODES = {priority: code for code, priority in enumerate(PRIORITIES)}
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+class ICEActivity:
+    """One reported activity
+    
+    Stored compactly for large archives: no per-instance __dict__, priority and status
+    as small-int codes, the timestamp as epoch seconds and coordinates as two floats.
+    timestamp, priority, status and coordinates are properties with the usual types.
+    """
+    
+    __slots__ = ("id", "ts", "activity_type", "location", "description", "_priority", "_status",
+                 "assigned_personnel", "resources_needed", "lat", "lng", "alert_radius", "version")
+    
+    def __init__(self, activity_id: str = None):
+        self.id = activity_id or str(uuid.uuid4())
+        self.ts = time.time()  # epoch seconds; see the timestamp property
+        self.activity_type = ""
+        self.location = ""
+        self.description = ""
+        self.priority = "Medium"
+        self.status = "Active"
+        self.assigned_personnel = []
+        self.resources_needed = []
+        self.lat = 0.0
+        self.lng = 0.0
+        self.alert_radius = 1000  # meters
+        self.version = 0  # bumped on every change made through ActivityStore
+    
+    @property
+    def timestamp(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.ts)
+    
+    @timestamp.setter
+    def timestamp(self, value: datetime.datetime):
+        self.ts = value.timestamp()
+    
+    @property
+    def priority(self) -> str:
+        code = self._priority
+        return PRIORITIES[code] if code.__class__ is int else code
+    
+    @priority.setter
+    def priority(self, value: str):
+        self._priority = PRIORITY_CODES.get(value, value)
+    
+    @property
+    def status(self) -> str:
+        code = self._status
+        return STATUSES[code] if code.__class__ is int else code
+    
+    @status.setter
+    def status(self, value: str):
+        self._status = STATUS_CODES.get(value, value)
+    
+    @property
+    def coordinates(self) -> Dict[str, float]:
+        """A fresh {"lat", "lng"} dict; assign a new dict (or set lat/lng) to move the activity"""
+        return {"lat": self.lat, "lng": self.lng}
+    
+    @coordinates.setter
+    def coordinates(self, value: Dict[str, float]):
+        self.lat = float(value["lat"])
+        self.lng = float(value["lng"])
+        
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "timestamp": self.timestamp.isoformat(),
+            "activity_type": self.activity_type,
+            "location": self.location,
+            "description": self.description,
+            "priority": self.priority,
+            "status": self.status,
+            "assigned_personnel": self.assigned_personnel,
+            "resources_needed": self.resources_needed,
+            "coordinates": self.coordinates,
+            "alert_radius": self.alert_radius,
+            "version": self.version
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        activity = cls.__new__(cls)
+        activity.id = data["id"]
+        activity.timestamp = datetime.datetime.fromisoformat(data["timestamp"])
+        activity.activity_type = sys.intern(data["activity_type"])  # a handful of distinct types
+        activity.location = data["location"]
+        activity.description = data["description"]
+        activity.priority = data["priority"]
+        activity.status = data["status"]
+        activity.assigned_personnel = data["assigned_personnel"]
+        activity.resources_needed = data["resources_needed"]
+        activity.coordinates = data["coordinates"]
+        activity.alert_radius = data.get("alert_radius", 1000)
+        activity.version = data.get("version", 0)
+        return activity
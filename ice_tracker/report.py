@@ -0,0 +1,65 @@
+"""Emergency report export shared by the GUI and the command line"""
+
+import datetime
+import json
+import os
+from collections import Counter
+from typing import Dict, List
+
+from .models import PRIORITIES, STATUSES
+
+def record_counter(records: List[dict]):
+    """count(status=None, priority=None) over to_dict() records, for write_report"""
+    cells = Counter((record["status"], record["priority"]) for record in records)
+
+    def count(status: str = None, priority: str = None) -> int:
+        return sum(n for (s, p), n in cells.items()
+                   if (status is None or s == status) and (priority is None or p == priority))
+    return count
+
+def write_report(filename: str, records: List[dict], count, binary: bool = False,
+                 since: float = None) -> Dict:
+    """Write the JSON report for records (to_dict() layout) and return it
+
+    count(status=None, priority=None) supplies the summary figures, so callers can
+    include history that is not loaded. With binary=True the activities go to a
+    .bin snapshot next to the summary instead of into the JSON. since (epoch
+    seconds) records the start of the time window the records were filtered to.
+    """
+    # Create comprehensive report
+    report_data = {
+        "report_generated": datetime.datetime.now().isoformat(),
+        "total_activities": count(),
+        "active_emergencies": count(status="Active"),
+        "critical_emergencies": count(priority="Critical"),
+        "summary": {
+            "by_priority": {
+                priority: count(priority=priority)
+                for priority in ["Critical", "High", "Medium", "Low"]
+            },
+            "by_status": {
+                status: count(status=status)
+                for status in ["Active", "In Progress", "Resolved", "Closed"]
+            },
+            "by_status_and_priority": {
+                status: {priority: count(status=status, priority=priority)
+                         for priority in PRIORITIES}
+                for status in STATUSES
+            }
+        },
+        "activities": records
+    }
+    if since is not None:
+        report_data["window_start"] = datetime.datetime.fromtimestamp(since).isoformat()
+
+    if binary:
+        from .storage import encode_snapshot
+        activities_file = os.path.splitext(filename)[0] + ".bin"
+        with open(activities_file, "wb") as f:
+            f.write(encode_snapshot(records))
+        del report_data["activities"]
+        report_data["activities_file"] = activities_file
+
+    with open(filename, "w") as f:
+        json.dump(report_data, f, indent=2)
+    return report_data
@@ -0,0 +1,144 @@
+"""Incremental inverted index for full-text search over activities"""
+
+import bisect
+import math
+import re
+from typing import Dict, List, Tuple
+
+from .models import ICEActivity
+
+_WORD = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+class SearchIndex:
+    """Ranked prefix search over the text fields of activities
+    
+    Feed it through ActivityStore.add_listener. Each term maps to a posting dict
+    {id: weight}, where a field's weight counts once per occurrence (type 3,
+    location and personnel/resources 2, description 1). The vocabulary is also
+    kept sorted, so a query word matches every term it prefixes with two bisects.
+    Every query word must match; results are ranked by weight x idf, exact words
+    scoring above prefix matches, and then by recency.
+    """
+    
+    FIELD_WEIGHTS = {
+        "activity_type": 3.0,
+        "location": 2.0,
+        "assigned_personnel": 2.0,
+        "resources_needed": 2.0,
+        "description": 1.0
+    }
+    PREFIX_FACTOR = 0.5  # a prefix match scores half an exact one
+    
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._terms: List[str] = []  # sorted vocabulary
+        self._doc_terms: Dict[str, Dict[str, float]] = {}  # id -> {term: weight} as last indexed
+        self._ts: Dict[str, float] = {}
+    
+    def __len__(self):
+        return len(self._doc_terms)
+    
+    @classmethod
+    def weigh(cls, activity: ICEActivity) -> Dict[str, float]:
+        """{term: weight} for an activity's searchable fields"""
+        texts: Dict[float, List[str]] = {}  # fields of equal weight are tokenized in one pass
+        for field, weight in cls.FIELD_WEIGHTS.items():
+            value = getattr(activity, field)
+            texts.setdefault(weight, []).append(" ".join(value) if isinstance(value, list) else value)
+        weights: Dict[str, float] = {}
+        get = weights.get
+        for weight, parts in texts.items():
+            for term in tokenize(" ".join(parts)):
+                weights[term] = get(term, 0.0) + weight
+        return weights
+    
+    def on_change(self, event: str, activity: ICEActivity):
+        """ActivityStore listener; only the terms that changed are touched"""
+        old = self._doc_terms.get(activity.id, {})
+        if event == "remove":
+            new = {}
+            self._ts.pop(activity.id, None)
+        else:
+            new = self.weigh(activity)
+            self._ts[activity.id] = activity.ts
+        if new == old:
+            return
+        for term in old.keys() - new.keys():
+            postings = self._postings[term]
+            del postings[activity.id]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+        for term, weight in new.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._terms, term)
+            postings[activity.id] = weight
+        if new:
+            self._doc_terms[activity.id] = new
+        else:
+            self._doc_terms.pop(activity.id, None)
+    
+    def expand(self, prefix: str) -> List[str]:
+        """Indexed terms starting with prefix"""
+        lo = bisect.bisect_left(self._terms, prefix)
+        hi = bisect.bisect_left(self._terms, prefix + "\uffff")
+        return self._terms[lo:hi]
+    
+    def _factor(self, term: str, word: str) -> float:
+        factor = math.log(1 + len(self._doc_terms) / len(self._postings[term]))
+        return factor if term == word else factor * self.PREFIX_FACTOR
+    
+    def _word_scores(self, word: str, terms: List[str]) -> Dict[str, float]:
+        """id -> score of the best of terms (the expansions of one query word)"""
+        scores: Dict[str, float] = {}
+        for term in terms:
+            factor = self._factor(term, word)
+            if not scores:
+                scores = {activity_id: weight * factor for activity_id, weight in self._postings[term].items()}
+                continue
+            for activity_id, weight in self._postings[term].items():
+                score = weight * factor
+                if score > scores.get(activity_id, 0.0):
+                    scores[activity_id] = score
+        return scores
+    
+    def search(self, query: str, limit: int = None) -> List[Tuple[str, float]]:
+        """(id, score) of activities matching every word of query, best first"""
+        expansions = []
+        for word in set(tokenize(query)):
+            terms = self.expand(word)
+            if not terms:
+                return []
+            expansions.append((sum(len(self._postings[term]) for term in terms), word, terms))
+        if not expansions:
+            return []
+        # Score the rarest word in full, then only look its matches up in the other words' postings
+        expansions.sort()
+        _, word, terms = expansions[0]
+        scores = self._word_scores(word, terms)
+        for size, word, terms in expansions[1:]:
+            if size < len(scores) * len(terms):  # cheaper to score this word in full too
+                word_scores = self._word_scores(word, terms)
+                scores = {i: s + word_scores[i] for i, s in scores.items() if i in word_scores}
+            else:
+                factors = [(self._postings[term], self._factor(term, word)) for term in terms]
+                narrowed = {}
+                for activity_id, score in scores.items():
+                    best = max((postings[activity_id] * factor for postings, factor in factors
+                                if activity_id in postings), default=None)
+                    if best is not None:
+                        narrowed[activity_id] = score + best
+                scores = narrowed
+            if not scores:
+                return []
+        ts = self._ts
+        results = sorted(scores.items(), key=lambda item: (item[1], ts.get(item[0], 0.0)), reverse=True)
+        return results[:limit] if limit else results
+    
+    def search_ids(self, query: str, limit: int = None) -> List[str]:
+        return [activity_id for activity_id, _ in self.search(query, limit)]
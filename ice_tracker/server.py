@@ -0,0 +1,177 @@
+"""Local HTTP server that streams activity changes to the live map over SSE"""
+
+import json
+import queue
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from .mapgen import ClusterIndex, MapGenerator
+from .models import ICEActivity
+from .store import ActivityAggregates
+
+class MapServer:
+    """Local HTTP server for the live map
+    
+    GET /            live map page (served once per browser tab)
+    GET /activities  current activities as JSON, or just stats in clusters mode
+    GET /clusters    ?zoom=&bbox=south,west,north,east clusters for one viewport
+    GET /events      Server-Sent Events stream of "upsert"/"remove" deltas
+    
+    Register on_change with ActivityStore.add_listener to feed it.
+    """
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self._records: Dict[str, dict] = {}
+        self._record_json: Dict[str, str] = {}  # serialized once per change, reused by /activities
+        self._version = 0
+        self._snapshot_cache: Optional[tuple] = None  # (version, payload)
+        self._clusters = ClusterIndex()
+        self._aggregates = ActivityAggregates()
+        self._clients: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+    
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self._httpd.server_address[1]}/"
+    
+    def start(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # keep the console quiet
+            
+            def do_GET(self):
+                path = self.path.split("?", 1)[0]
+                if path == "/":
+                    self._send(200, "text/html; charset=utf-8", server.page().encode("utf-8"))
+                elif path == "/activities":
+                    self._send(200, "application/json", server.snapshot_json().encode("utf-8"))
+                elif path == "/clusters":
+                    query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+                    try:
+                        zoom = int(query.get("zoom", ["12"])[0])
+                        bbox = tuple(float(v) for v in query["bbox"][0].split(",")) if "bbox" in query else None
+                    except ValueError:
+                        self._send(400, "text/plain", b"Bad zoom or bbox")
+                        return
+                    self._send(200, "application/json", server.clusters_json(zoom, bbox).encode("utf-8"))
+                elif path == "/events":
+                    server.stream_events(self)
+                else:
+                    self._send(404, "text/plain", b"Not found")
+            
+            def _send(self, code: int, content_type: str, body: bytes):
+                self.send_response(code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                self.wfile.write(body)
+        
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        threading.Thread(target=self._httpd.serve_forever, name="ice-map-server", daemon=True).start()
+    
+    def stop(self):
+        if self._httpd is not None:
+            with self._lock:
+                for client in self._clients:
+                    client.put(None)
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+    
+    def page(self) -> str:
+        with self._lock:
+            coordinates = [record["coordinates"] for record in self._records.values()]
+        if coordinates:
+            return MapGenerator.generate_live_map_html(
+                sum(c["lat"] for c in coordinates) / len(coordinates),
+                sum(c["lng"] for c in coordinates) / len(coordinates))
+        return MapGenerator.generate_live_map_html()
+    
+    def _stats(self) -> Dict:
+        return {
+            "active": self._aggregates.count(status="Active"),
+            "in_progress": self._aggregates.count(status="In Progress"),
+            "critical": self._aggregates.count(priority="Critical"),
+            "total": self._aggregates.total,
+            "critical_open": self._aggregates.critical_open
+        }
+    
+    def snapshot_json(self) -> str:
+        with self._lock:
+            if self._snapshot_cache is not None and self._snapshot_cache[0] == self._version:
+                return self._snapshot_cache[1]
+            if len(self._records) > MapGenerator.CLUSTER_THRESHOLD:
+                payload = json.dumps({"mode": "clusters", "stats": self._stats()})
+            else:
+                payload = ('{"mode": "markers", "activities": [' + ", ".join(self._record_json.values()) +
+                           '], "stats": ' + json.dumps(self._stats()) + "}")
+            self._snapshot_cache = (self._version, payload)
+            return payload
+    
+    def clusters_json(self, zoom: int, bbox: tuple = None) -> str:
+        with self._lock:
+            clusters = self._clusters.clusters(zoom, bbox)
+            for cluster in clusters:
+                if "id" in cluster:
+                    cluster["activity"] = self._records[cluster["id"]]
+            return json.dumps({"clusters": clusters, "stats": self._stats()})
+    
+    def on_change(self, event: str, activity: ICEActivity):
+        """ActivityStore listener: record the change and push it to every open stream"""
+        if event == "remove":
+            message = ("remove", json.dumps({"id": activity.id}))
+        else:
+            record = activity.to_dict()
+            message = ("upsert", json.dumps(record))
+        with self._lock:
+            self._version += 1
+            self._aggregates.on_change(event, activity)
+            if event == "remove":
+                self._records.pop(activity.id, None)
+                self._record_json.pop(activity.id, None)
+                self._clusters.remove(activity.id)
+            else:
+                self._records[activity.id] = record
+                self._record_json[activity.id] = message[1]
+                self._clusters.put(activity)
+            for client in self._clients:
+                client.put(message)
+    
+    def stream_events(self, handler: BaseHTTPRequestHandler):
+        """Serve one SSE connection until the browser goes away"""
+        client: queue.Queue = queue.Queue()
+        with self._lock:
+            self._clients.append(client)
+        try:
+            handler.send_response(200)
+            handler.send_header("Content-Type", "text/event-stream")
+            handler.send_header("Cache-Control", "no-cache")
+            handler.end_headers()
+            handler.wfile.write(b"retry: 3000\n\n")
+            handler.wfile.flush()
+            while True:
+                try:
+                    message = client.get(timeout=15)
+                except queue.Empty:
+                    handler.wfile.write(b": keepalive\n\n")  # also detects closed tabs
+                    handler.wfile.flush()
+                    continue
+                if message is None:
+                    break
+                event, data = message
+                handler.wfile.write(f"event: {event}\ndata: {data}\n\n".encode("utf-8"))
+                handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self._lock:
+                self._clients.remove(client)
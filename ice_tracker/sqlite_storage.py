@@ -0,0 +1,289 @@
+"""SQLite activity storage with indexed queries"""
+
+import datetime
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .models import HISTORY_STATUSES, OPEN_STATUSES, ICEActivity
+from .storage import ActivityJournal, write_archive
+
+class SQLiteActivityStorage:
+    """Optional SQLite storage backend with indexed status, priority, time and location queries
+    
+    Rows are upserted per change, so there is nothing to compact. On the first load an
+    existing ice_activities.json (plus journal) is imported into the database; the
+    database's user_version records that it ran, so rows written before that first load
+    (a CLI add, say) neither block the import nor get overwritten by it.
+    """
+    
+    supports_queries = True
+    
+    PRIORITY_RANK = {"Critical": 0, "High": 1, "Medium": 2, "Low": 3}
+    JSON_IMPORTED = 1  # PRAGMA user_version once the JSON history has been imported
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS activities (
+            id TEXT PRIMARY KEY,
+            ts REAL NOT NULL,
+            timestamp TEXT NOT NULL,
+            activity_type TEXT NOT NULL,
+            location TEXT NOT NULL,
+            description TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            priority_rank INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            assigned_personnel TEXT NOT NULL,
+            resources_needed TEXT NOT NULL,
+            lat REAL NOT NULL,
+            lng REAL NOT NULL,
+            alert_radius INTEGER NOT NULL,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_activities_status ON activities (status);
+        CREATE INDEX IF NOT EXISTS idx_activities_priority ON activities (priority);
+        CREATE INDEX IF NOT EXISTS idx_activities_ts ON activities (ts);
+        CREATE INDEX IF NOT EXISTS idx_activities_history ON activities (status, ts, id);
+        CREATE INDEX IF NOT EXISTS idx_activities_order ON activities (priority_rank, ts);
+        CREATE INDEX IF NOT EXISTS idx_activities_coords ON activities (lat, lng);
+    """
+    
+    COLUMNS = ("id", "ts", "timestamp", "activity_type", "location", "description", "priority",
+               "priority_rank", "status", "assigned_personnel", "resources_needed", "lat", "lng",
+               "alert_radius", "version")
+    
+    def __init__(self, path: str = "ice_activities.db", json_path: str = "ice_activities.json",
+                 retention_days: float = None):
+        self.path = path
+        self.json_path = json_path
+        self.retention_days = retention_days
+        self.compaction_error: Optional[Exception] = None
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        # Lazy mode keyset cursors: status key -> (ts, id) of the oldest row paged in
+        self._history_cursor: Dict[Optional[str], tuple] = {}
+        self._cold_counts: Dict[tuple, int] = {}
+        self._claimed = set()  # ids that are (or were) in the store since load_open
+    
+    def _row(self, record: dict) -> tuple:
+        """Convert a to_dict() record into a table row"""
+        return (
+            record["id"],
+            datetime.datetime.fromisoformat(record["timestamp"]).timestamp(),
+            record["timestamp"],
+            record["activity_type"],
+            record["location"],
+            record["description"],
+            record["priority"],
+            self.PRIORITY_RANK.get(record["priority"], 4),
+            record["status"],
+            json.dumps(record["assigned_personnel"]),
+            json.dumps(record["resources_needed"]),
+            record["coordinates"]["lat"],
+            record["coordinates"]["lng"],
+            record.get("alert_radius", 1000),
+            record.get("version", 0)
+        )
+    
+    @staticmethod
+    def _record(row) -> dict:
+        """Convert a SELECT * row into the to_dict() layout"""
+        (activity_id, _ts, timestamp, activity_type, location, description, priority,
+         _rank, status, personnel, resources, lat, lng, alert_radius, version) = row
+        return {
+            "id": activity_id,
+            "timestamp": timestamp,
+            "activity_type": activity_type,
+            "location": location,
+            "description": description,
+            "priority": priority,
+            "status": status,
+            "assigned_personnel": json.loads(personnel),
+            "resources_needed": json.loads(resources),
+            "coordinates": {"lat": lat, "lng": lng},
+            "alert_radius": alert_radius,
+            "version": version
+        }
+    
+    def apply_retention(self) -> int:
+        """Move Resolved/Closed rows older than retention_days to a gzip cold segment"""
+        if self.retention_days is None:
+            return 0
+        where = f" WHERE status IN ({', '.join('?' for _ in HISTORY_STATUSES)}) AND ts < ?"
+        params = HISTORY_STATUSES + [time.time() - self.retention_days * 86400]
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM activities{where}",
+                                      params).fetchall()
+        if not rows:
+            return 0
+        write_archive(self.path, [self._record(row) for row in rows])
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM activities{where}", params)
+        return len(rows)
+    
+    def _import_json(self):
+        """Import the JSON history once; rows already in the database win"""
+        with self._lock:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] >= self.JSON_IMPORTED:
+                return
+        try:
+            records = [activity.to_dict() for activity in ActivityJournal(self.json_path).load()]
+        except FileNotFoundError:
+            records = []
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR IGNORE INTO activities ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                [self._row(record) for record in records])
+            self._conn.execute(f"PRAGMA user_version = {self.JSON_IMPORTED}")
+    
+    def _prepare_load(self):
+        """Import and archive as needed; raises FileNotFoundError if there is nothing to load"""
+        self._import_json()
+        self.apply_retention()
+        with self._lock:
+            empty = self._conn.execute("SELECT 1 FROM activities LIMIT 1").fetchone() is None
+        if empty:
+            raise FileNotFoundError(self.path)
+    
+    def load(self) -> List[ICEActivity]:
+        """Load every row; raises FileNotFoundError if there is nothing to load"""
+        self._prepare_load()
+        return [ICEActivity.from_dict(record) for record in self.iter_records()]
+    
+    def load_open(self) -> List[ICEActivity]:
+        """Read only open rows; history is paged in with page_history"""
+        self._prepare_load()
+        self._history_cursor = {}
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT status, priority, COUNT(*) FROM activities "
+                f"WHERE status IN ({', '.join('?' for _ in HISTORY_STATUSES)}) GROUP BY status, priority",
+                HISTORY_STATUSES).fetchall()
+        self._cold_counts = {(status, priority): n for status, priority, n in rows}
+        activities = [ICEActivity.from_dict(record)
+                      for status in OPEN_STATUSES for record in self.iter_records(status=status)]
+        self._claimed = {activity.id for activity in activities}
+        return activities
+    
+    def page_history(self, status: str = None, limit: int = 500) -> List[ICEActivity]:
+        """Page in the next newest history rows (Resolved/Closed, or just status)
+        
+        Rows already claimed by the store are passed over, not returned.
+        """
+        statuses = [status] if status else HISTORY_STATUSES
+        page = []
+        while len(page) < limit:
+            sql = (f"SELECT {', '.join(self.COLUMNS)} FROM activities "
+                   f"WHERE status IN ({', '.join('?' for _ in statuses)})")
+            params: list = list(statuses)
+            cursor = self._history_cursor.get(status)
+            if cursor is not None:
+                sql += " AND (ts < ? OR (ts = ? AND id < ?))"
+                params.extend([cursor[0], cursor[0], cursor[1]])
+            sql += " ORDER BY ts DESC, id DESC LIMIT ?"
+            params.append(limit - len(page))
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+            if not rows:
+                break
+            self._history_cursor[status] = (rows[-1][1], rows[-1][0])
+            page.extend(ICEActivity.from_dict(self._record(row)) for row in rows if row[0] not in self._claimed)
+        return page
+    
+    def claim_cold(self, activity: ICEActivity):
+        """activity now lives in the store (paged in, synced or merged); stop counting its row as cold
+        
+        Keyed by id: the row's stored status and priority are what was counted, and an id
+        is only claimed once.
+        """
+        if not self._cold_counts or activity.id in self._claimed:
+            return
+        self._claimed.add(activity.id)
+        with self._lock:
+            row = self._conn.execute("SELECT status, priority FROM activities WHERE id = ?",
+                                     (activity.id,)).fetchone()
+        if row is not None and self._cold_counts.get(tuple(row)):
+            self._cold_counts[tuple(row)] -= 1
+    
+    def cold_count(self, status: str = None, priority: str = None) -> int:
+        """History rows not paged in yet that match the filters (lazy mode only)"""
+        return sum(n for (s, p), n in self._cold_counts.items()
+                   if (status is None or s == status) and (priority is None or p == priority))
+    
+    def cold_records(self) -> List[dict]:
+        return []  # unpaged rows stay in the database
+    
+    def append(self, records=(), deleted_ids=()):
+        """Upsert changed records and delete removed ids in one transaction"""
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO activities ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                [self._row(record) for record in records])
+            self._conn.executemany("DELETE FROM activities WHERE id = ?",
+                                   [(i,) for i in deleted_ids])
+    
+    def sync(self):
+        pass  # every append commits its own transaction
+    
+    def needs_compaction(self) -> bool:
+        return False
+    
+    def compact(self, records: List[dict], background: bool = True):
+        """Upsert records; rows not in records (e.g. history not paged in) are kept"""
+        self.append(records)
+    
+    def _where(self, status=None, priority=None, since=None, until=None, bbox=None):
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if priority is not None:
+            clauses.append("priority = ?")
+            params.append(priority)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since.timestamp())
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until.timestamp())
+        if bbox is not None:
+            # bbox = (min_lat, min_lng, max_lat, max_lng)
+            clauses.append("lat BETWEEN ? AND ? AND lng BETWEEN ? AND ?")
+            params.extend([bbox[0], bbox[2], bbox[1], bbox[3]])
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+    
+    def count(self, **filters) -> int:
+        where, params = self._where(**filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM activities{where}", params).fetchone()[0]
+    
+    def query_ids(self, limit: int = None, offset: int = 0, **filters) -> List[str]:
+        """Ids matching the filters in display order (same as refresh_display's sort: rank then time, descending)"""
+        where, params = self._where(**filters)
+        sql = f"SELECT id FROM activities{where} ORDER BY priority_rank DESC, ts DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+        with self._lock:
+            return [row[0] for row in self._conn.execute(sql, params)]
+    
+    def iter_records(self, **filters):
+        """Yield to_dict()-style records straight from the rows"""
+        where, params = self._where(**filters)
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM activities{where}",
+                                      params).fetchall()
+        for row in rows:
+            yield self._record(row)
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,617 @@
+"""Activity persistence: JSON journal, binary snapshots and the background writer"""
+
+import datetime
+import glob
+import gzip
+import heapq
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+from .metrics import metrics
+from .models import HISTORY_STATUSES, PRIORITY_CODES, STATUS_CODES, ICEActivity
+
+# Binary snapshot layout (little-endian):
+#   header   magic, format version, record count, string count, list entry count
+#   records  one fixed-size struct per activity; text fields are string table indexes
+#   lists    string indexes of every personnel/resources entry, referenced by (start, count)
+#   strings  character length of each table string, then all of them as one UTF-8 blob
+SNAPSHOT_MAGIC = b"ICEB"
+SNAPSHOT_VERSION = 1
+_SNAPSHOT_HEADER = struct.Struct("<4sHIII")
+# id, type, location, description, priority, status, ts, lat, lng, alert radius, version,
+# personnel start/count, resources start/count
+_SNAPSHOT_RECORD = struct.Struct("<6I4dQIHIH")
+
+def _le_array(typecode: str, data=b"") -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+def encode_snapshot(records: List[dict]) -> bytes:
+    """Pack to_dict() records into the binary snapshot layout"""
+    table: Dict[str, int] = {}
+    intern = lambda text: table.setdefault(text, len(table))
+    lists = array("I")
+    packed = []
+    for record in records:
+        personnel_start = len(lists)
+        lists.extend(intern(name) for name in record["assigned_personnel"])
+        resources_start = len(lists)
+        lists.extend(intern(name) for name in record["resources_needed"])
+        packed.append(_SNAPSHOT_RECORD.pack(
+            intern(record["id"]), intern(record["activity_type"]), intern(record["location"]),
+            intern(record["description"]), intern(record["priority"]), intern(record["status"]),
+            datetime.datetime.fromisoformat(record["timestamp"]).timestamp(),
+            record["coordinates"]["lat"], record["coordinates"]["lng"],
+            record.get("alert_radius", 1000), record.get("version", 0),
+            personnel_start, resources_start - personnel_start,
+            resources_start, len(lists) - resources_start))
+    
+    lengths = array("I", (len(text) for text in table))
+    if sys.byteorder == "big":
+        lists.byteswap()
+        lengths.byteswap()
+    header = _SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(records), len(table), len(lists))
+    return b"".join([header, *packed, lists.tobytes(), lengths.tobytes(), "".join(table).encode("utf-8")])
+
+def decode_snapshot(data: bytes) -> List[ICEActivity]:
+    """Bulk-decode a binary snapshot straight into ICEActivity objects"""
+    magic, version, count, string_count, list_count = _SNAPSHOT_HEADER.unpack_from(data)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError("Not an ICE binary snapshot (or an unsupported version)")
+    view = memoryview(data)
+    records_end = _SNAPSHOT_HEADER.size + count * _SNAPSHOT_RECORD.size
+    lists_end = records_end + 4 * list_count
+    lengths_end = lists_end + 4 * string_count
+    lists = _le_array("I", view[records_end:lists_end])
+    text = str(view[lengths_end:], "utf-8")
+    strings = []
+    start = 0
+    for length in _le_array("I", view[lists_end:lengths_end]):
+        strings.append(text[start:start + length])
+        start += length
+    
+    new = ICEActivity.__new__
+    activities = []
+    for (activity_id, activity_type, location, description, priority, status, ts, lat, lng,
+         alert_radius, version, personnel_start, personnel_count, resources_start,
+         resources_count) in _SNAPSHOT_RECORD.iter_unpack(view[_SNAPSHOT_HEADER.size:records_end]):
+        activity = new(ICEActivity)
+        activity.id = strings[activity_id]
+        activity.ts = ts
+        activity.activity_type = strings[activity_type]
+        activity.location = strings[location]
+        activity.description = strings[description]
+        activity._priority = PRIORITY_CODES.get(strings[priority], strings[priority])
+        activity._status = STATUS_CODES.get(strings[status], strings[status])
+        activity.assigned_personnel = ([strings[i] for i in lists[personnel_start:personnel_start + personnel_count]]
+                                       if personnel_count else [])
+        activity.resources_needed = ([strings[i] for i in lists[resources_start:resources_start + resources_count]]
+                                     if resources_count else [])
+        activity.lat = lat
+        activity.lng = lng
+        activity.alert_radius = int(alert_radius) if alert_radius.is_integer() else alert_radius
+        activity.version = version
+        activities.append(activity)
+    return activities
+
+def convert_snapshot(src: str, dst: str):
+    """Convert between ice_activities.json and the binary format, chosen by dst's extension"""
+    if src.endswith(".bin"):
+        with open(src, "rb") as f:
+            records = [activity.to_dict() for activity in decode_snapshot(f.read())]
+    else:
+        with open(src, "r", encoding="utf-8") as f:
+            records = json.load(f)
+    tmp_path = dst + ".tmp"
+    if dst.endswith(".bin"):
+        with open(tmp_path, "wb") as f:
+            f.write(encode_snapshot(records))
+    else:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=2)
+    os.replace(tmp_path, dst)
+
+def write_archive(base_path: str, records: List[dict]) -> str:
+    """Write history records to a new gzip JSON-lines cold segment next to base_path"""
+    stamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S%f")
+    path = f"{os.path.splitext(base_path)[0]}.archive.{stamp}.jsonl.gz"
+    with gzip.open(path + ".tmp", "wt", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    os.replace(path + ".tmp", path)
+    return path
+
+def archive_segments(base_path: str) -> List[str]:
+    """Cold segments written for base_path, oldest first"""
+    return sorted(glob.glob(glob.escape(os.path.splitext(base_path)[0]) + ".archive.*.jsonl.gz"))
+
+def iter_archive(base_path: str):
+    """Yield archived records (to_dict() layout); cold segments are never loaded at startup"""
+    seen = set()
+    for path in reversed(archive_segments(base_path)):  # newest first: a re-archived id wins once
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record["id"] not in seen:
+                    seen.add(record["id"])
+                    yield record
+
+class ActivityJournal:
+    """Append-only JSON-lines journal of activity changes, compacted into a snapshot
+    
+    Every mutation appends one line; fsync is batched by count and age. Compaction
+    rotates the live journal into a numbered segment, writes the full state to the
+    snapshot in a background thread and then drops the covered segments. Loading
+    replays the snapshot followed by every remaining segment and the live journal.
+    
+    With snapshot_format="binary" the snapshot is written struct-packed to a .bin file
+    next to the JSON one; loading always reads whichever of the two is newer.
+    
+    With retention_days set, loading moves Resolved/Closed activities older than that
+    into a gzip cold segment (see iter_archive) and rewrites the snapshot without them.
+    """
+    
+    supports_queries = False
+    
+    def __init__(self, snapshot_path: str = "ice_activities.json", fsync_every: int = 32,
+                 fsync_interval: float = 1.0, compact_after: int = 1000, snapshot_format: str = "json",
+                 retention_days: float = None):
+        if snapshot_format not in ("json", "binary"):
+            raise ValueError(f"Unknown snapshot format: {snapshot_format}")
+        self.snapshot_path = snapshot_path
+        self.binary_path = os.path.splitext(snapshot_path)[0] + ".bin"
+        self.snapshot_format = snapshot_format
+        self.retention_days = retention_days
+        self.journal_path = os.path.splitext(snapshot_path)[0] + ".journal.jsonl"
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_after = compact_after
+        self.compaction_error: Optional[Exception] = None
+        self._lock = threading.Lock()
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._entries = 0
+        self._compactor: Optional[threading.Thread] = None
+        # Lazy mode: history records not yet paged in, newest first per status
+        self._cold: Dict[str, List[dict]] = {status: [] for status in HISTORY_STATUSES}
+        self._cold_pos: Dict[str, int] = {status: 0 for status in HISTORY_STATUSES}
+        self._cold_counts: Dict[tuple, int] = {}
+        self._cold_keys: Dict[str, tuple] = {}  # id -> (status, priority) of history not in the store yet
+    
+    def _segments(self) -> List[str]:
+        """Rotated journal segments, oldest first"""
+        segments = glob.glob(glob.escape(self.journal_path) + ".*")
+        return sorted((p for p in segments if p.rsplit(".", 1)[-1].isdigit()),
+                      key=lambda p: int(p.rsplit(".", 1)[-1]))
+    
+    def load(self) -> List[ICEActivity]:
+        """Replay snapshot and journal; raises FileNotFoundError if neither exists"""
+        return [item if isinstance(item, ICEActivity) else ICEActivity.from_dict(item)
+                for item in self._load_records().values()]
+    
+    def load_open(self) -> List[ICEActivity]:
+        """Build objects for open activities only; history stays as raw records"""
+        open_activities = []
+        self._cold = {status: [] for status in HISTORY_STATUSES}
+        self._cold_counts = {}
+        self._cold_keys = {}
+        for item in self._load_records().values():
+            if isinstance(item, ICEActivity):  # decoded from a binary snapshot
+                if item.status not in self._cold:
+                    open_activities.append(item)
+                    continue
+                item = item.to_dict()
+            if item["status"] in self._cold:
+                self._cold[item["status"]].append(item)
+                key = (item["status"], item["priority"])
+                self._cold_counts[key] = self._cold_counts.get(key, 0) + 1
+                self._cold_keys[item["id"]] = key
+            else:
+                open_activities.append(ICEActivity.from_dict(item))
+        for records in self._cold.values():
+            records.sort(key=lambda item: item["timestamp"], reverse=True)
+        self._cold_pos = {status: 0 for status in HISTORY_STATUSES}
+        return open_activities
+    
+    def page_history(self, status: str = None, limit: int = 500) -> List[ICEActivity]:
+        """Page in the next newest history records (Resolved/Closed, or just status)
+        
+        Records already claimed by the store are passed over, not returned.
+        """
+        statuses = [status] if status else HISTORY_STATUSES
+        streams = [self._cold[s][self._cold_pos[s]:] for s in statuses if s in self._cold]
+        page = []
+        for item in heapq.merge(*streams, key=lambda item: item["timestamp"], reverse=True):
+            if len(page) >= limit:
+                break
+            self._cold_pos[item["status"]] += 1
+            if item["id"] in self._cold_keys:
+                page.append(item)
+        return [ICEActivity.from_dict(item) for item in page]
+    
+    def claim_cold(self, activity: ICEActivity):
+        """activity now lives in the store (paged in, synced or merged); stop counting its cold copy
+        
+        Keyed by id, so it is a no-op for anything that was never cold or is claimed twice.
+        """
+        key = self._cold_keys.pop(activity.id, None)
+        if key is not None:
+            self._cold_counts[key] -= 1
+    
+    def cold_count(self, status: str = None, priority: str = None) -> int:
+        """History records not paged in yet that match the filters"""
+        return sum(n for (s, p), n in self._cold_counts.items()
+                   if (status is None or s == status) and (priority is None or p == priority))
+    
+    def cold_records(self) -> List[dict]:
+        """History records not in the store yet (needed to write a complete snapshot)"""
+        return [item for s, records in self._cold.items() for item in records[self._cold_pos[s]:]
+                if item["id"] in self._cold_keys]
+    
+    def _current_snapshot(self) -> Optional[str]:
+        """The newer of the JSON and binary snapshots, or None if there is neither"""
+        paths = [p for p in (self.snapshot_path, self.binary_path) if os.path.exists(p)]
+        return max(paths, key=os.path.getmtime) if paths else None
+    
+    def _load_records(self) -> Dict[str, dict]:
+        """id -> to_dict() record, or an ICEActivity when it came from a binary snapshot"""
+        records: Dict[str, dict] = {}
+        segments = self._segments()
+        has_journal = os.path.exists(self.journal_path)
+        snapshot = self._current_snapshot()
+        if snapshot == self.binary_path:
+            with open(snapshot, "rb") as f:
+                for activity in decode_snapshot(f.read()):
+                    records[activity.id] = activity
+        elif snapshot is not None:
+            with open(snapshot, "r", encoding="utf-8") as f:
+                for item in json.load(f):
+                    records[item["id"]] = item
+        elif not segments and not has_journal:
+            raise FileNotFoundError(self.snapshot_path)
+        
+        self._entries = 0
+        for path in segments + ([self.journal_path] if has_journal else []):
+            self._entries += self._replay(path, records)
+        if self.retention_days is not None:
+            self._apply_retention(records)
+        return records
+    
+    def _apply_retention(self, records: Dict[str, dict]):
+        """Archive expired history out of records, then snapshot what is left"""
+        cutoff = time.time() - self.retention_days * 86400
+        expired = []
+        for item in records.values():
+            if isinstance(item, ICEActivity):
+                item = item.to_dict() if item.status in HISTORY_STATUSES and item.ts < cutoff else None
+            elif (item["status"] not in HISTORY_STATUSES or
+                  datetime.datetime.fromisoformat(item["timestamp"]).timestamp() >= cutoff):
+                item = None
+            if item is not None:
+                expired.append(item)
+        if not expired:
+            return
+        # Archive first: a crash before the snapshot only leaves an extra copy in the cold segment
+        write_archive(self.snapshot_path, expired)
+        for item in expired:
+            del records[item["id"]]
+        # Journal the removals too, or compaction would merge the segments' copies back in
+        self.append(deleted_ids=[item["id"] for item in expired])
+        self.compact([item if isinstance(item, dict) else item.to_dict() for item in records.values()],
+                     background=False)
+    
+    @staticmethod
+    def _replay(path: str, records: Dict[str, dict]) -> int:
+        count = 0
+        good_bytes = 0
+        with open(path, "rb+") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn tail from a crash mid-append: cut it so new lines start clean
+                    f.truncate(good_bytes)
+                    break
+                good_bytes += len(line)
+                if entry["op"] == "put":
+                    records[entry["activity"]["id"]] = entry["activity"]
+                elif entry["op"] == "delete":
+                    records.pop(entry["id"], None)
+                count += 1
+        return count
+    
+    def append(self, records=(), deleted_ids=()):
+        """Append one journal line per changed record (to_dict() layout) or deleted id"""
+        lines = [json.dumps({"op": "put", "activity": record}) for record in records]
+        lines += [json.dumps({"op": "delete", "id": i}) for i in deleted_ids]
+        if not lines:
+            return
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.journal_path, "a", encoding="utf-8")
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+            self._entries += len(lines)
+            self._unsynced += len(lines)
+            if (self._unsynced >= self.fsync_every or
+                    time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync_locked()
+    
+    def sync(self):
+        """Force pending journal lines to disk"""
+        with self._lock:
+            self._sync_locked()
+    
+    def _sync_locked(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+    
+    def needs_compaction(self) -> bool:
+        return self._entries >= self.compact_after and not self.compacting
+    
+    @property
+    def compacting(self) -> bool:
+        return self._compactor is not None and self._compactor.is_alive()
+    
+    def compact(self, records: List[dict], background: bool = True):
+        """Write records (the full current state) as the new snapshot"""
+        with self._lock:
+            if self.compacting:
+                return
+            # Rotate the live journal so appends continue while the snapshot is written
+            if self._file is not None:
+                self._sync_locked()
+                self._file.close()
+                self._file = None
+            segments = self._segments()
+            if os.path.exists(self.journal_path):
+                next_index = int(segments[-1].rsplit(".", 1)[-1]) + 1 if segments else 1
+                rotated = f"{self.journal_path}.{next_index}"
+                os.replace(self.journal_path, rotated)
+                segments.append(rotated)
+            self._entries = 0
+        
+        if background:
+            self._compactor = threading.Thread(target=self._write_snapshot,
+                                               args=(records, segments), daemon=True)
+            self._compactor.start()
+        else:
+            self._write_snapshot(records, segments, raise_errors=True)
+    
+    @staticmethod
+    def _merge_segments(records: List[dict], segments: List[str]) -> List[dict]:
+        """records plus what the segments hold that records lacks
+        
+        Another process (the CLI) may have appended to the journal; its lines sit in
+        the rotated segments but not in this process's records, and would be lost
+        when the segments are unlinked. Newer versions from the segments win too.
+        """
+        journaled: Dict[str, Optional[dict]] = {}
+        for path in segments:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break  # torn tail
+                    if entry["op"] == "put":
+                        journaled[entry["activity"]["id"]] = entry["activity"]
+                    elif entry["op"] == "delete":
+                        journaled[entry["id"]] = None
+        if not journaled:
+            return records
+        records = list(records)
+        positions = {record["id"]: i for i, record in enumerate(records)}
+        for activity_id, record in journaled.items():
+            if record is None:
+                continue
+            i = positions.get(activity_id)
+            if i is None:
+                records.append(record)
+            elif record.get("version", 0) > records[i].get("version", 0):
+                records[i] = record
+        return records
+    
+    def _write_snapshot(self, records: List[dict], segments: List[str], raise_errors: bool = False):
+        try:
+            records = self._merge_segments(records, segments)
+            binary = self.snapshot_format == "binary"
+            path = self.binary_path if binary else self.snapshot_path
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb" if binary else "w", encoding=None if binary else "utf-8") as f:
+                if binary:
+                    f.write(encode_snapshot(records))
+                else:
+                    json.dump(records, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            for path in segments:
+                os.unlink(path)
+            self.compaction_error = None
+        except Exception as e:
+            # Segments are kept, so nothing is lost; the next compaction retries
+            self.compaction_error = e
+            if raise_errors:
+                raise
+    
+    def close(self):
+        """Flush the journal and wait for a running compaction"""
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            if self._file is not None:
+                self._sync_locked()
+                self._file.close()
+                self._file = None
+
+class PersistenceWorker:
+    """Background thread that coalesces storage writes off the Tk thread
+    
+    Changed records are collected per activity id; once the first pending change
+    is `window` seconds old they are written as one batch and synced. Snapshot
+    requests (full rewrites/compactions) run on the same thread, before the batch
+    of changes submitted after them.
+    Flush latency and failures are reported through the on_flush/on_error callbacks,
+    which are called on the worker thread.
+    """
+    
+    def __init__(self, storage, window: float = 0.5, on_flush=None, on_error=None):
+        self.storage = storage
+        self.window = window
+        self.on_flush = on_flush
+        self.on_error = on_error
+        self.last_latency: Optional[float] = None
+        self.last_error: Optional[Exception] = None
+        self._cond = threading.Condition()
+        self._pending: Dict[str, dict] = {}
+        self._deleted: set = set()
+        self._snapshot: Optional[List[dict]] = None
+        self._dirty_since: Optional[float] = None
+        self._flush_now = False
+        self._busy = False
+        self._stopped = False
+        self._errors = 0
+        self._thread = threading.Thread(target=self._run, name="ice-persistence", daemon=True)
+        self._thread.start()
+    
+    def submit(self, records=(), deleted_ids=()):
+        """Queue changed records and deleted ids; later changes to an id replace earlier ones"""
+        with self._cond:
+            for record in records:
+                self._pending[record["id"]] = record
+                self._deleted.discard(record["id"])
+            for activity_id in deleted_ids:
+                self._pending.pop(activity_id, None)
+                self._deleted.add(activity_id)
+            self._mark_dirty()
+    
+    def request_snapshot(self, records: list):
+        """Queue a full-state write; it replaces any snapshot not written yet
+        
+        records already contain every change submitted so far, so those pending
+        puts are dropped; pending deletes are still applied after the snapshot.
+        Items may be to_dict() records or ICEActivity objects, which are serialized
+        on the worker thread; an edit racing that is submitted as a put and so is
+        written after the snapshot.
+        """
+        with self._cond:
+            self._snapshot = records
+            self._pending = {}
+            self._mark_dirty()
+    
+    @property
+    def snapshot_pending(self) -> bool:
+        with self._cond:
+            return self._snapshot is not None
+    
+    def _mark_dirty(self):
+        if self._dirty_since is None:
+            self._dirty_since = time.monotonic()
+        self._cond.notify_all()
+    
+    @property
+    def dirty(self) -> bool:
+        with self._cond:
+            return self._dirty_since is not None or self._busy
+    
+    def flush(self, timeout: float = None) -> bool:
+        """Write everything pending now and wait for it; returns False on failure or timeout"""
+        with self._cond:
+            errors = self._errors
+            self._flush_now = True
+            self._cond.notify_all()
+            self._cond.wait_for(lambda: (self._dirty_since is None and not self._busy) or
+                                self._errors > errors, timeout)
+            return self._dirty_since is None and not self._busy
+    
+    def close(self, timeout: float = 10.0):
+        """Flush pending writes and stop the thread"""
+        self.flush(timeout)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+    
+    def _run(self):
+        while True:
+            with self._cond:
+                # Sleep until something is dirty and its coalescing window has passed
+                while not self._stopped:
+                    if self._dirty_since is not None:
+                        remaining = self._dirty_since + self.window - time.monotonic()
+                        if self._flush_now or remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._flush_now = False
+                        self._cond.wait()
+                if self._stopped and self._dirty_since is None:
+                    return
+                records, deleted, snapshot = list(self._pending.values()), list(self._deleted), self._snapshot
+                self._pending, self._deleted, self._snapshot = {}, set(), None
+                self._dirty_since = None
+                self._busy = True
+            
+            started = time.perf_counter()
+            try:
+                if snapshot is not None:
+                    self.storage.compact([item if isinstance(item, dict) else item.to_dict() for item in snapshot],
+                                         background=False)
+                if records or deleted:
+                    self.storage.append(records, deleted)
+                    self.storage.sync()
+                self.last_latency = time.perf_counter() - started
+                self.last_error = None
+                metrics.observe("save", self.last_latency)
+                metrics.incr("save.records", len(records) + len(deleted))
+                if snapshot is not None:
+                    metrics.incr("save.snapshots")
+                if self.on_flush:
+                    self.on_flush(self.last_latency, len(records) + len(deleted))
+            except Exception as e:
+                self.last_error = e
+                metrics.incr("save.errors")
+                with self._cond:
+                    self._errors += 1
+                    if not self._stopped:
+                        # Put the batch back unless newer changes superseded it; retried after the window
+                        for record in records:
+                            self._pending.setdefault(record["id"], record)
+                        self._deleted.update(i for i in deleted if i not in self._pending)
+                        if snapshot is not None and self._snapshot is None:
+                            self._snapshot = snapshot
+                        self._dirty_since = time.monotonic()
+                        self._flush_now = False
+                if self.on_error:
+                    self.on_error(e)
+            with self._cond:
+                self._busy = False
+                if self._dirty_since is None:
+                    self._flush_now = False
+                self._cond.notify_all()
+
+def open_storage(kind: str = "json", snapshot_format: str = "json", retention_days: float = None):
+    """Create the storage backend named by kind ("json" or "sqlite")
+    
+    snapshot_format ("json" or "binary") picks the journal's snapshot file format;
+    retention_days, if set, archives older Resolved/Closed activities at load.
+    """
+    if kind == "sqlite":
+        from .sqlite_storage import SQLiteActivityStorage  # sqlite3 is only imported when used
+        return SQLiteActivityStorage(retention_days=retention_days)
+    if kind == "json":
+        return ActivityJournal(snapshot_format=snapshot_format, retention_days=retention_days)
+    raise ValueError(f"Unknown storage backend: {kind}")
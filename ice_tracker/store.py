@@ -0,0 +1,220 @@
+"""In-memory activity store, incrementally maintained aggregates and the time index"""
+
+import bisect
+import heapq
+from typing import Dict, List, Optional
+
+from .models import OPEN_STATUSES, PRIORITIES, STATUSES, ICEActivity
+
+class ActivityStore:
+    """In-memory activity store indexed by id, status and priority"""
+
+    def __init__(self, activities=None):
+        self._by_id: Dict[str, ICEActivity] = {}
+        self._by_status: Dict[str, set] = {}
+        self._by_priority: Dict[str, set] = {}
+        self.version = 0  # bumped on every add, update and remove
+        self._listeners = []
+        for activity in activities or []:
+            self.add(activity)
+    
+    def add_listener(self, callback):
+        """Register callback(event, activity), called after every "add", "update" and "remove"
+        
+        Existing activities are replayed to the new listener as "add" events.
+        """
+        self._listeners.append(callback)
+        for activity in self._by_id.values():
+            callback("add", activity)
+    
+    def _notify(self, event: str, activity: ICEActivity):
+        for callback in self._listeners:
+            callback(event, activity)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        return iter(self._by_id.values())
+
+    def __contains__(self, activity_id):
+        return activity_id in self._by_id
+
+    def _index(self, activity: ICEActivity):
+        self._by_status.setdefault(activity.status, set()).add(activity.id)
+        self._by_priority.setdefault(activity.priority, set()).add(activity.id)
+
+    def _unindex(self, activity: ICEActivity):
+        self._by_status.get(activity.status, set()).discard(activity.id)
+        self._by_priority.get(activity.priority, set()).discard(activity.id)
+
+    def add(self, activity: ICEActivity) -> ICEActivity:
+        existing = self._by_id.get(activity.id)
+        if existing is not None:
+            self._unindex(existing)
+        self._by_id[activity.id] = activity
+        self._index(activity)
+        self.version += 1
+        self._notify("add", activity)
+        return activity
+
+    def get(self, activity_id: str) -> Optional[ICEActivity]:
+        return self._by_id.get(activity_id)
+
+    def update(self, activity_id: str, **changes) -> Optional[ICEActivity]:
+        """Apply attribute changes and keep the secondary indexes in sync"""
+        activity = self._by_id.get(activity_id)
+        if activity is None:
+            return None
+        self._unindex(activity)
+        for name, value in changes.items():
+            setattr(activity, name, value)
+        self._index(activity)
+        activity.version += 1
+        self.version += 1
+        self._notify("update", activity)
+        return activity
+
+    def remove(self, activity_id: str) -> Optional[ICEActivity]:
+        activity = self._by_id.pop(activity_id, None)
+        if activity is not None:
+            self._unindex(activity)
+            self.version += 1
+            self._notify("remove", activity)
+        return activity
+
+    def count(self, status: str = None, priority: str = None) -> int:
+        if status is None and priority is None:
+            return len(self._by_id)
+        return len(self._ids(status, priority))
+
+    def filter(self, status: str = None, priority: str = None) -> List[ICEActivity]:
+        """Return activities matching the given status and/or priority"""
+        if status is None and priority is None:
+            return list(self._by_id.values())
+        return [self._by_id[i] for i in self._ids(status, priority)]
+
+    def _ids(self, status, priority) -> set:
+        if status is not None and priority is not None:
+            by_status = self._by_status.get(status, set())
+            by_priority = self._by_priority.get(priority, set())
+            # Intersect starting from the smaller set
+            if len(by_status) > len(by_priority):
+                by_status, by_priority = by_priority, by_status
+            return by_status & by_priority
+        if status is not None:
+            return self._by_status.get(status, set())
+        return self._by_priority.get(priority, set())
+
+class ActivityAggregates:
+    """Status x priority counts kept current in O(1) per change
+    
+    Feed it through ActivityStore.add_listener; every count, total and the
+    critical-and-open figure is read from at most 16 cells.
+    """
+    
+    def __init__(self):
+        self._cells: Dict[tuple, int] = {}  # (status, priority) -> count
+        self._keys: Dict[str, tuple] = {}  # id -> (status, priority) as last counted
+    
+    @classmethod
+    def from_activities(cls, activities) -> "ActivityAggregates":
+        """One-pass aggregates for a plain list of activities"""
+        aggregates = cls()
+        for activity in activities:
+            aggregates.on_change("add", activity)
+        return aggregates
+    
+    def on_change(self, event: str, activity: ICEActivity):
+        """ActivityStore listener"""
+        old = self._keys.pop(activity.id, None)
+        if old is not None:
+            self._cells[old] -= 1
+        if event != "remove":
+            key = (activity.status, activity.priority)
+            self._keys[activity.id] = key
+            self._cells[key] = self._cells.get(key, 0) + 1
+    
+    @property
+    def total(self) -> int:
+        return len(self._keys)
+    
+    def count(self, status: str = None, priority: str = None) -> int:
+        if status is None and priority is None:
+            return len(self._keys)
+        return sum(n for (s, p), n in self._cells.items()
+                   if (status is None or s == status) and (priority is None or p == priority))
+    
+    def by_status(self) -> Dict[str, int]:
+        return {status: self.count(status=status) for status in STATUSES}
+    
+    def by_priority(self) -> Dict[str, int]:
+        return {priority: self.count(priority=priority) for priority in PRIORITIES}
+    
+    def crosstab(self) -> Dict[str, Dict[str, int]]:
+        """status -> priority -> count"""
+        return {status: {priority: self._cells.get((status, priority), 0) for priority in PRIORITIES}
+                for status in STATUSES}
+    
+    @property
+    def critical_open(self) -> int:
+        """Critical activities that are Active or In Progress"""
+        return sum(self._cells.get((status, "Critical"), 0) for status in OPEN_STATUSES)
+
+class TimeIndex:
+    """Activity ids ordered by timestamp, kept in one bisect-maintained list per priority
+    
+    Feed it through ActivityStore.add_listener. A time-window query costs
+    O(log n + k), and the list's (priority, time) order is a concatenation of
+    per-priority runs, so nothing has to be re-sorted on refresh.
+    """
+    
+    def __init__(self):
+        self._lists: Dict[str, list] = {}  # priority -> [(ts, id)] ascending
+        self._keys: Dict[str, tuple] = {}  # id -> (priority, ts) as last indexed
+    
+    def __len__(self):
+        return len(self._keys)
+    
+    def on_change(self, event: str, activity: ICEActivity):
+        """ActivityStore listener"""
+        key = None if event == "remove" else (activity.priority, activity.ts)
+        old = self._keys.get(activity.id)
+        if old == key:
+            return
+        if old is not None:
+            entries = self._lists[old[0]]
+            del entries[bisect.bisect_left(entries, (old[1], activity.id))]
+            del self._keys[activity.id]
+        if key is not None:
+            bisect.insort(self._lists.setdefault(key[0], []), (key[1], activity.id))
+            self._keys[activity.id] = key
+    
+    def priorities(self) -> List[str]:
+        return [priority for priority, entries in self._lists.items() if entries]
+    
+    def range(self, since: float = None, until: float = None, priority: str = None) -> List[str]:
+        """Ids with since <= ts < until (epoch seconds), oldest first"""
+        if priority is not None:
+            return [i for _, i in self._slice(self._lists.get(priority, []), since, until)]
+        runs = [self._slice(entries, since, until) for entries in self._lists.values()]
+        return [i for _, i in heapq.merge(*runs)]
+    
+    def count(self, since: float = None, until: float = None, priority: str = None) -> int:
+        lists = [self._lists.get(priority, [])] if priority is not None else self._lists.values()
+        total = 0
+        for entries in lists:
+            lo, hi = self._bounds(entries, since, until)
+            total += hi - lo
+        return total
+    
+    @staticmethod
+    def _bounds(entries: list, since: float = None, until: float = None) -> tuple:
+        lo = 0 if since is None else bisect.bisect_left(entries, (since,))
+        hi = len(entries) if until is None else bisect.bisect_left(entries, (until,))
+        return lo, max(lo, hi)
+    
+    @classmethod
+    def _slice(cls, entries: list, since: float = None, until: float = None) -> list:
+        lo, hi = cls._bounds(entries, since, until)
+        return entries[lo:hi]
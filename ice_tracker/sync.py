@@ -0,0 +1,542 @@
+"""Shared activity store for several stations: HTTP sync server, client and station binding"""
+
+import collections
+import contextlib
+import json
+import queue
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import metrics
+from .models import ICEActivity
+
+class SyncConflict(Exception):
+    """A write was based on a version the server no longer has; current is the server's record"""
+    
+    def __init__(self, current: Optional[dict]):
+        super().__init__("activity was changed at another station")
+        self.current = current
+
+def normalize_record(record) -> dict:
+    """to_dict() form of a client-supplied record; raises ValueError if it is not one"""
+    try:
+        return ICEActivity.from_dict(record).to_dict()
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        raise ValueError(f"invalid activity record: {e!r}")
+
+class SyncStore:
+    """Authoritative records with per-activity versions and a change sequence
+    
+    Every accepted write gets the next sequence number, and the change log keeps
+    each id at its latest sequence (deletions as tombstones), ordered by it, so
+    changes(since) walks back from the newest entry and costs O(changes).
+    Writes must name the version they were based on: a replace or delete whose
+    base_version is not the stored version raises SyncConflict. Records are
+    persisted through an ActivityJournal-style storage (append + sync).
+    
+    server_id is new on every start, since sequence numbers are not persisted;
+    a client that sees it change pulls everything again from since=0.
+    """
+    
+    def __init__(self, storage=None):
+        self.server_id = uuid.uuid4().hex
+        self.storage = storage
+        self.seq = 0
+        self._records: Dict[str, dict] = {}
+        self._log: "collections.OrderedDict[str, int]" = collections.OrderedDict()  # id -> seq, ascending
+        self._lock = threading.Lock()
+        if storage is not None:
+            try:
+                loaded = storage.load()
+            except FileNotFoundError:
+                loaded = []
+            for activity in loaded:
+                self._record_change(activity.id, activity.to_dict())
+    
+    def __len__(self):
+        return len(self._records)
+    
+    def _record_change(self, activity_id: str, record: Optional[dict]) -> int:
+        self.seq += 1
+        if record is None:
+            self._records.pop(activity_id, None)
+        else:
+            self._records[activity_id] = record
+        self._log[activity_id] = self.seq
+        self._log.move_to_end(activity_id)
+        return self.seq
+    
+    def _persist(self, records=(), deleted_ids=()):
+        if self.storage is None:
+            return
+        self.storage.append(records, deleted_ids)
+        self.storage.sync()
+        if self.storage.needs_compaction():
+            self.storage.compact(list(self._records.values()))
+    
+    def get(self, activity_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._records.get(activity_id)
+    
+    def changes(self, since: int = 0, limit: int = 5000) -> Dict:
+        """Changes after sequence since, oldest first; "more" is set when limit cut them short
+        
+        Each change is {"seq", "id", "record"}, with record None for a deletion.
+        Continue from the returned "seq" until "more" is false.
+        """
+        with self._lock:
+            newer = []
+            for activity_id, seq in reversed(self._log.items()):
+                if seq <= since:
+                    break
+                newer.append((seq, activity_id))
+            newer.reverse()
+            more = len(newer) > limit
+            newer = newer[:limit]
+            # Tombstones are kept even from 0: a station that last saw an empty store must
+            # still hear about deletions, and a joining one must not re-push deleted ids
+            changes = [{"seq": seq, "id": activity_id, "record": self._records.get(activity_id)}
+                       for seq, activity_id in newer]
+            return {
+                "server": self.server_id,
+                "seq": newer[-1][0] if more else self.seq,
+                "more": more,
+                "changes": changes
+            }
+    
+    def create(self, records: List[dict]) -> Tuple[List[dict], List[dict]]:
+        """Add new activities; returns (created, current records of ids that already existed)"""
+        records = [normalize_record(record) for record in records]
+        created, conflicts = [], []
+        with self._lock:
+            for record in records:
+                current = self._records.get(record["id"])
+                if current is not None:
+                    conflicts.append(current)
+                    continue
+                self._record_change(record["id"], record)
+                created.append(record)
+            self._persist(created)
+        return created, conflicts
+    
+    def replace(self, activity_id: str, base_version: int, record: dict) -> dict:
+        """Store record as the next version of activity_id if base_version is still current"""
+        record = normalize_record(record)
+        if record["id"] != activity_id:
+            raise ValueError("record id does not match the URL")
+        with self._lock:
+            current = self._records.get(activity_id)
+            if current is None:
+                raise KeyError(activity_id)
+            if current["version"] != base_version:
+                raise SyncConflict(current)
+            record["version"] = base_version + 1
+            self._record_change(activity_id, record)
+            self._persist([record])
+        return record
+    
+    def delete(self, activity_id: str, base_version: int):
+        with self._lock:
+            current = self._records.get(activity_id)
+            if current is None:
+                raise KeyError(activity_id)
+            if current["version"] != base_version:
+                raise SyncConflict(current)
+            self._record_change(activity_id, None)
+            self._persist(deleted_ids=[activity_id])
+    
+    def close(self):
+        if self.storage is not None:
+            self.storage.close()
+
+class SyncServer:
+    """Local-network HTTP API over a SyncStore
+    
+    GET    /status                      {"server", "seq", "activities"}
+    GET    /changes?since=N&limit=M      incremental changes (see SyncStore.changes)
+    GET    /activities/<id>             one record
+    POST   /activities                  a record or a list of records; 201, or 409 with "conflicts"
+    PUT    /activities/<id>             {"base_version": v, "record": {...}}; 409 with "current"
+    DELETE /activities/<id>?base_version=v
+    """
+    
+    def __init__(self, store: SyncStore, host: str = "127.0.0.1", port: int = 8765):
+        self.store = store
+        self.host = host
+        self.port = port
+        self._httpd: Optional[ThreadingHTTPServer] = None
+    
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self._httpd.server_address[1]}/"
+    
+    def start(self, block: bool = False):
+        store = self.store
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # keep the console quiet
+            
+            def _route(self):
+                parts = urllib.parse.urlsplit(self.path)
+                return parts.path.rstrip("/"), urllib.parse.parse_qs(parts.query)
+            
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"null")
+            
+            def _send(self, code: int, data):
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def _handle(self, method: str):
+                path, query = self._route()
+                activity_id = path[len("/activities/"):] if path.startswith("/activities/") else None
+                try:
+                    with metrics.timer(f"sync.{method.lower()}"):
+                        if method == "GET" and path == "/status":
+                            self._send(200, {"server": store.server_id, "seq": store.seq, "activities": len(store)})
+                        elif method == "GET" and path == "/changes":
+                            self._send(200, store.changes(int(query.get("since", ["0"])[0]),
+                                                          int(query.get("limit", ["5000"])[0])))
+                        elif method == "GET" and activity_id:
+                            record = store.get(activity_id)
+                            self._send(200 if record else 404, record or {"error": "not found"})
+                        elif method == "POST" and path == "/activities":
+                            body = self._body()
+                            created, conflicts = store.create(body if isinstance(body, list) else [body])
+                            self._send(409 if conflicts else 201,
+                                       {"seq": store.seq, "created": created, "conflicts": conflicts})
+                        elif method == "PUT" and activity_id:
+                            body = self._body()
+                            record = store.replace(activity_id, int(body["base_version"]), body["record"])
+                            self._send(200, {"seq": store.seq, "record": record})
+                        elif method == "DELETE" and activity_id:
+                            store.delete(activity_id, int(query["base_version"][0]))
+                            self._send(200, {"seq": store.seq})
+                        else:
+                            self._send(404, {"error": "not found"})
+                except SyncConflict as e:
+                    self._send(409, {"error": "conflict", "current": e.current})
+                except KeyError:
+                    self._send(404, {"error": "not found"})
+                except (ValueError, TypeError) as e:
+                    self._send(400, {"error": str(e)})
+            
+            def do_GET(self):
+                self._handle("GET")
+            
+            def do_POST(self):
+                self._handle("POST")
+            
+            def do_PUT(self):
+                self._handle("PUT")
+            
+            def do_DELETE(self):
+                self._handle("DELETE")
+        
+        self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._httpd.daemon_threads = True
+        if block:
+            self._httpd.serve_forever()
+        else:
+            threading.Thread(target=self._httpd.serve_forever, name="ice-sync-server", daemon=True).start()
+    
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+class SyncClient:
+    """Blocking JSON client for SyncServer; raises SyncConflict on 409, KeyError on 404, OSError otherwise"""
+    
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+    
+    def _request(self, method: str, path: str, body=None):
+        data = None if body is None else json.dumps(body).encode("utf-8")
+        request = urllib.request.Request(self.url + path, data=data, method=method,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read() or b"null")
+        except urllib.error.HTTPError as e:
+            if e.code in (404, 409):
+                payload = json.loads(e.read() or b"null") or {}
+                if e.code == 404:
+                    raise KeyError(path)
+                if "conflicts" in payload:  # batch create
+                    return payload
+                raise SyncConflict(payload.get("current"))
+            raise
+    
+    def status(self) -> Dict:
+        return self._request("GET", "/status")
+    
+    def changes(self, since: int = 0, limit: int = 5000) -> Dict:
+        return self._request("GET", f"/changes?since={since}&limit={limit}")
+    
+    def create(self, records: List[dict]) -> Dict:
+        """{"created": [...], "conflicts": [server records of ids that already existed]}"""
+        return self._request("POST", "/activities", records)
+    
+    def replace(self, record: dict, base_version: int) -> dict:
+        path = "/activities/" + urllib.parse.quote(record["id"], safe="")
+        return self._request("PUT", path, {"base_version": base_version, "record": record})["record"]
+    
+    def delete(self, activity_id: str, base_version: int):
+        self._request("DELETE", f"/activities/{urllib.parse.quote(activity_id, safe='')}?base_version={base_version}")
+
+class StationSync:
+    """Keeps a station's ActivityStore in step with a SyncServer
+    
+    Local changes are picked up through ActivityStore.add_listener and pushed
+    in order by a writer thread (consecutive new activities in one batch), each
+    update carrying the version it was based on. A poller thread pulls only the
+    changes since the last sequence it saw. Everything that touches the store
+    runs through dispatch(fn, *args), which must call fn on the store's own
+    thread (root.after in the GUI). On a conflict the server's record replaces
+    the local one and on_conflict(record) is told; on_applied(changed, removed_ids)
+    follows every applied batch of remote changes, and on_status(online)
+    follows connectivity changes.
+    
+    Store changes made inside quiet() (loading, paging history in, applying
+    remote changes) are not pushed.
+    """
+    
+    BATCH_SIZE = 500
+    
+    def __init__(self, store, client: SyncClient, dispatch, interval: float = 2.0,
+                 on_applied=None, on_conflict=None, on_status=None):
+        self.store = store
+        self.client = client
+        self.dispatch = dispatch
+        self.interval = interval
+        self.on_applied = on_applied
+        self.on_conflict = on_conflict
+        self.on_status = on_status
+        self.server_id: Optional[str] = None
+        self.seq = 0
+        self.online: Optional[bool] = None
+        self._quiet = 0
+        self._outbox: "queue.Queue" = queue.Queue()
+        self._generation: Dict[str, int] = {}  # id -> conflicts seen; older queued writes are dropped
+        self._queued_creates = set()  # ids whose create was queued since start()
+        self._deleted = set()  # ids the server has deleted
+        # id -> newest version the server is known to hold; the local version counter also
+        # counts this station's own edits, which the server may yet reject
+        self._server_versions: Dict[str, int] = {}
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+    
+    @contextlib.contextmanager
+    def quiet(self):
+        self._quiet += 1
+        try:
+            yield
+        finally:
+            self._quiet -= 1
+    
+    def start(self):
+        with self.quiet():  # existing activities are replayed as "add"; they are not new
+            self.store.add_listener(self.on_change)
+        for target, name in ((self._push_loop, "ice-sync-push"), (self._poll_loop, "ice-sync-poll")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def stop(self, timeout: float = 5.0):
+        """Stop polling; writes still queued get timeout seconds to reach the server"""
+        self._stopped.set()
+        self._outbox.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+    
+    def on_change(self, event: str, activity: ICEActivity):
+        """ActivityStore listener: queue a local change for the server"""
+        if self._quiet:
+            return
+        generation = self._generation.get(activity.id, 0)
+        if event == "remove":
+            self._outbox.put(("delete", activity.id, activity.version, None, generation))
+        elif event == "add":
+            self._queued_creates.add(activity.id)
+            self._outbox.put(("create", activity.id, None, activity.to_dict(), generation))
+        else:
+            self._outbox.put(("replace", activity.id, activity.version - 1, activity.to_dict(), generation))
+    
+    def _set_online(self, online: bool):
+        if online != self.online:
+            self.online = online
+            if self.on_status:
+                self.dispatch(self.on_status, online)
+    
+    def _push_loop(self):
+        pending: collections.deque = collections.deque()
+        while True:
+            if not pending:
+                item = self._outbox.get()
+                if item is None:
+                    return
+                pending.append(item)
+            while len(pending) < self.BATCH_SIZE:
+                try:
+                    item = self._outbox.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._stopped.set()
+                    break
+                pending.append(item)
+            try:
+                self._push(pending)
+                self._set_online(True)
+            except urllib.error.HTTPError:
+                pending.popleft()  # the server rejected it outright; retrying cannot help
+            except OSError:
+                self._set_online(False)
+                if self._stopped.wait(self.interval):
+                    return
+            if self._stopped.is_set() and not pending and self._outbox.empty():
+                return
+    
+    def _push(self, pending: collections.deque):
+        """Send the writes at the head of pending, removing each once the server has it"""
+        while pending and pending[0][4] < self._generation.get(pending[0][1], 0):
+            pending.popleft()  # made before a conflict on this activity was resolved
+        if not pending:
+            return
+        op, activity_id, base_version, record, _ = pending[0]
+        if op == "create":
+            batch = []
+            for item in pending:
+                if item[0] != "create" or len(batch) == self.BATCH_SIZE:
+                    break
+                batch.append(item[3])
+            response = self.client.create(batch)
+            # Only dropped once the server has them, so an unreachable server keeps them queued
+            for _ in batch:
+                pending.popleft()
+            for created in response.get("created", []):
+                self._acknowledge(created["id"], created["version"])
+            sent = {record["id"]: record for record in batch}
+            for current in response.get("conflicts", []):
+                if current != sent[current["id"]]:  # not just a resend of what the server already has
+                    self._conflict(current["id"], current)
+            return
+        try:
+            if op == "replace":
+                self._acknowledge(activity_id, self.client.replace(record, base_version)["version"])
+            else:
+                self.client.delete(activity_id, base_version)
+                self._deleted.add(activity_id)
+        except SyncConflict as e:
+            self._conflict(activity_id, e.current)
+        except KeyError:
+            if op == "replace":  # not on the server (never pushed, or lost): offer it as new
+                pending[0] = ("create", activity_id, None, record, pending[0][4])
+                return
+        pending.popleft()
+    
+    def _acknowledge(self, activity_id: str, version: int):
+        if version > self._server_versions.get(activity_id, -1):
+            self._server_versions[activity_id] = version
+    
+    def _conflict(self, activity_id: str, current: Optional[dict]):
+        self._generation[activity_id] = self._generation.get(activity_id, 0) + 1
+        metrics.incr("sync.conflicts")
+        self.dispatch(self._apply_conflict, activity_id, current)
+    
+    def _poll_loop(self):
+        while not self._stopped.is_set():
+            try:
+                self.pull()
+                self._set_online(True)
+            except OSError:
+                self._set_online(False)
+            self._stopped.wait(self.interval)
+    
+    def pull(self):
+        """Fetch every change since the last pull and hand them to the store's thread"""
+        with metrics.timer("sync.pull"):
+            changes = []
+            initial = False
+            while True:
+                response = self.client.changes(self.seq)
+                if response["server"] != self.server_id:
+                    # First pull, or the server restarted: its sequence numbers start over
+                    self.server_id, self.seq, changes, initial = response["server"], 0, [], True
+                    response = self.client.changes(0)
+                changes += response["changes"]
+                self.seq = response["seq"]
+                if not response["more"]:
+                    break
+        if changes or initial:
+            self.dispatch(self._apply_changes, changes, initial)
+    
+    def _apply_changes(self, changes: List[dict], initial: bool = False):
+        """Runs on the store's thread; remote records replace older ones
+        
+        Versions are compared with what the server last acknowledged, not the local
+        counter, so local edits the server has not accepted never hide a newer record.
+        """
+        changed, removed = [], []
+        with self.quiet():
+            for change in changes:
+                activity_id, record = change["id"], change["record"]
+                local = self.store.get(activity_id)
+                if record is None:
+                    self._deleted.add(activity_id)
+                    if local is not None:
+                        self.store.remove(activity_id)
+                        removed.append(activity_id)
+                    continue
+                known = self._server_versions.get(activity_id, local.version if local is not None else -1)
+                self._acknowledge(activity_id, record["version"])
+                if local is None or record["version"] > known:
+                    changed.append(self.store.add(ICEActivity.from_dict(record)))
+        if initial:
+            # Activities the server has never seen (e.g. from before this station joined) go
+            # to it; deleted ones were removed above, and ones added since start() are queued
+            on_server = {change["id"] for change in changes}
+            for activity in list(self.store):
+                if activity.id not in on_server and activity.id not in self._queued_creates:
+                    self.on_change("add", activity)
+        if (changed or removed) and self.on_applied:
+            self.on_applied(changed, removed)
+    
+    def _apply_conflict(self, activity_id: str, current: Optional[dict]):
+        """Runs on the store's thread: the server's version replaces the rejected local edit
+        
+        A pull may already have applied something newer than current (a deletion, or a
+        later version), which is then kept; the conflict is reported either way.
+        """
+        if current is not None and (activity_id in self._deleted or
+                                    self._server_versions.get(activity_id, -1) > current["version"]):
+            if self.on_conflict:
+                self.on_conflict(current)
+            return
+        if current is not None:
+            self._acknowledge(activity_id, current["version"])
+        with self.quiet():
+            if current is None:
+                if self.store.remove(activity_id) is not None and self.on_applied:
+                    self.on_applied([], [activity_id])
+            else:
+                activity = self.store.add(ICEActivity.from_dict(current))
+                if self.on_applied:
+                    self.on_applied([activity], [])
+        if self.on_conflict:
+            self.on_conflict(current)
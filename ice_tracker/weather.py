@@ -0,0 +1,91 @@
+"""Weather lookups behind a pooled, cached service"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .geocoding import GeocodeCache
+from .metrics import metrics
+
+class WeatherAPI:
+    """Mock weather API - replace with actual weather service"""
+    
+    @staticmethod
+    def get_weather(location: str) -> Dict:
+        # Simulated weather data - replace with actual API calls
+        import random
+        conditions = ["Clear", "Cloudy", "Rainy", "Stormy", "Snowy"]
+        return {
+            "location": location,
+            "temperature": random.randint(-10, 35),
+            "condition": random.choice(conditions),
+            "wind_speed": random.randint(0, 50),
+            "visibility": random.randint(1, 10)
+        }
+
+class WeatherService:
+    """Bounded worker pool in front of WeatherAPI with a per-location TTL cache
+    
+    Concurrent requests for the same location share one in-flight future, and
+    fresh cached results come back as already-completed futures.
+    """
+    
+    def __init__(self, api=None, max_workers: int = 4, ttl: float = 600):
+        self.api = api or WeatherAPI()
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ice-weather")
+        self._cache: Dict[str, tuple] = {}  # key -> (fetched_at, weather)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(location: str) -> str:
+        return GeocodeCache.normalize(location)
+    
+    def get_cached(self, location: str) -> Optional[Dict]:
+        """Fresh cached weather for location, or None"""
+        entry = self._cache.get(self._key(location))
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+    
+    def fetch(self, location: str) -> Future:
+        """Future resolving to the weather for location"""
+        key = self._key(location)
+        with self._lock:
+            cached = self.get_cached(location)
+            if cached is not None:
+                metrics.incr("weather.cache_hits")
+                future = Future()
+                future.set_result(cached)
+                return future
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._executor.submit(self._fetch, key, location)
+                self._inflight[key] = future
+            return future
+    
+    def _fetch(self, key: str, location: str) -> Dict:
+        try:
+            with metrics.timer("weather"):
+                weather = self.api.get_weather(location)
+            self._cache[key] = (time.monotonic(), weather)
+            return weather
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+    
+    def prefetch(self, locations) -> List[Future]:
+        """Warm the cache for many locations; one request per distinct location"""
+        seen = set()
+        futures = []
+        for location in locations:
+            key = self._key(location)
+            if key not in seen:
+                seen.add(key)
+                futures.append(self.fetch(location))
+        return futures
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,64 @@
+"""Duplicate report detection and merging"""
+
+from ice_tracker.dedup import DuplicateDetector, geohash, geohash_cell_size, merge_into
+from ice_tracker.models import ICEActivity
+from ice_tracker.store import ActivityStore
+
+def make_report(activity_type: str = "Fire Emergency", lat: float = 40.7128, lng: float = -74.0060,
+                ts: float = 1_000_000.0, **fields) -> ICEActivity:
+    activity = ICEActivity()
+    activity.activity_type = activity_type
+    activity.location = "Main St & 1st"
+    activity.lat, activity.lng, activity.ts = lat, lng, ts
+    for name, value in fields.items():
+        setattr(activity, name, value)
+    return activity
+
+def make_store(*activities):
+    store = ActivityStore()
+    detector = DuplicateDetector()
+    store.add_listener(detector.on_change)
+    for activity in activities:
+        store.add(activity)
+    return store, detector
+
+def test_geohash_matches_the_reference_encoding():
+    assert geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geohash(40.7128, -74.0060, 6) == "dr5reg"
+
+def test_nearby_report_of_the_same_event_is_a_duplicate():
+    original = make_report(description="Kitchen fire on the second floor")
+    store, detector = make_store(original)
+    report = make_report("fire emergency", lat=40.7138, ts=original.ts + 600,
+                         description="Second floor kitchen fire")
+    assert detector.best_match(report) == original.id
+    
+    # Too far away, too late, or a different kind of event
+    assert detector.find_duplicates(make_report(lat=40.7228)) == []
+    assert detector.find_duplicates(make_report(ts=original.ts + 3600)) == []
+    assert detector.find_duplicates(make_report("Traffic Accident", description="Two cars")) == []
+
+def test_matches_across_a_cell_edge_and_only_while_open():
+    # Two points a few meters apart on either side of a geohash cell boundary
+    cell_lng = geohash_cell_size(6)[1]
+    edge = -180 + (-74.0060 + 180) // cell_lng * cell_lng
+    west = make_report(lng=edge - 2e-5)
+    store, detector = make_store(west)
+    east = make_report(lng=edge + 2e-5)
+    assert geohash(west.lat, west.lng) != geohash(east.lat, east.lng)
+    assert detector.best_match(east) == west.id
+    
+    store.update(west.id, status="Resolved")
+    assert detector.best_match(east) is None and len(detector) == 0
+
+def test_merge_into_keeps_the_union_and_removes_the_report():
+    target = make_report(priority="Medium", assigned_personnel=["EMT"], description="Smoke visible")
+    report = make_report(priority="Critical", ts=target.ts - 60, assigned_personnel=["EMT", "Fire Station 1"],
+                         alert_radius=2500, description="Flames through the roof")
+    store, detector = make_store(target, report)
+    merged = merge_into(store, target.id, report)
+    assert merged is target and report.id not in store and len(detector) == 1
+    assert merged.priority == "Critical" and merged.alert_radius == 2500 and merged.ts == report.ts
+    assert merged.assigned_personnel == ["EMT", "Fire Station 1"]
+    assert merged.description == "Smoke visible\n[+] Flames through the roof"
+    assert merge_into(store, "missing", report) is None
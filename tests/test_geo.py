@@ -0,0 +1,57 @@
+"""Great-circle distance and the grid spatial index"""
+
+import pytest
+
+from ice_tracker.geo import SpatialIndex, haversine_m
+from ice_tracker.models import ICEActivity
+from ice_tracker.store import ActivityStore
+
+def make_activity(lat: float, lng: float, alert_radius: float = 1000, **fields) -> ICEActivity:
+    activity = ICEActivity()
+    activity.activity_type = "Checkpoint"
+    activity.lat, activity.lng, activity.alert_radius = lat, lng, alert_radius
+    for name, value in fields.items():
+        setattr(activity, name, value)
+    return activity
+
+def brute_force_within(activities, lat: float, lng: float, radius_m: float) -> set:
+    return {a.id for a in activities if haversine_m(lat, lng, a.lat, a.lng) <= radius_m}
+
+def test_haversine_known_distances():
+    assert haversine_m(0, 0, 0, 0) == 0
+    assert haversine_m(0, 0, 1, 0) == pytest.approx(111195, rel=1e-4)
+    # New York to Los Angeles
+    assert haversine_m(40.7128, -74.0060, 34.0522, -118.2437) == pytest.approx(3935746, rel=1e-3)
+
+def test_within_matches_a_brute_force_scan():
+    activities = [make_activity(40.70 + (n % 10) * 0.004, -74.02 + (n // 10) * 0.004) for n in range(100)]
+    index = SpatialIndex()
+    store = ActivityStore()
+    store.add_listener(index.on_change)
+    for activity in activities:
+        store.add(activity)
+    for lat, lng, radius in [(40.72, -74.0, 500), (40.71, -74.01, 2500), (40.0, -75.0, 1000), (40.72, -74.0, 500000)]:
+        results = index.within(lat, lng, radius)
+        assert {i for i, _ in results} == brute_force_within(activities, lat, lng, radius)
+        distances = [d for _, d in results]
+        assert distances == sorted(distances)
+
+def test_covering_uses_each_alert_radius_and_follows_moves():
+    small = make_activity(40.7128, -74.0060, alert_radius=200, priority="Critical")
+    large = make_activity(40.7300, -74.0060, alert_radius=5000, priority="High", status="Closed")
+    store = ActivityStore()
+    index = SpatialIndex()
+    store.add_listener(index.on_change)
+    store.add(small)
+    store.add(large)
+    point = (40.7150, -74.0060)  # ~245 m from small, ~1.7 km from large
+    assert [i for i, _ in index.covering(*point)] == [large.id]
+    assert index.covering(*point, statuses=["Active"]) == []
+    
+    store.update(small.id, alert_radius=300)
+    assert [i for i, _ in index.covering(*point, priorities=["Critical"])] == [small.id]
+    
+    store.update(small.id, coordinates={"lat": 41.0, "lng": -74.0})
+    assert [i for i, _ in index.within(*point, 1000)] == []
+    store.remove(large.id)
+    assert index.covering(*point) == [] and len(index) == 1
@@ -0,0 +1,69 @@
+"""Streaming bulk import of CSV and JSONL reports"""
+
+import json
+import threading
+
+import pytest
+
+from ice_tracker.geocoding import CachedLocationAPI, GeocodeCache
+from ice_tracker.ingest import import_reports, validate_row
+
+class CountingGeocoder:
+    """Deterministic stand-in for LocationAPI that records every address it is asked for"""
+    
+    def __init__(self):
+        self.addresses = []
+        self._lock = threading.Lock()
+    
+    def geocode(self, address: str) -> dict:
+        with self._lock:
+            self.addresses.append(address)
+        return {"lat": 34.0, "lng": -118.0, "formatted_address": address}
+
+@pytest.fixture
+def location_api(tmp_path):
+    api = CachedLocationAPI(CountingGeocoder(), GeocodeCache(str(tmp_path / "geocode.db")))
+    yield api
+    api.cache.close()
+
+def test_validate_row_aliases_and_rejections():
+    activity = validate_row({"Type": "Flooding", "location": "Harbor Rd", "priority": "high",
+                             "personnel": "EMT, Fire Station 1", "latitude": "40.5", "lon": "-74.1"})
+    assert (activity.activity_type, activity.priority) == ("Flooding", "High")
+    assert activity.assigned_personnel == ["EMT", "Fire Station 1"]
+    assert (activity.lat, activity.lng) == (40.5, -74.1)
+    for row, message in [({"type": "Flooding"}, "required"),
+                         ({"type": "Flooding", "location": "x", "priority": "urgent"}, "priority"),
+                         ({"type": "Flooding", "location": "x", "radius": "50"}, "radius"),
+                         ({"type": "Flooding", "location": "x", "lat": "north"}, "lat/lng"),
+                         ("not json", "JSON object")]:
+        with pytest.raises(ValueError, match=message):
+            validate_row(row)
+
+def test_csv_import_reports_errors_and_geocodes_each_address_once(tmp_path, location_api):
+    path = tmp_path / "reports.csv"
+    path.write_text("type,location,priority,lat,lng\n"
+                    "Flooding,100 Main Street,High,,\n"
+                    "Flooding,100 main st,Low,,\n"  # same address once normalized
+                    ",Harbor Rd,Low,,\n"
+                    "Checkpoint,Harbor Rd,Medium,40.5,-74.1\n", encoding="utf-8")
+    done = []
+    activities, stats = import_reports(str(path), location_api, batch_size=2, progress=done.append)
+    assert stats["rows"] == 4 and stats["imported"] == 3
+    assert stats["errors"] == [(4, "type and location are required")]
+    assert done == [2, 4]
+    assert location_api.backend.addresses == ["100 Main Street"]
+    assert [(a.lat, a.lng) for a in activities] == [(34.0, -118.0), (34.0, -118.0), (40.5, -74.1)]
+
+def test_jsonl_import_skips_blank_lines_and_rejects_bad_json(tmp_path, location_api):
+    path = tmp_path / "reports.jsonl"
+    rows = [json.dumps({"activity_type": "Gas Leak", "location": "Elm St", "coordinates": {"lat": 1.0, "lng": 2.0}}),
+            "",
+            "{not json",
+            json.dumps({"activity_type": "Checkpoint", "location": "Oak Ave", "status": "closed"})]
+    path.write_text("\n".join(rows) + "\n", encoding="utf-8")
+    activities, stats = import_reports(str(path), location_api)
+    assert [(line, "JSON object" in message) for line, message in stats["errors"]] == [(3, True)]
+    assert [(a.activity_type, a.status) for a in activities] == [("Gas Leak", "Active"), ("Checkpoint", "Closed")]
+    assert (activities[0].lat, activities[0].lng) == (1.0, 2.0)
+    assert location_api.backend.addresses == ["Oak Ave"]
@@ -0,0 +1,79 @@
+"""Marker clusters and cached output of the map generator"""
+
+from ice_tracker.mapgen import ClusterIndex
+from ice_tracker.models import ICEActivity
+from ice_tracker.store import ActivityStore
+
+def make_activity(lat: float, lng: float, priority: str = "Medium", **fields) -> ICEActivity:
+    activity = ICEActivity()
+    activity.activity_type = "Checkpoint"
+    activity.location = "Main St & 1st"
+    activity.lat, activity.lng, activity.priority = lat, lng, priority
+    for name, value in fields.items():
+        setattr(activity, name, value)
+    return activity
+
+def test_clusters_merge_at_low_zoom_and_split_at_high_zoom():
+    index = ClusterIndex()
+    store = ActivityStore()
+    store.add_listener(index.on_change)
+    downtown = [store.add(make_activity(40.7128, -74.0060 + n * 0.001, priority="Critical")) for n in range(3)]
+    far = store.add(make_activity(34.0522, -118.2437, status="Closed"))
+    
+    world = index.clusters(0)
+    assert sum(cluster["count"] for cluster in world) == 4 == len(index)
+    (nyc,) = [cluster for cluster in index.clusters(5) if cluster["count"] == 3]
+    assert nyc["priorities"] == {"Critical": 3} and nyc["critical_open"] == 3
+    assert abs(nyc["lat"] - 40.7128) < 1e-9
+    
+    # Individual points at the finest zoom carry their id and exact coordinates
+    singles = {cluster["id"]: (cluster["lat"], cluster["lng"]) for cluster in index.clusters(ClusterIndex.MAX_ZOOM)}
+    assert singles == {a.id: (a.lat, a.lng) for a in downtown + [far]}
+    
+    # The bounding box (south, west, north, east) keeps only the clusters inside it
+    east_coast = index.clusters(10, bbox=(40.0, -75.0, 41.0, -73.0))
+    assert sum(cluster["count"] for cluster in east_coast) == 3
+
+def test_clusters_follow_updates_and_removes():
+    index = ClusterIndex()
+    store = ActivityStore()
+    store.add_listener(index.on_change)
+    first = store.add(make_activity(40.7128, -74.0060, priority="Critical"))
+    second = store.add(make_activity(40.7129, -74.0061))
+    store.update(first.id, status="Resolved")
+    (both,) = index.clusters(8)
+    assert both["count"] == 2 and both["critical_open"] == 0
+    
+    # Once one member is left the cluster resolves to its id again
+    store.remove(first.id)
+    (single,) = index.clusters(8)
+    assert single["id"] == second.id and (single["lat"], single["lng"]) == (second.lat, second.lng)
+    store.remove(second.id)
+    assert index.clusters(8) == [] and len(index) == 0
+
+def test_map_output_is_cached_by_version_and_features_by_activity():
+    from ice_tracker.mapgen import MapGenerator
+    
+    store = ActivityStore([make_activity(40.7128, -74.0060), make_activity(40.7130, -74.0070)])
+    generator = MapGenerator()
+    activities = list(store)
+    html = generator.generate_map_html(activities, version=store.version)
+    assert generator.generate_map_html(activities, version=store.version) is html
+    
+    first, second = activities
+    feature = generator.feature_json(second)
+    store.update(first.id, status="Closed")
+    payload = generator.geojson(activities, version=store.version)
+    assert '"status": "Closed"' in payload
+    assert generator.feature_json(second) is feature  # unchanged activities are not re-serialized
+    assert generator.generate_map_html(activities, version=store.version) is not html
+    
+    # Without a store version the key is a hash of (id, version) pairs
+    key = MapGenerator.cache_key(activities)
+    assert MapGenerator.cache_key(list(activities)) == key
+    store.update(second.id, description="moved")
+    assert MapGenerator.cache_key(activities) != key
+    
+    store.remove(first.id)
+    generator.geojson([second], version=store.version)
+    assert first.id not in generator._feature_cache
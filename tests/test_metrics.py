@@ -0,0 +1,37 @@
+"""Percentiles and counters of the metrics registry"""
+
+import pytest
+
+from ice_tracker.metrics import LatencyHistogram, Metrics
+
+@pytest.mark.parametrize("values, q, expected", [
+    ([1, 2, 3, 4, 5], 50, 3),
+    ([1, 2, 3, 4, 5], 100, 5),
+    ([1, 2, 3, 4, 5], 1, 1),
+    (list(range(1, 31)), 95, 29),
+    (list(range(1, 101)), 99, 99),
+    (list(range(1, 11)), 25, 3),
+    ([], 50, 0.0),
+])
+def test_nearest_rank_percentile(values, q, expected):
+    assert LatencyHistogram.percentile(values, q) == expected
+
+def test_summary_reports_milliseconds_of_the_recent_window():
+    histogram = LatencyHistogram(size=4)
+    for seconds in (10.0, 0.001, 0.002, 0.003, 0.004):
+        histogram.observe(seconds)
+    summary = histogram.summary()
+    assert summary["count"] == 5
+    assert summary["max_ms"] == pytest.approx(10000.0)
+    assert summary["window"] == 4
+    assert summary["p50_ms"] == pytest.approx(2.0)
+    assert summary["p99_ms"] == pytest.approx(4.0)
+
+def test_timer_counts_errors():
+    metrics = Metrics()
+    with pytest.raises(ValueError):
+        with metrics.timer("save"):
+            raise ValueError
+    snapshot = metrics.snapshot()
+    assert snapshot["timers"]["save"]["count"] == 1
+    assert snapshot["counters"] == {"save.errors": 1}
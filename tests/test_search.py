@@ -0,0 +1,62 @@
+"""Ranked prefix search over activity text"""
+
+from ice_tracker.models import ICEActivity
+from ice_tracker.search import SearchIndex, tokenize
+from ice_tracker.store import ActivityStore
+
+def make_activity(activity_type: str, location: str = "Main St & 1st", description: str = "",
+                  ts: float = 1000.0, **fields) -> ICEActivity:
+    activity = ICEActivity()
+    activity.activity_type = activity_type
+    activity.location = location
+    activity.description = description
+    activity.ts = ts
+    for name, value in fields.items():
+        setattr(activity, name, value)
+    return activity
+
+def make_index(*activities):
+    store = ActivityStore()
+    index = SearchIndex()
+    store.add_listener(index.on_change)
+    for activity in activities:
+        store.add(activity)
+    return store, index
+
+def test_tokenize_lowercases_words():
+    assert tokenize("Kitchen fire, 2nd-floor!") == ["kitchen", "fire", "2nd", "floor"]
+
+def test_every_word_must_match_by_prefix():
+    fire = make_activity("Fire Emergency", description="Kitchen fire on the second floor")
+    flood = make_activity("Flooding", location="Harbor Rd", assigned_personnel=["Fire Station 1"])
+    store, index = make_index(fire, flood)
+    assert index.expand("fl") == ["flooding", "floor"]
+    assert set(index.search_ids("fi")) == {fire.id, flood.id}
+    assert index.search_ids("kit fl") == [fire.id]
+    assert index.search_ids("harbor station") == [flood.id]
+    assert index.search_ids("fire zzz") == []
+    assert index.search_ids("  ") == []
+
+def test_ranking_weights_fields_and_prefers_exact_words():
+    in_type = make_activity("Gas Leak")
+    in_description = make_activity("Checkpoint", description="gas smell reported")
+    prefix_only = make_activity("Gasoline Spill")
+    store, index = make_index(in_type, in_description, prefix_only)
+    # Type outweighs description; an exact word outweighs a prefix match in the same field
+    assert index.search_ids("gas") == [in_type.id, prefix_only.id, in_description.id]
+    assert index.search_ids("gas", limit=1) == [in_type.id]
+    
+    # Equal scores fall back to recency
+    newer = make_activity("Gas Leak", ts=2000.0)
+    store.add(newer)
+    assert index.search_ids("leak") == [newer.id, in_type.id]
+
+def test_updates_and_removes_reindex_only_changed_terms():
+    activity = make_activity("Checkpoint", description="road closed")
+    store, index = make_index(activity)
+    store.update(activity.id, description="road reopened")
+    assert index.search_ids("closed") == []
+    assert index.search_ids("reopen") == [activity.id]
+    store.remove(activity.id)
+    assert index.search_ids("road") == [] and len(index) == 0
+    assert index.expand("") == []
@@ -0,0 +1,273 @@
+"""Round trips through the journal, its compaction and the snapshot formats"""
+
+import pytest
+
+from ice_tracker.models import ICEActivity
+from ice_tracker.storage import ActivityJournal, PersistenceWorker, decode_snapshot, encode_snapshot
+
+def make_record(activity_type: str = "Checkpoint", **fields) -> dict:
+    activity = ICEActivity()
+    activity.activity_type = activity_type
+    activity.location = "Main St & 1st"
+    for name, value in fields.items():
+        setattr(activity, name, value)
+    return activity.to_dict()
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return str(tmp_path / "ice_activities.json")
+
+def load_ids(snapshot_path: str, **options) -> set:
+    journal = ActivityJournal(snapshot_path, **options)
+    try:
+        return {activity.id for activity in journal.load()}
+    finally:
+        journal.close()
+
+def load_records(snapshot_path: str, **options) -> dict:
+    journal = ActivityJournal(snapshot_path, **options)
+    try:
+        return {activity.id: activity.to_dict() for activity in journal.load()}
+    finally:
+        journal.close()
+
+def test_load_without_any_files_raises(snapshot_path):
+    with pytest.raises(FileNotFoundError):
+        ActivityJournal(snapshot_path).load()
+
+def test_journal_replays_puts_updates_and_deletes(snapshot_path):
+    kept, updated, deleted = make_record(), make_record("Flooding"), make_record("Gas Leak")
+    journal = ActivityJournal(snapshot_path)
+    journal.append([kept, updated, deleted])
+    journal.append([dict(updated, status="Resolved", version=1)], deleted_ids=[deleted["id"]])
+    journal.close()
+    
+    records = load_records(snapshot_path)
+    assert records.keys() == {kept["id"], updated["id"]}
+    assert records[kept["id"]] == kept
+    assert records[updated["id"]]["status"] == "Resolved"
+    assert records[updated["id"]]["version"] == 1
+
+def test_torn_journal_tail_is_cut(snapshot_path):
+    record = make_record()
+    journal = ActivityJournal(snapshot_path)
+    journal.append([record])
+    journal.close()
+    with open(journal.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"op": "put", "activ')  # crash mid-append
+    
+    assert load_ids(snapshot_path) == {record["id"]}
+    journal = ActivityJournal(snapshot_path)
+    later = make_record("Flooding")
+    journal.append([later])  # starts on a clean line
+    journal.close()
+    assert load_ids(snapshot_path) == {record["id"], later["id"]}
+
+@pytest.mark.parametrize("snapshot_format", ["json", "binary"])
+def test_compaction_then_more_appends(snapshot_path, snapshot_format):
+    journal = ActivityJournal(snapshot_path, snapshot_format=snapshot_format)
+    records = [make_record(), make_record("Medical Emergency", priority="Critical")]
+    journal.append(records)
+    journal.compact(records, background=False)
+    assert journal._segments() == []
+    later = make_record("Flooding")
+    journal.append([later], deleted_ids=[records[0]["id"]])
+    journal.close()
+    
+    loaded = load_records(snapshot_path, snapshot_format=snapshot_format)
+    assert loaded == {record["id"]: record for record in (records[1], later)}
+
+def test_binary_snapshot_round_trip():
+    records = [
+        make_record(),
+        make_record("Fire Emergency", description="Kitchen fire, 2nd floor — smoke visible",
+                    priority="Critical", status="In Progress", assigned_personnel=["Fire Station 1", "EMT"],
+                    resources_needed=["Fire Truck"], alert_radius=2500.5, version=7),
+        make_record("Unlisted Type", priority="Unknown", status="Unknown", location="Ünïcode Straße"),
+    ]
+    assert [activity.to_dict() for activity in decode_snapshot(encode_snapshot(records))] == records
+
+def test_binary_snapshot_rejects_other_data():
+    with pytest.raises(ValueError):
+        decode_snapshot(b"JSON" + bytes(32))
+
+def test_compaction_keeps_records_appended_by_another_process(snapshot_path):
+    gui = ActivityJournal(snapshot_path)
+    mine = make_record()
+    gui.append([mine])
+    gui.sync()
+    
+    # `python -m ice_tracker add` while the GUI is running
+    cli = ActivityJournal(snapshot_path)
+    theirs = make_record("Medical Emergency")
+    cli.append([theirs])
+    cli.close()
+    
+    gui.compact([mine], background=False)  # the GUI only knows its own records
+    gui.close()
+    assert load_ids(snapshot_path) == {mine["id"], theirs["id"]}
+
+def test_sqlite_imports_json_history_after_an_early_add(tmp_path, snapshot_path):
+    from ice_tracker.sqlite_storage import SQLiteActivityStorage
+    
+    history = [make_record(), make_record("Fire Emergency", status="Closed")]
+    journal = ActivityJournal(snapshot_path)
+    journal.compact(history, background=False)
+    journal.close()
+    
+    db_path = str(tmp_path / "ice_activities.db")
+    storage = SQLiteActivityStorage(db_path, snapshot_path)
+    added = make_record("Flooding")
+    storage.append([added])  # `ICE_STORAGE=sqlite python -m ice_tracker add` before any load
+    storage.close()
+    
+    storage = SQLiteActivityStorage(db_path, snapshot_path)
+    try:
+        assert {activity.id for activity in storage.load()} == {record["id"] for record in history + [added]}
+    finally:
+        storage.close()
+
+def test_sqlite_round_trip_and_display_order(tmp_path):
+    from ice_tracker.sqlite_storage import SQLiteActivityStorage
+    
+    db_path = str(tmp_path / "ice_activities.db")
+    storage = SQLiteActivityStorage(db_path, str(tmp_path / "missing.json"))
+    with pytest.raises(FileNotFoundError):
+        storage.load()
+    low = make_record(priority="Low", ts=1000.0)
+    critical_old = make_record(priority="Critical", ts=2000.0)
+    critical_new = make_record(priority="Critical", ts=3000.0, status="Resolved")
+    gone = make_record()
+    storage.append([low, critical_old, critical_new, gone])
+    storage.append([dict(low, description="updated", version=1)], deleted_ids=[gone["id"]])
+    storage.close()
+    
+    storage = SQLiteActivityStorage(db_path, str(tmp_path / "missing.json"))
+    try:
+        records = {activity.id: activity.to_dict() for activity in storage.load()}
+        assert records.keys() == {low["id"], critical_old["id"], critical_new["id"]}
+        assert records[critical_new["id"]] == critical_new
+        assert records[low["id"]]["description"] == "updated"
+        # Same order as the GUI list: rank then time, descending
+        assert storage.query_ids() == [low["id"], critical_new["id"], critical_old["id"]]
+        assert storage.query_ids(status="Resolved") == [critical_new["id"]]
+    finally:
+        storage.close()
+
+def open_lazy(backend: str, tmp_path, snapshot_path, records: list):
+    """Storage of the given backend holding records, loaded with load_open"""
+    from ice_tracker.sqlite_storage import SQLiteActivityStorage
+    
+    if backend == "json":
+        storage = ActivityJournal(snapshot_path)
+    else:
+        storage = SQLiteActivityStorage(str(tmp_path / "ice_activities.db"), snapshot_path)
+    storage.append(records)
+    return storage, storage.load_open()
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_history_that_reaches_the_store_is_claimed_once(tmp_path, snapshot_path, backend):
+    open_record = make_record()
+    synced, paged = make_record("Flooding", status="Resolved", ts=2000.0), make_record(status="Closed", ts=1000.0)
+    storage, loaded = open_lazy(backend, tmp_path, snapshot_path, [open_record, synced, paged])
+    try:
+        assert [activity.id for activity in loaded] == [open_record["id"]]
+        assert storage.cold_count() == 2
+        
+        # Another station reopened and re-prioritized it: the claim goes by id, not by bucket
+        storage.claim_cold(ICEActivity.from_dict(dict(synced, status="In Progress", priority="High")))
+        storage.claim_cold(ICEActivity.from_dict(synced))
+        storage.claim_cold(ICEActivity.from_dict(open_record))
+        assert storage.cold_count() == 1
+        assert storage.cold_count(status="Resolved") == 0
+        
+        page = storage.page_history()
+        assert [activity.id for activity in page] == [paged["id"]]
+        storage.claim_cold(page[0])
+        assert storage.cold_count() == 0
+        assert storage.page_history() == []
+        assert storage.cold_records() == []
+    finally:
+        storage.close()
+
+def test_worker_serializes_snapshot_activities_and_applies_later_changes(snapshot_path):
+    journal = ActivityJournal(snapshot_path)
+    writer = PersistenceWorker(journal, window=0.01)
+    activities = [ICEActivity.from_dict(make_record()), ICEActivity.from_dict(make_record("Flooding"))]
+    archived = make_record("Gas Leak", status="Closed")
+    writer.request_snapshot(activities + [archived])
+    activities[0].status = "Resolved"
+    activities[0].version += 1
+    writer.submit([activities[0].to_dict()], deleted_ids=[activities[1].id])
+    assert writer.flush(timeout=5)
+    writer.close()
+    journal.close()
+    
+    records = load_records(snapshot_path)
+    assert records == {activities[0].id: activities[0].to_dict(), archived["id"]: archived}
+
+def test_sqlite_imports_json_only_once(tmp_path, snapshot_path):
+    from ice_tracker.sqlite_storage import SQLiteActivityStorage
+    
+    history = [make_record(), make_record("Flooding")]
+    journal = ActivityJournal(snapshot_path)
+    journal.compact(history, background=False)
+    journal.close()
+    
+    db_path = str(tmp_path / "ice_activities.db")
+    storage = SQLiteActivityStorage(db_path, snapshot_path)
+    assert len(storage.load()) == 2
+    assert storage._conn.execute("PRAGMA user_version").fetchone()[0] == SQLiteActivityStorage.JSON_IMPORTED
+    storage.append([], deleted_ids=[history[0]["id"]])
+    storage.close()
+    
+    storage = SQLiteActivityStorage(db_path, snapshot_path)
+    try:
+        # The JSON file is still there, but a deleted row is not imported again
+        assert [activity.id for activity in storage.load()] == [history[1]["id"]]
+    finally:
+        storage.close()
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_lazy_load_pages_history_newest_first(tmp_path, snapshot_path, backend):
+    # Equal timestamps exercise the (ts, id) tie-break of the SQLite keyset cursor
+    history = [make_record(status="Resolved" if n % 2 else "Closed", priority="Critical" if n < 2 else "Low",
+                           ts=1000.0 + n // 2) for n in range(7)]
+    active = make_record(priority="Critical")
+    storage, loaded = open_lazy(backend, tmp_path, snapshot_path, history + [active])
+    try:
+        assert [activity.id for activity in loaded] == [active["id"]]
+        assert storage.cold_count() == 7
+        assert storage.cold_count(status="Resolved") == 3
+        assert storage.cold_count(priority="Critical") == 2
+        assert storage.cold_count(status="Closed", priority="Critical") == 1
+        
+        pages = []
+        while True:
+            page = storage.page_history(limit=3)
+            if not page:
+                break
+            pages.append(page)
+            for activity in page:
+                storage.claim_cold(activity)
+        assert [len(page) for page in pages] == [3, 3, 1]
+        paged = [activity for page in pages for activity in page]
+        assert {activity.id for activity in paged} == {record["id"] for record in history}
+        timestamps = [activity.ts for activity in paged]
+        assert timestamps == sorted(timestamps, reverse=True)
+        assert storage.cold_count() == 0
+    finally:
+        storage.close()
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_lazy_load_pages_one_status(tmp_path, snapshot_path, backend):
+    resolved = [make_record(status="Resolved", ts=1000.0 + n) for n in range(3)]
+    closed = make_record(status="Closed", ts=5000.0)
+    storage, loaded = open_lazy(backend, tmp_path, snapshot_path, resolved + [closed])
+    try:
+        assert loaded == []
+        assert [a.id for a in storage.page_history(status="Resolved", limit=2)] == [resolved[2]["id"], resolved[1]["id"]]
+        assert [a.id for a in storage.page_history(status="Resolved", limit=2)] == [resolved[0]["id"]]
+        assert [a.id for a in storage.page_history(status="Closed")] == [closed["id"]]
+    finally:
+        storage.close()
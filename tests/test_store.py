@@ -0,0 +1,79 @@
+"""ActivityStore and the indexes it keeps current through its listeners"""
+
+from ice_tracker.models import ICEActivity
+from ice_tracker.store import ActivityStore, TimeIndex
+
+def make_activity(activity_type: str = "Checkpoint", **fields) -> ICEActivity:
+    activity = ICEActivity()
+    activity.activity_type = activity_type
+    activity.location = "Main St & 1st"
+    for name, value in fields.items():
+        setattr(activity, name, value)
+    return activity
+
+def ids(activities) -> set:
+    return {activity.id for activity in activities}
+
+def test_status_and_priority_indexes_follow_updates_and_removes():
+    critical = make_activity(priority="Critical")
+    closed = make_activity(priority="Critical", status="Closed")
+    low = make_activity(priority="Low", status="In Progress")
+    store = ActivityStore([critical, closed, low])
+    assert len(store) == 3 and critical.id in store
+    assert ids(store.filter(priority="Critical")) == {critical.id, closed.id}
+    assert ids(store.filter(status="Active", priority="Critical")) == {critical.id}
+    assert store.count(status="In Progress") == 1
+    
+    store.update(low.id, priority="Critical", status="Active")
+    assert ids(store.filter(status="Active", priority="Critical")) == {critical.id, low.id}
+    assert store.count(status="In Progress") == 0 and store.count(priority="Low") == 0
+    
+    assert store.remove(critical.id) is critical
+    assert store.remove(critical.id) is None
+    assert store.get(critical.id) is None
+    assert ids(store.filter(priority="Critical")) == {closed.id, low.id}
+    assert store.update(critical.id, status="Closed") is None
+
+def test_versions_and_listener_events():
+    first, second = make_activity(), make_activity("Flooding")
+    store = ActivityStore([first])
+    events = []
+    store.add_listener(lambda event, activity: events.append((event, activity.id)))
+    assert events == [("add", first.id)]  # existing activities are replayed
+    
+    version = store.version
+    store.add(second)
+    store.update(second.id, description="water rising")
+    store.update(second.id, status="Resolved")
+    store.remove(first.id)
+    assert store.version == version + 4
+    assert second.version == 2 and first.version == 0
+    assert events[1:] == [("add", second.id), ("update", second.id), ("update", second.id),
+                          ("remove", first.id)]
+    
+    # Re-adding an id replaces the object and moves it to the new object's indexes
+    replacement = make_activity("Flooding", priority="High")
+    replacement.id = second.id
+    store.add(replacement)
+    assert store.get(second.id) is replacement and len(store) == 1
+    assert store.count(status="Resolved") == 0 and store.count(priority="High") == 1
+
+def test_time_index_ranges_per_priority():
+    index = TimeIndex()
+    store = ActivityStore()
+    store.add_listener(index.on_change)
+    old = store.add(make_activity(priority="High", ts=100.0))
+    middle = store.add(make_activity(priority="Low", ts=200.0))
+    new = store.add(make_activity(priority="High", ts=300.0))
+    assert index.range() == [old.id, middle.id, new.id]
+    assert index.range(since=200.0) == [middle.id, new.id]
+    assert index.range(until=300.0, priority="High") == [old.id]
+    assert index.count(since=150.0, until=250.0) == 1
+    assert index.range(priority="Critical") == [] and index.count(priority="Critical") == 0
+    
+    store.update(old.id, ts=250.0, priority="Low")
+    assert index.range(priority="Low") == [middle.id, old.id]
+    assert sorted(index.priorities()) == ["High", "Low"]
+    store.remove(new.id)
+    assert index.priorities() == ["Low"]
+    assert len(index) == 2 and index.range(since=260.0) == []
@@ -0,0 +1,172 @@
+"""StationSync against a real SyncServer on a free local port"""
+
+import threading
+import time
+
+import pytest
+
+from ice_tracker.models import ICEActivity
+from ice_tracker.store import ActivityStore
+from ice_tracker.sync import StationSync, SyncClient, SyncConflict, SyncServer, SyncStore
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+class FlakyClient(SyncClient):
+    """Fails the first `failures` creates as if the server were unreachable"""
+    
+    def __init__(self, url: str, failures: int = 1):
+        super().__init__(url)
+        self.failures = failures
+        self.create_calls = 0
+    
+    def create(self, records):
+        self.create_calls += 1
+        if self.create_calls <= self.failures:
+            raise ConnectionRefusedError("store unreachable")
+        return super().create(records)
+
+def make_activity(activity_type: str = "Checkpoint") -> ICEActivity:
+    activity = ICEActivity()
+    activity.activity_type = activity_type
+    activity.location = "Main St & 1st"
+    return activity
+
+def test_store_versions_conflicts_and_changes():
+    store = SyncStore()
+    first, second = make_activity().to_dict(), make_activity("Flooding").to_dict()
+    created, conflicts = store.create([first, second])
+    assert len(created) == 2 and conflicts == []
+    assert store.create([first])[1] == [first]
+    
+    updated = store.replace(first["id"], 0, dict(first, status="Closed"))
+    assert updated["version"] == 1
+    with pytest.raises(SyncConflict) as conflict:
+        store.replace(first["id"], 0, dict(first, description="stale edit"))
+    assert conflict.value.current == updated
+    with pytest.raises(SyncConflict):
+        store.delete(first["id"], 0)
+    store.delete(second["id"], 0)
+    with pytest.raises(KeyError):
+        store.replace(second["id"], 1, second)
+    with pytest.raises(ValueError):
+        store.create([{"id": "x"}])
+    
+    seq = store.changes()["seq"]
+    assert [(change["id"], change["record"] is None) for change in store.changes()["changes"]] == \
+        [(first["id"], False), (second["id"], True)]
+    store.replace(first["id"], 1, dict(updated, description="again"))
+    later = store.changes(since=seq)
+    assert [(change["id"], change["record"]["version"]) for change in later["changes"]] == [(first["id"], 2)]
+    tombstone = [change for change in store.changes(since=2)["changes"] if change["id"] == second["id"]]
+    assert tombstone[0]["record"] is None
+
+def test_changes_are_paged():
+    store = SyncStore()
+    records = [make_activity().to_dict() for _ in range(5)]
+    store.create(records)
+    page = store.changes(limit=2)
+    assert page["more"] and len(page["changes"]) == 2
+    rest = store.changes(since=page["seq"], limit=10)
+    assert not rest["more"]
+    assert [change["id"] for change in page["changes"] + rest["changes"]] == [record["id"] for record in records]
+
+@pytest.fixture
+def server():
+    server = SyncServer(SyncStore(), port=0)
+    server.start()
+    yield server
+    server.stop()
+
+def make_station(client, **callbacks):
+    store = ActivityStore()
+    lock = threading.Lock()
+    
+    def dispatch(fn, *args):
+        with lock:  # stands in for the Tk thread
+            fn(*args)
+    
+    station = StationSync(store, client, dispatch, interval=0.05, **callbacks)
+    return store, station, lock
+
+def test_create_is_retried_after_the_store_was_unreachable(server):
+    client = FlakyClient(server.url)
+    store, station, lock = make_station(client)
+    station.start()
+    try:
+        assert wait_for(lambda: station.online)
+        activity = ICEActivity()
+        activity.activity_type = "Checkpoint"
+        with lock:
+            store.add(activity)
+        assert wait_for(lambda: server.store.get(activity.id) is not None)
+        assert client.create_calls >= 2
+    finally:
+        station.stop()
+
+def test_concurrent_updates_conflict_and_converge(server):
+    conflicts = []
+    store_a, station_a, lock_a = make_station(SyncClient(server.url), on_conflict=conflicts.append)
+    store_b, station_b, lock_b = make_station(SyncClient(server.url), on_conflict=conflicts.append)
+    station_a.start()
+    station_b.start()
+    try:
+        activity = make_activity()
+        with lock_a:
+            store_a.add(activity)
+        assert wait_for(lambda: activity.id in store_b)
+        
+        # Both stations edit version 0 before either sees the other's change
+        with lock_a, lock_b:
+            store_a.update(activity.id, status="Closed")
+            store_b.update(activity.id, description="second unit on scene")
+        assert wait_for(lambda: len(conflicts) == 1)
+        assert wait_for(lambda: store_a.get(activity.id).to_dict() == store_b.get(activity.id).to_dict()
+                        == server.store.get(activity.id))
+        assert server.store.get(activity.id)["version"] == 1
+        
+        with lock_b:
+            store_b.remove(activity.id)
+        assert wait_for(lambda: activity.id not in store_a)
+        assert server.store.get(activity.id) is None
+    finally:
+        station_a.stop()
+        station_b.stop()
+
+def test_station_pushes_its_local_activities_when_it_joins(server):
+    existing = make_activity()
+    server.store.create([existing.to_dict()])
+    store, station, lock = make_station(SyncClient(server.url))
+    local = make_activity("Flooding")
+    store.add(local)
+    station.start()
+    try:
+        assert wait_for(lambda: existing.id in store)
+        assert wait_for(lambda: server.store.get(local.id) is not None)
+    finally:
+        station.stop()
+
+def test_conflict_after_two_local_edits_loads_the_server_version(server):
+    conflicts = []
+    store, station, lock = make_station(SyncClient(server.url), on_conflict=conflicts.append)
+    activity = make_activity()
+    server.store.create([activity.to_dict()])
+    station.start()
+    try:
+        assert wait_for(lambda: activity.id in store)
+        with lock:  # the station sees nothing from the server until both edits are made
+            theirs = server.store.replace(activity.id, 0, dict(activity.to_dict(), status="In Progress"))
+            store.update(activity.id, status="Closed")
+            store.update(activity.id, description="closed at the scene")
+        assert wait_for(lambda: len(conflicts) == 1)
+        assert wait_for(lambda: store.get(activity.id).to_dict() == theirs)
+        time.sleep(0.2)  # later pulls keep the station on the server's version
+        assert store.get(activity.id).to_dict() == server.store.get(activity.id) == theirs
+        assert conflicts == [theirs]
+    finally:
+        station.stop()